@@ -16,6 +16,8 @@ from app.models import (
     Listing,
     Market,
     Sale,
+    SyncWatermark,
+    GiftFacet,
     User,
     Referral,
     ReferralReward,
@@ -0,0 +1,47 @@
+"""Add sync watermarks for incremental market syncs
+
+Revision ID: 003_sync_watermarks
+Revises: 002_add_user_social
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '003_sync_watermarks'
+down_revision = '002_add_user_social'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ============================================================
+    # SYNC WATERMARKS - Delta sync position per market/collection
+    # ============================================================
+    op.create_table(
+        'sync_watermarks',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('market_id', sa.Integer(), sa.ForeignKey('markets.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('collection_id', sa.Integer(), sa.ForeignKey('collections.id', ondelete='CASCADE'), nullable=False),
+
+        # Position
+        sa.Column('last_listed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('head_listing_ids', postgresql.JSONB(), server_default='{}'),
+
+        # Run bookkeeping
+        sa.Column('last_mode', sa.String(20), nullable=True),
+        sa.Column('last_sync_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_full_sync_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_items_seen', sa.Integer(), server_default='0'),
+
+        # Timestamps
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+
+        sa.UniqueConstraint('market_id', 'collection_id', name='uq_sync_watermarks_market_collection'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sync_watermarks')
@@ -0,0 +1,43 @@
+"""Add gift facet summary table
+
+Revision ID: 004_gift_facets
+Revises: 003_sync_watermarks
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '004_gift_facets'
+down_revision = '003_sync_watermarks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ============================================================
+    # GIFT FACETS - Precomputed filter counts / floors of gifts on sale
+    # ============================================================
+    op.create_table(
+        'gift_facets',
+        sa.Column('id', sa.Integer(), primary_key=True),
+
+        # Scope ('' = all gift types) and attribute value
+        sa.Column('gift_type', sa.String(200), nullable=False, server_default=''),
+        sa.Column('dimension', sa.String(20), nullable=False),
+        sa.Column('value', sa.String(200), nullable=False),
+
+        # Aggregates
+        sa.Column('count_on_sale', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('floor_price_ton', sa.Numeric(18, 9), nullable=True),
+        sa.Column('max_price_ton', sa.Numeric(18, 9), nullable=True),
+        sa.Column('image_url', sa.String(500), nullable=True),
+
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+
+        sa.UniqueConstraint('gift_type', 'dimension', 'value', name='uq_gift_facets_scope_value'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('gift_facets')
@@ -0,0 +1,97 @@
+"""Composite, partial and trigram indexes for /gifts; stored rarity rank
+
+Adding the stored rarity_rank column rewrites the whole nfts table under
+an ACCESS EXCLUSIVE lock: reads and writes of nfts wait until it is done,
+so run this migration with syncs paused. The indexes are then built
+CONCURRENTLY and don't block writes.
+
+Revision ID: 005_nft_query_indexes
+Revises: 004_gift_facets
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '005_nft_query_indexes'
+down_revision = '004_gift_facets'
+branch_labels = None
+depends_on = None
+
+RARITY_RANK_SQL = (
+    "CASE rarity WHEN 'Common' THEN 1 WHEN 'Uncommon' THEN 2 WHEN 'Rare' THEN 3 "
+    "WHEN 'Epic' THEN 4 WHEN 'Legendary' THEN 5 ELSE 0 END"
+)
+
+ON_SALE = sa.text('is_on_sale = true')
+
+
+def upgrade() -> None:
+    # gift_type was added to the model after 001 (created by init_db on
+    # existing databases); make sure it exists before indexing it
+    op.execute("ALTER TABLE nfts ADD COLUMN IF NOT EXISTS gift_type VARCHAR(200)")
+
+    # ============================================================
+    # RARITY RANK - stored sort key instead of a runtime CASE
+    # ============================================================
+    op.add_column(
+        'nfts',
+        sa.Column('rarity_rank', sa.SmallInteger(), sa.Computed(RARITY_RANK_SQL, persisted=True), nullable=False),
+    )
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Built without locking writes (the table rewrite above does lock)
+    with op.get_context().autocommit_block():
+        # "on sale [, gift_type IN (...)] ORDER BY <key>, id" - filter and
+        # keyset order served by one index range scan
+        op.create_index(
+            'idx_nfts_sale_gift_type_price', 'nfts', ['gift_type', 'lowest_price_ton', 'id'],
+            postgresql_where=ON_SALE, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_nfts_sale_price_id', 'nfts', ['lowest_price_ton', 'id'],
+            postgresql_where=ON_SALE, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_nfts_sale_rarity_rank', 'nfts', ['rarity_rank', 'id'],
+            postgresql_where=ON_SALE, postgresql_concurrently=True,
+        )
+        # sort=recent: same NULLS placement as its ORDER BY, or the planner
+        # can't walk the index and sorts instead
+        op.create_index(
+            'idx_nfts_created_at', 'nfts', [sa.text('created_at DESC NULLS LAST'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+        # search: ILIKE '%q%' on name / gift_type
+        op.create_index(
+            'idx_nfts_name_trgm', 'nfts', ['name'],
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_nfts_gift_type_trgm', 'nfts', ['gift_type'],
+            postgresql_using='gin', postgresql_ops={'gift_type': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+        # Superseded by idx_nfts_sale_price_id
+        op.drop_index('idx_nfts_price', table_name='nfts', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_nfts_price', 'nfts', ['lowest_price_ton'],
+            postgresql_where=ON_SALE, postgresql_concurrently=True,
+        )
+        for name in (
+            'idx_nfts_gift_type_trgm',
+            'idx_nfts_name_trgm',
+            'idx_nfts_created_at',
+            'idx_nfts_sale_rarity_rank',
+            'idx_nfts_sale_price_id',
+            'idx_nfts_sale_gift_type_price',
+        ):
+            op.drop_index(name, table_name='nfts', postgresql_concurrently=True)
+
+    op.drop_column('nfts', 'rarity_rank')
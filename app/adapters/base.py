@@ -138,6 +138,39 @@ class BaseMarketAdapter(ABC):
         """
         pass
 
+    async def iter_collection_pages(
+        self,
+        collection_address: str,
+        batch_size: int = 100,
+    ) -> AsyncIterator[list[NormalizedListing]]:
+        """
+        Iterate over collection listings page by page.
+
+        This is the pagination hook used by streaming syncs: each yielded
+        page is handed downstream before the next one is requested, so
+        only one page is held in memory. Markets with native pagination
+        must override it.
+
+        The default implementation is a fallback for adapters without
+        pagination support: a single fetch_collection_listings() call
+        re-chunked into pages of batch_size (the whole result is still
+        loaded at once).
+
+        A failed request must raise, not end the iteration: a full sync
+        treats the end of the pages as the end of the market's listings
+        and deactivates every listing it has not seen.
+
+        Args:
+            collection_address: Collection address
+            batch_size: Items per page
+
+        Yields:
+            Lists of normalized listings (one per page)
+        """
+        listings = await self.fetch_collection_listings(collection_address, limit=10000)
+        for start in range(0, len(listings), batch_size):
+            yield listings[start:start + batch_size]
+
     async def iter_collection_listings(
         self,
         collection_address: str,
@@ -146,8 +179,8 @@ class BaseMarketAdapter(ABC):
         """
         Iterate over collection listings with pagination.
 
-        Default implementation uses fetch_collection_listings.
-        Override for markets with native pagination.
+        Flattens iter_collection_pages(); adapters plug in by overriding
+        the page iterator.
 
         Args:
             collection_address: Collection address
@@ -156,9 +189,9 @@ class BaseMarketAdapter(ABC):
         Yields:
             NormalizedListing for each active listing
         """
-        listings = await self.fetch_collection_listings(collection_address, limit=10000)
-        for listing in listings:
-            yield listing
+        async for page in self.iter_collection_pages(collection_address, batch_size):
+            for listing in page:
+                yield listing
 
     @abstractmethod
     async def fetch_nft_listing(
@@ -252,36 +252,52 @@ class FragmentAdapter(BaseMarketAdapter):
             logger.error(f"Error fetching Fragment collection listings: {e}")
             raise
 
-    async def iter_collection_listings(
+    async def iter_collection_pages(
         self,
         collection_address: str,
         batch_size: int = 100,
-    ) -> AsyncIterator[NormalizedListing]:
+    ) -> AsyncIterator[list[NormalizedListing]]:
         """
-        Iterate over collection listings with pagination.
+        Iterate over collection listings page by page.
 
         Memory-efficient alternative to fetch_collection_listings for
-        large collections.
+        large collections: each TON API page of items is filtered down
+        to the ones on sale and yielded before the next page is fetched.
 
         Args:
             collection_address: Collection address
             batch_size: Items per API request
 
         Yields:
-            NormalizedListing for each active listing
+            Lists of normalized listings (one per API page)
         """
-        try:
-            async for nft in self.ton_client.iter_collection_items(
-                collection_address=collection_address,
-                batch_size=batch_size,
-            ):
+        offset = 0
+
+        while True:
+            try:
+                items = await self.ton_client.get_collection_items(
+                    collection_address=collection_address,
+                    limit=batch_size,
+                    offset=offset,
+                )
+            except Exception as e:
+                logger.error(f"Error iterating Fragment listings: {e}")
+                raise
+
+            if not items:
+                break
+
+            page = []
+            for nft in items:
                 listing = self._parse_nft_to_listing(nft)
                 if listing:
-                    yield listing
+                    page.append(listing)
+            yield page
 
-        except Exception as e:
-            logger.error(f"Error iterating Fragment listings: {e}")
-            raise
+            if len(items) < batch_size:
+                break
+
+            offset += len(items)
 
     async def fetch_nft_listing(
         self,
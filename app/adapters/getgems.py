@@ -24,6 +24,8 @@ from app.adapters.base import (
     ListingStatus,
 )
 from app.config import settings
+from app.core.clients import get_http_client
+from app.core.ratelimit import get_rate_limiter, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -175,8 +177,7 @@ class GetGemsAdapter(BaseMarketAdapter):
     def __init__(self, config: dict = None):
         super().__init__(market_slug="getgems", config=config)
         self._client: Optional[httpx.AsyncClient] = None
-        self._rate_limit = settings.GETGEMS_RATE_LIMIT
-        self._last_request_time = 0.0
+        self._rate_limiter = get_rate_limiter("getgems", settings.GETGEMS_RATE_LIMIT)
 
     @property
     def name(self) -> str:
@@ -196,10 +197,10 @@ class GetGemsAdapter(BaseMarketAdapter):
         return Decimal("0")
 
     async def _get_client(self) -> httpx.AsyncClient:
-        """Get or create HTTP client."""
+        """Get the shared pooled HTTP client for the GetGems API."""
         if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(
-                timeout=httpx.Timeout(30.0),
+            self._client = get_http_client(
+                self.GRAPHQL_URL,
                 headers={
                     "Content-Type": "application/json",
                     "User-Agent": f"TONGiftAggregator/{settings.APP_VERSION}",
@@ -208,18 +209,8 @@ class GetGemsAdapter(BaseMarketAdapter):
         return self._client
 
     async def close(self):
-        """Close HTTP client."""
-        if self._client and not self._client.is_closed:
-            await self._client.aclose()
-
-    async def _rate_limit_wait(self):
-        """Wait to respect rate limit."""
-        now = asyncio.get_event_loop().time()
-        interval = 1.0 / self._rate_limit
-        elapsed = now - self._last_request_time
-        if elapsed < interval:
-            await asyncio.sleep(interval - elapsed)
-        self._last_request_time = asyncio.get_event_loop().time()
+        """Release HTTP client (the shared pool stays open for reuse)."""
+        self._client = None
 
     async def _graphql_request(
         self,
@@ -246,7 +237,7 @@ class GetGemsAdapter(BaseMarketAdapter):
 
         for attempt in range(retries):
             try:
-                await self._rate_limit_wait()
+                await self._rate_limiter.acquire()
 
                 response = await client.post(
                     self.GRAPHQL_URL,
@@ -266,9 +257,10 @@ class GetGemsAdapter(BaseMarketAdapter):
             except httpx.HTTPStatusError as e:
                 last_error = e
                 if e.response.status_code == 429:
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Rate limited, waiting {wait_time}s")
-                    await asyncio.sleep(wait_time)
+                    # The next acquire() waits out the pause
+                    await self._rate_limiter.penalize(
+                        parse_retry_after(e.response.headers.get("Retry-After"), default=2 ** attempt)
+                    )
                     continue
                 raise
 
@@ -344,49 +336,22 @@ class GetGemsAdapter(BaseMarketAdapter):
             List of normalized listings
         """
         listings = []
-        cursor = None
         batch_size = min(100, limit)  # GetGems max is ~100 per request
 
-        while len(listings) < limit:
-            variables = {
-                "collectionAddress": collection_address,
-                "first": batch_size,
-                "after": cursor,
-            }
-
-            try:
-                data = await self._graphql_request(COLLECTION_SALES_QUERY, variables)
-                sales_data = data.get("nftItemsOnSale", {})
-                edges = sales_data.get("edges", [])
-
-                if not edges:
-                    break
-
-                for edge in edges:
-                    listing = self._parse_listing(edge.get("node", {}))
-                    if listing:
-                        listings.append(listing)
-
-                # Check pagination
-                page_info = sales_data.get("pageInfo", {})
-                if not page_info.get("hasNextPage"):
-                    break
-
-                cursor = page_info.get("endCursor")
-
-            except Exception as e:
-                logger.error(f"Error fetching GetGems listings: {e}")
+        async for page in self.iter_collection_pages(collection_address, batch_size):
+            listings.extend(page)
+            if len(listings) >= limit:
                 break
 
         logger.info(f"Fetched {len(listings)} listings from GetGems for {collection_address}")
         return listings[:limit]
 
-    async def iter_collection_listings(
+    async def iter_collection_pages(
         self,
         collection_address: str,
         batch_size: int = 100,
-    ) -> AsyncIterator[NormalizedListing]:
-        """Iterate over collection listings with pagination."""
+    ) -> AsyncIterator[list[NormalizedListing]]:
+        """Iterate over collection listings page by page (cursor pagination)."""
         cursor = None
 
         while True:
@@ -398,28 +363,32 @@ class GetGemsAdapter(BaseMarketAdapter):
 
             try:
                 data = await self._graphql_request(COLLECTION_SALES_QUERY, variables)
-                sales_data = data.get("nftItemsOnSale", {})
-                edges = sales_data.get("edges", [])
-
-                if not edges:
-                    break
+            except Exception as e:
+                logger.error(f"Error fetching GetGems listings: {e}")
+                # A failed page is not the end of data: a full sync
+                # would reconcile the unread listings away
+                raise
 
-                for edge in edges:
-                    listing = self._parse_listing(edge.get("node", {}))
-                    if listing:
-                        yield listing
+            sales_data = data.get("nftItemsOnSale", {})
+            edges = sales_data.get("edges", [])
 
-                # Check pagination
-                page_info = sales_data.get("pageInfo", {})
-                if not page_info.get("hasNextPage"):
-                    break
+            if not edges:
+                break
 
-                cursor = page_info.get("endCursor")
+            page = []
+            for edge in edges:
+                listing = self._parse_listing(edge.get("node", {}))
+                if listing:
+                    page.append(listing)
+            yield page
 
-            except Exception as e:
-                logger.error(f"Error iterating GetGems listings: {e}")
+            # Check pagination
+            page_info = sales_data.get("pageInfo", {})
+            if not page_info.get("hasNextPage"):
                 break
 
+            cursor = page_info.get("endCursor")
+
     async def fetch_nft_listing(
         self,
         nft_address: str,
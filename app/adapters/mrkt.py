@@ -14,7 +14,7 @@ import logging
 import time
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import Optional, AsyncIterator
 
 import httpx
 
@@ -24,6 +24,8 @@ from app.adapters.base import (
     ListingStatus,
 )
 from app.config import settings
+from app.core.clients import get_http_client
+from app.core.ratelimit import get_rate_limiter, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -57,8 +59,9 @@ class MRKTAdapter(BaseMarketAdapter):
         self._client: Optional[httpx.AsyncClient] = None
 
         # Rate limiting - use config, then settings, then default
-        self._rate_limit = self.config.get("rate_limit", settings.MRKT_RATE_LIMIT)
-        self._last_request_time = 0.0
+        self._rate_limiter = get_rate_limiter(
+            "mrkt", self.config.get("rate_limit", settings.MRKT_RATE_LIMIT)
+        )
 
         # Authentication state
         self._access_token: Optional[str] = None
@@ -85,10 +88,10 @@ class MRKTAdapter(BaseMarketAdapter):
         return Decimal("2.0")
 
     async def _get_client(self) -> httpx.AsyncClient:
-        """Get or create HTTP client."""
+        """Get the shared pooled HTTP client for the MRKT API."""
         if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(
-                timeout=httpx.Timeout(30.0),
+            self._client = get_http_client(
+                self.BASE_URL,
                 headers={
                     "Content-Type": "application/json",
                     "User-Agent": f"TONGiftAggregator/{settings.APP_VERSION}",
@@ -98,21 +101,11 @@ class MRKTAdapter(BaseMarketAdapter):
         return self._client
 
     async def close(self):
-        """Close HTTP client and clear auth state."""
-        if self._client and not self._client.is_closed:
-            await self._client.aclose()
+        """Release HTTP client (the shared pool stays open) and clear auth state."""
+        self._client = None
         self._access_token = None
         self._token_expires_at = 0.0
 
-    async def _rate_limit_wait(self):
-        """Wait to respect rate limit."""
-        now = asyncio.get_event_loop().time()
-        interval = 1.0 / self._rate_limit
-        elapsed = now - self._last_request_time
-        if elapsed < interval:
-            await asyncio.sleep(interval - elapsed)
-        self._last_request_time = asyncio.get_event_loop().time()
-
     def _is_token_valid(self) -> bool:
         """Check if current access token is valid and not expiring soon."""
         if not self._access_token:
@@ -219,7 +212,7 @@ class MRKTAdapter(BaseMarketAdapter):
 
         for attempt in range(retries):
             try:
-                await self._rate_limit_wait()
+                await self._rate_limiter.acquire()
 
                 # Get fresh token if needed
                 token = await self._ensure_authenticated()
@@ -242,9 +235,10 @@ class MRKTAdapter(BaseMarketAdapter):
 
                 # Handle rate limiting
                 if response.status_code == 429:
-                    retry_after = int(response.headers.get("Retry-After", 2 ** attempt))
-                    logger.warning(f"MRKT rate limited, waiting {retry_after}s")
-                    await asyncio.sleep(retry_after)
+                    # The next acquire() waits out the pause
+                    await self._rate_limiter.penalize(
+                        parse_retry_after(response.headers.get("Retry-After"), default=2 ** attempt)
+                    )
                     continue
 
                 response.raise_for_status()
@@ -375,60 +369,82 @@ class MRKTAdapter(BaseMarketAdapter):
             List of normalized listings
         """
         listings = []
-        offset = 0
         batch_size = min(100, limit)  # Use reasonable batch size
 
-        while len(listings) < limit:
-            try:
-                params = {
-                    "limit": batch_size,
-                    "offset": offset,
-                }
-
-                # Try to filter by collection if API supports it
-                if collection_address:
-                    params["collection"] = collection_address
-
-                data = await self._api_request("GET", "/gifts/saling", params=params)
+        async for page in self.iter_collection_pages(collection_address, batch_size):
+            listings.extend(page)
+            if len(listings) >= limit:
+                break
 
-                # Handle response format
-                items = data.get("gifts", [])
-                if not items:
-                    # Try alternative response formats
-                    items = data.get("data", []) or data.get("items", []) or data.get("listings", [])
+        logger.info(f"Fetched {len(listings)} listings from MRKT for collection {collection_address}")
+        return listings[:limit]
 
-                if not items:
-                    break
+    async def iter_collection_pages(
+        self,
+        collection_address: str,
+        batch_size: int = 100,
+    ) -> AsyncIterator[list[NormalizedListing]]:
+        """
+        Iterate over collection listings page by page (offset pagination).
 
-                for item in items:
-                    listing = self._parse_listing(item)
-                    if listing:
-                        # Filter by collection if API doesn't support it natively
-                        if collection_address:
-                            item_collection = listing.extra.get("collection", "")
-                            if item_collection and collection_address.lower() not in item_collection.lower():
-                                continue
-                        listings.append(listing)
+        Args:
+            collection_address: NFT collection contract address or collection name
+            batch_size: Items per request
 
-                    if len(listings) >= limit:
-                        break
+        Yields:
+            Lists of normalized listings (one per API page)
+        """
+        offset = 0
 
-                # Check for pagination
-                total = data.get("total", 0)
-                if offset + batch_size >= total or len(items) < batch_size:
-                    break
+        while True:
+            params = {
+                "limit": batch_size,
+                "offset": offset,
+            }
 
-                offset += batch_size
+            # Try to filter by collection if API supports it
+            if collection_address:
+                params["collection"] = collection_address
 
+            try:
+                data = await self._api_request("GET", "/gifts/saling", params=params)
             except MRKTAuthError:
                 # Re-raise auth errors
                 raise
             except Exception as e:
                 logger.error(f"Error fetching MRKT listings: {e}")
+                # A failed page is not the end of data: a full sync
+                # would reconcile the unread listings away
+                raise
+
+            # Handle response format
+            items = data.get("gifts", [])
+            if not items:
+                # Try alternative response formats
+                items = data.get("data", []) or data.get("items", []) or data.get("listings", [])
+
+            if not items:
                 break
 
-        logger.info(f"Fetched {len(listings)} listings from MRKT for collection {collection_address}")
-        return listings[:limit]
+            page = []
+            for item in items:
+                listing = self._parse_listing(item)
+                if not listing:
+                    continue
+                # Filter by collection if API doesn't support it natively
+                if collection_address:
+                    item_collection = listing.extra.get("collection", "")
+                    if item_collection and collection_address.lower() not in item_collection.lower():
+                        continue
+                page.append(listing)
+            yield page
+
+            # Check for pagination
+            total = data.get("total", 0)
+            if offset + batch_size >= total or len(items) < batch_size:
+                break
+
+            offset += batch_size
 
     async def fetch_nft_listing(
         self,
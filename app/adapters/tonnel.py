@@ -20,6 +20,8 @@ from app.adapters.base import (
     NormalizedSale,
     ListingStatus,
 )
+from app.config import settings
+from app.core.ratelimit import get_rate_limiter, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +47,18 @@ class TonnelAdapter(BaseMarketAdapter):
             fee_sell_percent=Decimal("2.5"),
         )
 
+    @property
+    def _rate_limiter(self):
+        return get_rate_limiter("tonnel", settings.TONNEL_RATE_LIMIT)
+
+    async def _ensure_rate_limit(self):
+        """Wait for a token of the shared Tonnel rate limit."""
+        await self._rate_limiter.acquire()
+
+    async def _on_rate_limited(self, response: httpx.Response):
+        """Slow the shared limiter down after HTTP 429."""
+        await self._rate_limiter.penalize(parse_retry_after(response.headers.get("Retry-After")))
+
     async def fetch_collection_listings(
         self, collection_address: str, limit: int = 100
     ) -> AsyncIterator[NormalizedListing]:
@@ -78,6 +92,8 @@ class TonnelAdapter(BaseMarketAdapter):
             if e.response.status_code == 404:
                 logger.warning(f"Tonnel API endpoint not found: {endpoint}")
                 return
+            if e.response.status_code == 429:
+                await self._on_rate_limited(e.response)
             logger.error(f"HTTP error fetching Tonnel listings: {e}")
             raise
         except Exception as e:
@@ -111,6 +127,8 @@ class TonnelAdapter(BaseMarketAdapter):
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
                 return None
+            if e.response.status_code == 429:
+                await self._on_rate_limited(e.response)
             logger.error(f"HTTP error fetching Tonnel NFT: {e}")
             raise
         except Exception as e:
@@ -145,6 +163,8 @@ class TonnelAdapter(BaseMarketAdapter):
             if e.response.status_code == 404:
                 logger.info(f"No history found for {nft_address}")
                 return
+            if e.response.status_code == 429:
+                await self._on_rate_limited(e.response)
             logger.error(f"HTTP error fetching Tonnel sales: {e}")
             raise
         except Exception as e:
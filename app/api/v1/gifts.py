@@ -8,18 +8,33 @@ Provides REST API for:
 - Getting gift price history
 - Getting filter options (distinct values)
 """
+import base64
+import json
 import logging
+from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, List
+from typing import Any, Callable, Optional, List, Union
 
 from fastapi import APIRouter, Depends, Query, HTTPException
 from pydantic import BaseModel, Field
-from sqlalchemy import select, func, and_, or_, distinct, case
+from sqlalchemy import select, func, and_, or_, distinct, case, text, tuple_
 from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db_session, AsyncSession
+from app.config import settings
+from app.core.cache import (
+    COLLECTIONS_TAG,
+    LISTINGS_TAG,
+    cache_get,
+    cache_set,
+    collection_tag,
+    generation_key,
+    gift_type_tag,
+)
+from app.core.response_cache import cached
+from app.core.database import get_db_session, AsyncSession, estimate_rows
 from app.models.collection import Collection
+from app.models.gift_facet import GiftFacet
 from app.models.nft import NFT
 from app.models.listing import Listing
 from app.models.market import Market
@@ -82,6 +97,23 @@ class GiftSchema(BaseModel):
         from_attributes = True
 
 
+class GiftCompactSchema(BaseModel):
+    """Gift card of grid views (?view=compact): no description, media animation or attributes."""
+    id: int
+    address: str
+    name: str
+    gift_type: Optional[str] = None
+    image_url: Optional[str]
+    rarity: Optional[str]
+    backdrop: Optional[str]
+    model: Optional[str]
+    pattern: Optional[str]
+    symbol: Optional[str]
+    is_on_sale: bool
+    lowest_price_ton: Optional[Decimal]
+    lowest_price_market: Optional[str]
+
+
 class GiftListResponse(BaseModel):
     """Paginated gift list response."""
     total: int
@@ -89,6 +121,33 @@ class GiftListResponse(BaseModel):
     page_size: int
     total_pages: int
     items: List[GiftSchema]
+    # Pass as ?cursor= to fetch the next page (None on the last page)
+    next_cursor: Optional[str] = None
+    # total is a planner estimate (count=estimate)
+    total_is_estimate: bool = False
+
+
+# Maximum gifts per /gifts/batch request
+GIFT_BATCH_MAX = 200
+
+
+class GiftBatchRequest(BaseModel):
+    """Gifts to fetch by ID and/or TON address."""
+    ids: List[int] = Field(default_factory=list)
+    addresses: List[str] = Field(default_factory=list)
+    include_listings: bool = True
+
+
+class GiftBatchResponse(BaseModel):
+    """Gifts found for a batch request."""
+    items: List[GiftSchema]
+    missing_ids: List[int] = []
+    missing_addresses: List[str] = []
+
+
+class GiftCompactListResponse(GiftListResponse):
+    """Paginated gift list response with compact items."""
+    items: List[GiftCompactSchema]
 
 
 class FilterOption(BaseModel):
@@ -147,179 +206,473 @@ def _split_multi(value: Optional[str]) -> Optional[list[str]]:
     return [v.strip() for v in value.split(',') if v.strip()]
 
 
-# ============================================================
-# ENDPOINTS
-# ============================================================
+@dataclass(frozen=True)
+class _SortSpec:
+    """Sort key of /gifts: ORDER BY key, NFT.id in the same direction."""
+    key: Any
+    descending: bool = False
+    nulls_last: bool = True
+    nullable: bool = True
+    parse: Callable[[Any], Any] = lambda value: value
+
+
+_SORTS = {
+    "price_asc": _SortSpec(NFT.lowest_price_ton, parse=Decimal),
+    "price_desc": _SortSpec(NFT.lowest_price_ton, descending=True, nulls_last=False, parse=Decimal),
+    # created_at, not updated_at: every sync bumps updated_at, which would
+    # move rows across a cursor between page fetches
+    "recent": _SortSpec(NFT.created_at, descending=True, parse=datetime.fromisoformat),
+    "name": _SortSpec(NFT.name, nullable=False),
+    "id_asc": _SortSpec(NFT.index, parse=int),
+    "id_desc": _SortSpec(NFT.index, descending=True, nulls_last=False, parse=int),
+    # Stored rank: Common < Uncommon < Rare < Epic < Legendary
+    "rarity_asc": _SortSpec(NFT.rarity_rank, nullable=False, parse=int),
+    "rarity_desc": _SortSpec(NFT.rarity_rank, descending=True, nullable=False, parse=int),
+}
+_DEFAULT_SORT = _SortSpec(NFT.id, nullable=False, parse=int)
+
+
+def _order_by(spec: _SortSpec) -> list:
+    key = spec.key.desc() if spec.descending else spec.key.asc()
+    if spec.nullable:
+        key = key.nullslast() if spec.nulls_last else key.nullsfirst()
+    return [key, NFT.id.desc() if spec.descending else NFT.id.asc()]
+
+
+def _encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    """Opaque cursor: sort name, sort key and id of the last row of a page."""
+    payload = {"s": sort, "v": value.isoformat() if isinstance(value, datetime) else value, "id": last_id}
+    raw = json.dumps(payload, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str, sort: str, spec: _SortSpec) -> tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["s"] != sort:
+            raise ValueError("sort mismatch")
+        value = payload["v"]
+        return (spec.parse(value) if value is not None else None), int(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor for this sort order")
+
+
+def _after_cursor(spec: _SortSpec, value: Any, last_id: int):
+    """Keyset condition: rows strictly after (value, last_id) in sort order."""
+    key = spec.key
+    after_id = NFT.id < last_id if spec.descending else NFT.id > last_id
+
+    if value is None:
+        # Cursor inside the NULL block of the sort key
+        if spec.nulls_last:
+            return and_(key.is_(None), after_id)
+        return or_(and_(key.is_(None), after_id), key.isnot(None))
+
+    # Row comparison: matches a (key, id) index range scan
+    row, bound = tuple_(key, NFT.id), tuple_(value, last_id)
+    condition = row < bound if spec.descending else row > bound
+    if spec.nullable and spec.nulls_last:
+        condition = or_(condition, key.is_(None))
+    return condition
+
+
+async def _count_gifts(session: AsyncSession, count_query, estimate: bool) -> int:
+    """
+    Total for a filtered gift list.
 
-@router.get("/gifts/filters", response_model=FiltersResponse)
-async def get_filter_options(
-    gift_type: Optional[str] = Query(None, description="Filter by gift type to narrow down options"),
-    is_on_sale: Optional[bool] = Query(True, description="Only show options for items on sale"),
-    session: AsyncSession = Depends(get_db_session),
-):
+    Exact counts are cached per filter set until the next sync that
+    changes listings, so paging through a list counts it only once.
+    With estimate=True the planner's row estimate is used (no scan).
     """
-    Get all available filter options with counts and floor prices.
-    Used by frontend to populate filter dropdowns.
+    if estimate:
+        return await estimate_rows(session, count_query)
+
+    compiled = count_query.compile(
+        dialect=session.bind.dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    cache_key = await generation_key("gifts:count", str(compiled))
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    result = await session.execute(count_query)
+    total = result.scalar() or 0
+    await cache_set(cache_key, total, ttl=settings.REDIS_CACHE_TTL)
+    return total
+
+
+# Comma-separated filters of /gifts (value order doesn't change the result)
+_MULTI_FILTERS = ("gift_type", "rarity", "backdrop", "model", "pattern", "symbol")
+
+
+def _gifts_cache_params(**params) -> dict:
+    """Normalized /gifts query for the response cache: aliases resolved, multi-values sorted."""
+    limit = params["limit"] or params["page_size"]
+    normalized = {
+        "limit": limit,
+        "offset": params["offset"] if params["offset"] is not None else params["page"] * limit,
+        "cursor": params["cursor"],
+        "count": params["count"],
+        "view": params["view"],
+        "sort": _normalize_sort(params["sort_by"] or params["sort"] or "price_asc"),
+        "price_min": params["price_min"] or params["min_price"],
+        "price_max": params["price_max"] or params["max_price"],
+    }
+    for name in ("collection_id", "collection_slug", "is_on_sale", "search"):
+        normalized[name] = params[name]
+    for name in _MULTI_FILTERS:
+        normalized[name] = sorted(set(_split_multi(params[name]) or [])) or None
+    return normalized
+
+
+def _gift_type_tags(gift_type: Optional[str]) -> list[str]:
+    return [gift_type_tag(value) for value in _split_multi(gift_type) or []]
+
+
+def _gifts_cache_tags(**params) -> list[str]:
+    """A list filtered by collection or gift type depends only on syncs changing them."""
+    tags = _gift_type_tags(params["gift_type"])
+    if params["collection_id"]:
+        tags.append(collection_tag(params["collection_id"]))
+    return tags or [LISTINGS_TAG]
+
+
+# Columns of GiftSchema, projected in SQL (media prefers the CDN copy)
+_GIFT_COLUMNS = (
+    NFT.id,
+    NFT.address,
+    NFT.name,
+    NFT.gift_type,
+    NFT.description,
+    NFT.collection_id,
+    Collection.name.label("collection_name"),
+    Collection.slug.label("collection_slug"),
+    func.coalesce(func.nullif(NFT.image_cdn_url, ""), NFT.image_url).label("image_url"),
+    func.coalesce(func.nullif(NFT.animation_cdn_url, ""), NFT.animation_url).label("animation_url"),
+    NFT.rarity,
+    NFT.backdrop,
+    NFT.model,
+    NFT.pattern,
+    NFT.symbol,
+    func.coalesce(NFT.attributes, text("'[]'::jsonb")).label("attributes"),
+    NFT.is_on_sale,
+    NFT.lowest_price_ton,
+    NFT.lowest_price_market,
+)
+
+_GIFT_FIELDS = tuple(column.key for column in _GIFT_COLUMNS)
+
+# Grid cards (?view=compact): no text, JSONB or animation columns
+_COMPACT_FIELDS = tuple(GiftCompactSchema.model_fields)
+_COMPACT_COLUMNS = tuple(column for column in _GIFT_COLUMNS if column.key in _COMPACT_FIELDS)
+
+
+def _gifts_page_query(spec: _SortSpec, conditions: list, compact: bool = False):
     """
-    # Base condition
-    conditions = []
-    if is_on_sale is not None:
-        conditions.append(NFT.is_on_sale == is_on_sale)
-    if gift_type:
-        gift_types = _split_multi(gift_type)
-        if gift_types:
-            conditions.append(NFT.gift_type.in_(gift_types))
+    SELECT of a /gifts page without offset/limit (also used by
+    scripts/check_query_plans.py, so the check sees the real query).
+    """
+    query = (
+        select(*(_COMPACT_COLUMNS if compact else _GIFT_COLUMNS))
+        .join(Collection, NFT.collection_id == Collection.id)
+    )
+    if conditions:
+        query = query.where(and_(*conditions))
+    # The sort key is selected too: the cursor is built from the last row
+    return query.add_columns(spec.key.label("sort_key")).order_by(*_order_by(spec))
 
-    base_where = and_(*conditions) if conditions else True
 
-    # Gift types
-    gift_type_query = (
-        select(
-            NFT.gift_type,
-            func.count(NFT.id).label('cnt'),
-            func.min(NFT.lowest_price_ton).label('floor'),
-            func.min(NFT.image_url).label('img'),
-        )
-        .where(base_where)
-        .where(NFT.gift_type.isnot(None))
-        .group_by(NFT.gift_type)
-        .order_by(func.count(NFT.id).desc())
-    )
-    gt_result = await session.execute(gift_type_query)
-    gift_types = [
-        FilterOption(
-            value=row.gift_type,
-            count=row.cnt,
-            floor_price=float(row.floor) if row.floor else None,
-            image_url=row.img,
-        )
-        for row in gt_result.all()
-    ]
+# Columns of MarketListingSchema, plus the gift they belong to
+_LISTING_COLUMNS = (
+    Listing.nft_id,
+    Market.slug.label("market_slug"),
+    Market.name.label("market_name"),
+    Listing.price_ton,
+    Listing.price_raw,
+    Listing.currency,
+    Listing.listing_url,
+    Listing.seller_address,
+    Listing.listed_at,
+)
 
-    # Models
-    model_query = (
-        select(
-            NFT.model,
-            func.count(NFT.id).label('cnt'),
-            func.min(NFT.lowest_price_ton).label('floor'),
-        )
-        .where(base_where)
-        .where(NFT.model.isnot(None))
-        .group_by(NFT.model)
-        .order_by(func.count(NFT.id).desc())
+
+def _gift_item(row, compact: bool = False) -> dict:
+    """
+    GiftSchema-shaped dict of a _GIFT_COLUMNS row (Decimal as string, like
+    Pydantic); GiftCompactSchema-shaped for a _COMPACT_COLUMNS row.
+    """
+    item = {name: row[name] for name in (_COMPACT_FIELDS if compact else _GIFT_FIELDS)}
+    if item["lowest_price_ton"] is not None:
+        item["lowest_price_ton"] = str(item["lowest_price_ton"])
+    if not compact:
+        item["listings"] = None
+    return item
+
+
+async def _load_listings(session: AsyncSession, nft_ids: list[int]) -> dict[int, list[MarketListingSchema]]:
+    """Active listings of the given gifts (cheapest first), in one query."""
+    result = await session.execute(
+        select(*_LISTING_COLUMNS)
+        .join(Market, Listing.market_id == Market.id)
+        .where(Listing.nft_id.in_(nft_ids), Listing.is_active == True)
+        .order_by(Listing.nft_id, Listing.price_ton.asc())
     )
-    m_result = await session.execute(model_query)
-    models = [
-        FilterOption(value=row.model, count=row.cnt, floor_price=float(row.floor) if row.floor else None)
-        for row in m_result.all()
-    ]
+    listings: dict[int, list[MarketListingSchema]] = {}
+    for row in result.mappings():
+        # Rows come straight from the database: no need to validate them again
+        listings.setdefault(row["nft_id"], []).append(MarketListingSchema.model_construct(**row))
+    return listings
+
+
+async def _load_gifts(
+    session: AsyncSession,
+    ids: Optional[list[int]] = None,
+    addresses: Optional[list[str]] = None,
+    include_listings: bool = True,
+) -> list[GiftSchema]:
+    """
+    Gifts by ID and/or address, with their active listings.
 
-    # Backdrops
-    backdrop_query = (
-        select(
-            NFT.backdrop,
-            func.count(NFT.id).label('cnt'),
-            func.min(NFT.lowest_price_ton).label('floor'),
-        )
-        .where(base_where)
-        .where(NFT.backdrop.isnot(None))
-        .group_by(NFT.backdrop)
-        .order_by(func.count(NFT.id).desc())
+    Shared by the single-gift routes and /gifts/batch: one query for the
+    gifts and one for the listings of all of them.
+    """
+    conditions = []
+    if ids:
+        conditions.append(NFT.id.in_(ids))
+    if addresses:
+        conditions.append(NFT.address.in_(addresses))
+    if not conditions:
+        return []
+
+    result = await session.execute(
+        select(*_GIFT_COLUMNS)
+        .join(Collection, NFT.collection_id == Collection.id)
+        .where(or_(*conditions))
     )
-    b_result = await session.execute(backdrop_query)
-    backdrops = [
-        FilterOption(value=row.backdrop, count=row.cnt, floor_price=float(row.floor) if row.floor else None)
-        for row in b_result.all()
-    ]
+    rows = result.mappings().all()
 
-    # Symbols
-    symbol_query = (
-        select(
-            NFT.symbol,
-            func.count(NFT.id).label('cnt'),
-            func.min(NFT.lowest_price_ton).label('floor'),
+    listings = {}
+    if include_listings and rows:
+        listings = await _load_listings(session, [row["id"] for row in rows])
+
+    return [
+        GiftSchema.model_construct(
+            **row,
+            listings=listings.get(row["id"], []) if include_listings else None,
         )
-        .where(base_where)
-        .where(NFT.symbol.isnot(None))
-        .group_by(NFT.symbol)
-        .order_by(func.count(NFT.id).desc())
-    )
-    s_result = await session.execute(symbol_query)
-    symbols = [
-        FilterOption(value=row.symbol, count=row.cnt, floor_price=float(row.floor) if row.floor else None)
-        for row in s_result.all()
+        for row in rows
     ]
 
-    # Patterns
-    pattern_query = (
+
+# ============================================================
+# ENDPOINTS
+# ============================================================
+
+# Facet dimensions of /gifts/filters: response field -> NFT column
+FACET_DIMENSIONS = {
+    "gift_types": NFT.gift_type,
+    "models": NFT.model,
+    "backdrops": NFT.backdrop,
+    "symbols": NFT.symbol,
+    "patterns": NFT.pattern,
+    "rarities": NFT.rarity,
+}
+
+
+async def _compute_filter_options(session: AsyncSession, conditions: list) -> dict:
+    """
+    Facet counts, floors and price range in one scan of nfts.
+
+    GROUPING SETS produce one group per value of every dimension;
+    grouping() tells which dimension a row belongs to. Every dimension
+    partitions the same rows, so the price range is folded from the
+    gift_type groups (including the NULL one).
+    """
+    columns = list(FACET_DIMENSIONS.values())
+    fields = list(FACET_DIMENSIONS)
+    # grouping(c1..cn) has a 0 bit for the grouped column (c1 = highest bit)
+    full_mask = (1 << len(columns)) - 1
+    dimension_by_mask = {
+        full_mask ^ (1 << (len(columns) - 1 - i)): i for i in range(len(columns))
+    }
+    priced = NFT.lowest_price_ton > 0
+
+    query = (
         select(
-            NFT.pattern,
+            func.grouping(*columns).label('dim'),
+            *columns,
             func.count(NFT.id).label('cnt'),
             func.min(NFT.lowest_price_ton).label('floor'),
+            func.min(NFT.image_url).label('img'),
+            func.min(NFT.lowest_price_ton).filter(priced).label('min_price'),
+            func.max(NFT.lowest_price_ton).filter(priced).label('max_price'),
         )
-        .where(base_where)
-        .where(NFT.pattern.isnot(None))
-        .group_by(NFT.pattern)
-        .order_by(func.count(NFT.id).desc())
+        .where(and_(*conditions) if conditions else True)
+        .group_by(func.grouping_sets(*columns))
     )
-    p_result = await session.execute(pattern_query)
-    patterns = [
-        FilterOption(value=row.pattern, count=row.cnt, floor_price=float(row.floor) if row.floor else None)
-        for row in p_result.all()
-    ]
+    result = await session.execute(query)
 
-    # Rarities
-    rarity_query = (
-        select(
-            NFT.rarity,
-            func.count(NFT.id).label('cnt'),
-            func.min(NFT.lowest_price_ton).label('floor'),
+    facets: dict[str, list[dict]] = {field: [] for field in fields}
+    min_price = max_price = None
+
+    for row in result.all():
+        i = dimension_by_mask.get(row.dim)
+        if i is None:
+            continue
+
+        if i == 0:
+            if row.min_price is not None and (min_price is None or row.min_price < min_price):
+                min_price = row.min_price
+            if row.max_price is not None and (max_price is None or row.max_price > max_price):
+                max_price = row.max_price
+
+        value = row[i + 1]
+        if value is None:
+            continue
+        facets[fields[i]].append({
+            "value": value,
+            "count": row.cnt,
+            "floor_price": float(row.floor) if row.floor else None,
+            "image_url": row.img if i == 0 else None,
+        })
+
+    for options in facets.values():
+        options.sort(key=lambda option: (-option["count"], option["value"]))
+
+    return {
+        **facets,
+        "price_range": {
+            "min": float(min_price) if min_price else 0,
+            "max": float(max_price) if max_price else 0,
+        },
+    }
+
+
+async def _load_summary_filter_options(session: AsyncSession, gift_types: list[str]) -> Optional[dict]:
+    """
+    Facets of gifts on sale from the gift_facets summary.
+
+    Per-type rows of the selected gift types are merged (counts add up,
+    floors take the minimum). Returns None while the summary is empty.
+    """
+    if gift_types:
+        scope = or_(
+            GiftFacet.gift_type.in_(gift_types),
+            and_(
+                GiftFacet.gift_type == "",
+                GiftFacet.dimension == "gift_type",
+                GiftFacet.value.in_(gift_types),
+            ),
         )
-        .where(base_where)
-        .where(NFT.rarity.isnot(None))
-        .group_by(NFT.rarity)
-        .order_by(func.count(NFT.id).desc())
-    )
-    r_result = await session.execute(rarity_query)
-    rarities = [
-        FilterOption(value=row.rarity, count=row.cnt, floor_price=float(row.floor) if row.floor else None)
-        for row in r_result.all()
-    ]
+    else:
+        scope = GiftFacet.gift_type == ""
 
-    # Price range
-    price_query = (
+    result = await session.execute(
         select(
-            func.min(NFT.lowest_price_ton).label('min_price'),
-            func.max(NFT.lowest_price_ton).label('max_price'),
+            GiftFacet.dimension,
+            GiftFacet.value,
+            func.sum(GiftFacet.count_on_sale).label('cnt'),
+            func.min(GiftFacet.floor_price_ton).label('floor'),
+            func.max(GiftFacet.max_price_ton).label('ceiling'),
+            func.min(GiftFacet.image_url).label('img'),
         )
-        .where(base_where)
-        .where(NFT.lowest_price_ton.isnot(None))
-        .where(NFT.lowest_price_ton > 0)
+        .where(scope, GiftFacet.count_on_sale > 0)
+        .group_by(GiftFacet.dimension, GiftFacet.value)
     )
-    pr_result = await session.execute(price_query)
-    pr_row = pr_result.first()
-
-    return FiltersResponse(
-        gift_types=gift_types,
-        models=models,
-        backdrops=backdrops,
-        symbols=symbols,
-        patterns=patterns,
-        rarities=rarities,
-        price_range={
-            "min": float(pr_row.min_price) if pr_row and pr_row.min_price else 0,
-            "max": float(pr_row.max_price) if pr_row and pr_row.max_price else 0,
+    rows = result.all()
+    if not rows:
+        return None
+
+    fields = {column.key: field for field, column in FACET_DIMENSIONS.items()}
+    facets: dict[str, list[dict]] = {field: [] for field in FACET_DIMENSIONS}
+    min_price = max_price = None
+
+    for row in rows:
+        field = fields.get(row.dimension)
+        if field is None:
+            continue
+        is_gift_type = row.dimension == "gift_type"
+        if is_gift_type:
+            if row.floor is not None and (min_price is None or row.floor < min_price):
+                min_price = row.floor
+            if row.ceiling is not None and (max_price is None or row.ceiling > max_price):
+                max_price = row.ceiling
+        facets[field].append({
+            "value": row.value,
+            "count": int(row.cnt),
+            "floor_price": float(row.floor) if row.floor else None,
+            "image_url": row.img if is_gift_type else None,
+        })
+
+    for options in facets.values():
+        options.sort(key=lambda option: (-option["count"], option["value"]))
+
+    return {
+        **facets,
+        "price_range": {
+            "min": float(min_price) if min_price else 0,
+            "max": float(max_price) if max_price else 0,
         },
-    )
+    }
+
 
+@router.get("/gifts/filters", response_model=FiltersResponse)
+@cached(
+    "gifts:filters",
+    ttl=settings.FILTERS_CACHE_TTL,
+    key=lambda gift_type, is_on_sale, **_: {
+        "gift_types": sorted(set(_split_multi(gift_type) or [])),
+        "is_on_sale": is_on_sale,
+    },
+    tags=lambda gift_type, **_: _gift_type_tags(gift_type) or [LISTINGS_TAG],
+)
+async def get_filter_options(
+    gift_type: Optional[str] = Query(None, description="Filter by gift type to narrow down options"),
+    is_on_sale: Optional[bool] = Query(True, description="Only show options for items on sale"),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Get all available filter options with counts and floor prices.
+    Used by frontend to populate filter dropdowns.
 
-@router.get("/gifts", response_model=GiftListResponse)
+    Gifts on sale are served from the gift_facets summary maintained by
+    syncs; other filter sets are computed in a single pass. Both are
+    cached per filter set until a sync changes the selected gift types.
+    """
+    gift_types = sorted(set(_split_multi(gift_type) or []))
+
+    options = None
+    if is_on_sale:
+        options = await _load_summary_filter_options(session, gift_types)
+
+    if options is None:
+        conditions = []
+        if is_on_sale is not None:
+            conditions.append(NFT.is_on_sale == is_on_sale)
+        if gift_types:
+            conditions.append(NFT.gift_type.in_(gift_types))
+        options = await _compute_filter_options(session, conditions)
+
+    return options
+
+
+@router.get(
+    "/gifts",
+    response_model=None,
+    responses={200: {"model": Union[GiftListResponse, GiftCompactListResponse]}},
+)
+@cached("gifts", key=_gifts_cache_params, tags=_gifts_cache_tags)
 async def list_gifts(
     # Pagination
     page: int = Query(0, ge=0, description="Page number (0-indexed)"),
     page_size: int = Query(50, ge=1, le=200, description="Items per page"),
     limit: Optional[int] = Query(None, ge=1, le=200, description="Alias for page_size"),
     offset: Optional[int] = Query(None, ge=0, description="Offset (overrides page)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (overrides page/offset)"),
+    count: str = Query("exact", pattern="^(exact|estimate)$", description="Total: exact (cached) or planner estimate"),
+    view: str = Query("full", pattern="^(full|compact)$", description="compact: grid card fields only"),
 
     # Filters
     collection_id: Optional[int] = Query(None, description="Filter by collection ID"),
@@ -347,6 +700,15 @@ async def list_gifts(
     """
     List gifts with filters and pagination.
     Supports multi-value filters (comma-separated).
+
+    Every page returns next_cursor: passing it back pages by keyset
+    (sort key + id) instead of OFFSET, so deep pages cost the same as
+    the first one.
+
+    Items are built as plain dicts straight from the column projection
+    and rendered from the response cache without response_model
+    re-validation (GiftListResponse documents the shape). view=compact selects only the grid card
+    columns, leaving out description, attributes JSONB and animation.
     """
     # Resolve aliases
     effective_limit = limit or page_size
@@ -362,11 +724,7 @@ async def list_gifts(
         effective_page = page
         effective_offset = page * effective_limit
 
-    # Build base query with collection join
-    query = (
-        select(NFT, Collection.name.label("collection_name"), Collection.slug.label("collection_slug"))
-        .join(Collection, NFT.collection_id == Collection.id)
-    )
+    compact = view == "compact"
 
     # Apply filters
     conditions = []
@@ -424,9 +782,6 @@ async def list_gifts(
             )
         )
 
-    if conditions:
-        query = query.where(and_(*conditions))
-
     # Count total
     count_query = (
         select(func.count(NFT.id))
@@ -435,88 +790,81 @@ async def list_gifts(
     )
     if conditions:
         count_query = count_query.where(and_(*conditions))
-    count_result = await session.execute(count_query)
-    total = count_result.scalar() or 0
-
-    # Apply sorting
-    if effective_sort == "price_asc":
-        query = query.order_by(NFT.lowest_price_ton.asc().nullslast())
-    elif effective_sort == "price_desc":
-        query = query.order_by(NFT.lowest_price_ton.desc().nullsfirst())
-    elif effective_sort == "recent":
-        query = query.order_by(NFT.updated_at.desc().nullslast())
-    elif effective_sort == "name":
-        query = query.order_by(NFT.name.asc())
-    elif effective_sort == "id_asc":
-        query = query.order_by(NFT.index.asc().nullslast())
-    elif effective_sort == "id_desc":
-        query = query.order_by(NFT.index.desc().nullsfirst())
-    elif effective_sort == "rarity_asc":
-        # Rarity order: Common < Uncommon < Rare < Epic < Legendary
-        rarity_order = case(
-            (NFT.rarity == 'Common', 1),
-            (NFT.rarity == 'Uncommon', 2),
-            (NFT.rarity == 'Rare', 3),
-            (NFT.rarity == 'Epic', 4),
-            (NFT.rarity == 'Legendary', 5),
-            else_=0,
-        )
-        query = query.order_by(rarity_order.asc())
-    elif effective_sort == "rarity_desc":
-        rarity_order = case(
-            (NFT.rarity == 'Common', 1),
-            (NFT.rarity == 'Uncommon', 2),
-            (NFT.rarity == 'Rare', 3),
-            (NFT.rarity == 'Epic', 4),
-            (NFT.rarity == 'Legendary', 5),
-            else_=0,
-        )
-        query = query.order_by(rarity_order.desc())
-    else:
-        query = query.order_by(NFT.id.asc())
+    total = await _count_gifts(session, count_query, estimate=count == "estimate")
 
-    # Apply pagination
-    query = query.offset(effective_offset).limit(effective_limit)
+    # Sorting: sort key + id tiebreak, so the order is total and a page
+    # can be continued from its last row
+    spec = _SORTS.get(effective_sort, _DEFAULT_SORT)
+    if cursor:
+        conditions.append(_after_cursor(spec, *_decode_cursor(cursor, effective_sort, spec)))
+
+    query = _gifts_page_query(spec, conditions, compact)
+
+    # Apply pagination (one extra row tells whether there is a next page)
+    if not cursor:
+        query = query.offset(effective_offset)
+    query = query.limit(effective_limit + 1)
 
     # Execute query
     result = await session.execute(query)
-    rows = result.all()
+    rows = result.mappings().all()
 
-    # Build response
-    items = []
-    for row in rows:
-        nft = row[0]
-        items.append(GiftSchema(
-            id=nft.id,
-            address=nft.address,
-            name=nft.name,
-            gift_type=nft.gift_type,
-            description=nft.description,
-            collection_id=nft.collection_id,
-            collection_name=row.collection_name,
-            collection_slug=row.collection_slug,
-            image_url=nft.image_cdn_url or nft.image_url,
-            animation_url=nft.animation_cdn_url or nft.animation_url,
-            rarity=nft.rarity,
-            backdrop=nft.backdrop,
-            model=nft.model,
-            pattern=nft.pattern,
-            symbol=nft.symbol,
-            attributes=nft.attributes or [],
-            is_on_sale=nft.is_on_sale,
-            lowest_price_ton=nft.lowest_price_ton,
-            lowest_price_market=nft.lowest_price_market,
-            listings=None,
-        ))
+    next_cursor = None
+    if len(rows) > effective_limit:
+        rows = rows[:effective_limit]
+        next_cursor = _encode_cursor(effective_sort, rows[-1]["sort_key"], rows[-1]["id"])
+
+    # Build response: rows are already projected to GiftSchema fields
+    items = [_gift_item(row, compact) for row in rows]
 
     total_pages = (total + effective_limit - 1) // effective_limit
 
-    return GiftListResponse(
-        total=total,
-        page=effective_page,
-        page_size=effective_limit,
-        total_pages=total_pages,
+    return {
+        "total": total,
+        "page": effective_page,
+        "page_size": effective_limit,
+        "total_pages": total_pages,
+        "items": items,
+        "next_cursor": next_cursor,
+        "total_is_estimate": count == "estimate",
+    }
+
+
+@router.post("/gifts/batch", response_model=GiftBatchResponse)
+async def get_gifts_batch(
+    request: GiftBatchRequest,
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Get several gifts by ID and/or TON address, with their active listings.
+
+    Two queries regardless of the number of gifts: one for the gifts,
+    one for all their listings. Items follow the request order (ids
+    first, then addresses); unknown ones are reported as missing.
+    """
+    if len(request.ids) + len(request.addresses) > GIFT_BATCH_MAX:
+        raise HTTPException(status_code=422, detail=f"At most {GIFT_BATCH_MAX} gifts per request")
+
+    gifts = await _load_gifts(
+        session,
+        ids=request.ids,
+        addresses=request.addresses,
+        include_listings=request.include_listings,
+    )
+
+    by_id = {gift.id: gift for gift in gifts}
+    by_address = {gift.address: gift for gift in gifts}
+    items = []
+    seen = set()
+    for gift in [by_id.get(gift_id) for gift_id in request.ids] + [by_address.get(a) for a in request.addresses]:
+        if gift is not None and gift.id not in seen:
+            seen.add(gift.id)
+            items.append(gift)
+
+    return GiftBatchResponse(
         items=items,
+        missing_ids=[gift_id for gift_id in request.ids if gift_id not in by_id],
+        missing_addresses=[address for address in request.addresses if address not in by_address],
     )
 
 
@@ -530,71 +878,10 @@ async def get_gift(
     Get gift details by ID.
     Optionally includes all active listings across markets.
     """
-    # Get NFT with collection
-    result = await session.execute(
-        select(NFT, Collection.name.label("collection_name"), Collection.slug.label("collection_slug"))
-        .join(Collection, NFT.collection_id == Collection.id)
-        .where(NFT.id == gift_id)
-    )
-    row = result.first()
-
-    if not row:
+    gifts = await _load_gifts(session, ids=[gift_id], include_listings=include_listings)
+    if not gifts:
         raise HTTPException(status_code=404, detail="Gift not found")
-
-    nft = row[0]
-
-    # Get active listings if requested
-    listings = None
-    if include_listings:
-        listings_result = await session.execute(
-            select(Listing, Market)
-            .join(Market, Listing.market_id == Market.id)
-            .where(
-                and_(
-                    Listing.nft_id == gift_id,
-                    Listing.is_active == True,
-                )
-            )
-            .order_by(Listing.price_ton.asc())
-        )
-        listings_rows = listings_result.all()
-
-        listings = [
-            MarketListingSchema(
-                market_slug=market.slug,
-                market_name=market.name,
-                price_ton=listing.price_ton,
-                price_raw=listing.price_raw,
-                currency=listing.currency,
-                listing_url=listing.listing_url,
-                seller_address=listing.seller_address,
-                listed_at=listing.listed_at,
-            )
-            for listing, market in listings_rows
-        ]
-
-    return GiftSchema(
-        id=nft.id,
-        address=nft.address,
-        name=nft.name,
-        gift_type=nft.gift_type,
-        description=nft.description,
-        collection_id=nft.collection_id,
-        collection_name=row.collection_name,
-        collection_slug=row.collection_slug,
-        image_url=nft.image_cdn_url or nft.image_url,
-        animation_url=nft.animation_cdn_url or nft.animation_url,
-        rarity=nft.rarity,
-        backdrop=nft.backdrop,
-        model=nft.model,
-        pattern=nft.pattern,
-        symbol=nft.symbol,
-        attributes=nft.attributes or [],
-        is_on_sale=nft.is_on_sale,
-        lowest_price_ton=nft.lowest_price_ton,
-        lowest_price_market=nft.lowest_price_market,
-        listings=listings,
-    )
+    return gifts[0]
 
 
 @router.get("/gifts/address/{nft_address}", response_model=GiftSchema)
@@ -604,15 +891,10 @@ async def get_gift_by_address(
     session: AsyncSession = Depends(get_db_session),
 ):
     """Get gift details by TON address."""
-    result = await session.execute(
-        select(NFT).where(NFT.address == nft_address)
-    )
-    nft = result.scalar_one_or_none()
-
-    if not nft:
+    gifts = await _load_gifts(session, addresses=[nft_address], include_listings=include_listings)
+    if not gifts:
         raise HTTPException(status_code=404, detail="Gift not found")
-
-    return await get_gift(nft.id, include_listings, session)
+    return gifts[0]
 
 
 @router.get("/gifts/{gift_id}/listings", response_model=List[MarketListingSchema])
@@ -621,35 +903,12 @@ async def get_gift_listings(
     session: AsyncSession = Depends(get_db_session),
 ):
     """Get all active listings for a gift across all markets."""
-    result = await session.execute(
-        select(Listing, Market)
-        .join(Market, Listing.market_id == Market.id)
-        .where(
-            and_(
-                Listing.nft_id == gift_id,
-                Listing.is_active == True,
-            )
-        )
-        .order_by(Listing.price_ton.asc())
-    )
-    rows = result.all()
-
-    return [
-        MarketListingSchema(
-            market_slug=market.slug,
-            market_name=market.name,
-            price_ton=listing.price_ton,
-            price_raw=listing.price_raw,
-            currency=listing.currency,
-            listing_url=listing.listing_url,
-            seller_address=listing.seller_address,
-            listed_at=listing.listed_at,
-        )
-        for listing, market in rows
-    ]
+    listings = await _load_listings(session, [gift_id])
+    return listings.get(gift_id, [])
 
 
 @router.get("/collections")
+@cached("collections", tags=lambda **_: [COLLECTIONS_TAG])
 async def list_collections(
     telegram_gifts_only: bool = Query(False, description="Only Telegram Gift collections"),
     session: AsyncSession = Depends(get_db_session),
@@ -5,25 +5,48 @@ Provides WebSocket endpoints for:
 - All price updates: ws://host/ws/prices
 - Collection updates: ws://host/ws/collection/{collection_id}
 - Single gift updates: ws://host/ws/gift/{gift_id}
+- Multiplexed subscriptions: ws://host/ws/subscribe (collections, gifts,
+  gift types and price thresholds changed with subscribe/unsubscribe
+  messages on one socket)
+
+With WS_TRANSPORT=streams every update carries a "stream_id", and a
+client reconnecting with ?last_id=<stream_id> first receives what it
+missed: {"type": "replay", "count": N, "truncated": false}, then the N
+updates, then live ones (see app.core.price_stream). Replays are
+at-least-once: updates sharing the millisecond of last_id are sent
+again, and (collection_id, stream_id) identifies an update.
 """
 import asyncio
+import bisect
+import itertools
 import json
 import logging
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from enum import Enum
-from typing import Optional, Set
+from typing import Hashable, Optional, Set
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, status
+from sqlalchemy import select
 from starlette.websockets import WebSocketState
 
+from app.config import settings
+from app.core.clients import get_redis
+from app.core.database import get_async_session
+from app.core.price_stream import StreamConsumer, read_since
 from app.core.pubsub import (
+    TRANSPORT_STREAMS,
+    DecimalEncoder,
     RedisPubSub,
     CHANNEL_ALL_PRICES,
     CHANNEL_COLLECTION_PREFIX,
     CHANNEL_GIFT_PREFIX,
     MessageType,
 )
+from app.models.nft import NFT
 
 logger = logging.getLogger(__name__)
 
@@ -35,17 +58,86 @@ class SubscriptionType(str, Enum):
     ALL_PRICES = "all_prices"
     COLLECTION = "collection"
     GIFT = "gift"
+    MULTI = "multi"
+
+
+class QueueResult(str, Enum):
+    """Outcome of queueing a message for a connection."""
+    QUEUED = "queued"
+    COALESCED = "coalesced"  # Replaced a pending update with the same key
+    DROPPED = "dropped"  # Queue full
+
+
+class SendQueue:
+    """
+    Bounded FIFO of encoded messages for one socket.
+
+    Messages put with a key replace a pending message with the same key
+    in place, so a client that falls behind receives only the latest
+    price of each gift instead of every intermediate one. A full queue
+    rejects new keys instead of growing.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: OrderedDict[Hashable, str] = OrderedDict()
+        self._sequence = itertools.count()
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def full(self) -> bool:
+        return len(self._items) >= self.maxsize
+
+    def put(self, payload: str, key: Optional[Hashable] = None) -> QueueResult:
+        if key is not None and key in self._items:
+            self._items[key] = payload
+            return QueueResult.COALESCED
+        if self.full:
+            return QueueResult.DROPPED
+        if key is None:
+            key = next(self._sequence)
+        self._items[key] = payload
+        self._ready.set()
+        return QueueResult.QUEUED
+
+    async def get(self) -> str:
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        _, payload = self._items.popitem(last=False)
+        return payload
 
 
 @dataclass
 class WebSocketConnection:
-    """Represents a WebSocket connection with its subscriptions."""
+    """
+    Represents a WebSocket connection with its subscriptions.
+
+    Outgoing messages are JSON text queued in `queue` and written by a
+    single writer task per socket, so nothing else sends on the socket.
+    `lagging_since` is set while the queue is full (monotonic time).
+    """
     websocket: WebSocket
     subscription_type: SubscriptionType
     subscription_id: Optional[int] = None
     connected_at: datetime = field(default_factory=datetime.utcnow)
     last_heartbeat: datetime = field(default_factory=datetime.utcnow)
     message_count: int = 0
+    dropped_count: int = 0
+    coalesced_count: int = 0
+    queue: SendQueue = field(
+        default_factory=lambda: SendQueue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+    )
+    writer_task: Optional[asyncio.Task] = None
+    lagging_since: Optional[float] = None
+    # Live stream updates held back while missed ones are replayed
+    replay_backlog: Optional[list] = None
+    # MULTI: current subscription keys (see SubscriptionIndex)
+    keys: set = field(default_factory=set)
+    closed: bool = False
 
     @property
     def channels(self) -> list[str]:
@@ -56,19 +148,211 @@ class WebSocketConnection:
             return [f"{CHANNEL_COLLECTION_PREFIX}{self.subscription_id}"]
         elif self.subscription_type == SubscriptionType.GIFT:
             return [f"{CHANNEL_GIFT_PREFIX}{self.subscription_id}"]
+        # MULTI: filtered from the all-prices feed by SubscriptionIndex
         return []
 
     def __hash__(self):
         return id(self.websocket)
 
 
+def _encode(data: dict) -> str:
+    """Encode a message for sending (once, whatever the number of receivers)."""
+    return json.dumps(data, cls=DecimalEncoder)
+
+
+def _decode(payload: str) -> Optional[dict]:
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        return None
+    return message if isinstance(message, dict) else None
+
+
+async def _gift_collection_id(gift_id: int) -> Optional[int]:
+    """Collection of a gift (None if unknown)."""
+    async with get_async_session() as session:
+        result = await session.execute(select(NFT.collection_id).where(NFT.id == gift_id))
+        return result.scalar_one_or_none()
+
+
+def _coalesce_key(message: Optional[dict]) -> Optional[Hashable]:
+    """
+    Key under which a pending message may be replaced by a newer one.
+
+    Price updates of the same gift on the same market supersede each
+    other; everything else (new/removed listings, service messages) is
+    delivered as is.
+    """
+    if not message or message.get("type") != MessageType.PRICE_UPDATE.value:
+        return None
+    try:
+        data = message["data"]
+        return ("price", data["gift_id"], data.get("market_slug"))
+    except (KeyError, TypeError):
+        return None
+
+
+# Subscription keys of multiplexed connections:
+#   ("collection", id), ("gift", id), ("gift_type", name),
+#   ("price_max", Decimal) — listings at or below the price,
+#   ("price_min", Decimal) — listings at or above the price
+KEY_COLLECTION = "collection"
+KEY_GIFT = "gift"
+KEY_GIFT_TYPE = "gift_type"
+KEY_PRICE_MAX = "price_max"
+KEY_PRICE_MIN = "price_min"
+
+# subscribe/unsubscribe message field -> key kind
+SUBSCRIPTION_FIELDS = {
+    "collections": KEY_COLLECTION,
+    "gifts": KEY_GIFT,
+    "gift_types": KEY_GIFT_TYPE,
+    "price_max": KEY_PRICE_MAX,
+    "price_min": KEY_PRICE_MIN,
+}
+
+
+def parse_subscription_keys(data: dict) -> set[tuple]:
+    """
+    Subscription keys of a subscribe/unsubscribe message.
+
+    {"type": "subscribe", "collections": [1], "gifts": [123],
+     "gift_types": ["Plush Pepe"], "price_max": "10"}
+
+    Fields take a value or a list of values. Raises ValueError on
+    invalid values.
+    """
+    keys = set()
+    for name, kind in SUBSCRIPTION_FIELDS.items():
+        values = data.get(name)
+        if values is None:
+            continue
+        if not isinstance(values, list):
+            values = [values]
+        for value in values:
+            if kind in (KEY_COLLECTION, KEY_GIFT):
+                if isinstance(value, bool) or not isinstance(value, (int, str)):
+                    raise ValueError(f"Invalid {name} value: {value!r}")
+                keys.add((kind, int(value)))
+            elif kind == KEY_GIFT_TYPE:
+                if not isinstance(value, str) or not value:
+                    raise ValueError(f"Invalid {name} value: {value!r}")
+                keys.add((kind, value))
+            else:
+                try:
+                    price = Decimal(str(value))
+                except InvalidOperation:
+                    raise ValueError(f"Invalid {name} value: {value!r}")
+                if not price.is_finite() or price < 0:
+                    raise ValueError(f"Invalid {name} value: {value!r}")
+                keys.add((kind, price))
+    return keys
+
+
+def _describe_keys(keys: set) -> dict:
+    """Subscription keys in the format of a subscribe message."""
+    described = {name: [] for name in SUBSCRIPTION_FIELDS}
+    fields = {kind: name for name, kind in SUBSCRIPTION_FIELDS.items()}
+    for kind, value in keys:
+        described[fields[kind]].append(str(value) if isinstance(value, Decimal) else value)
+    for values in described.values():
+        values.sort()
+    return described
+
+
+class SubscriptionIndex:
+    """
+    Inverted index from subscription keys to multiplexed connections.
+
+    Exact keys (collection, gift, gift type) map to sets of connections;
+    price thresholds are kept in sorted lists, so the connections whose
+    threshold a price satisfies are a prefix/suffix found by bisection.
+    Matching an update costs a few dict lookups and two bisections,
+    whatever the number of connections.
+    """
+
+    def __init__(self):
+        self._exact: dict[tuple, set[WebSocketConnection]] = {}
+        # (threshold, sequence, connection), sorted by threshold
+        self._price_max: list[tuple] = []
+        self._price_min: list[tuple] = []
+        self._thresholds: dict[tuple, tuple] = {}  # (id(connection), key) -> list entry
+        self._sequence = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self._exact or self._thresholds)
+
+    def __len__(self) -> int:
+        return sum(len(conns) for conns in self._exact.values()) + len(self._thresholds)
+
+    def add(self, connection: WebSocketConnection, key: tuple) -> None:
+        kind, value = key
+        if kind in (KEY_PRICE_MAX, KEY_PRICE_MIN):
+            entry = (value, next(self._sequence), connection)
+            bisect.insort(self._thresholds_of(kind), entry)
+            self._thresholds[(id(connection), key)] = entry
+        else:
+            self._exact.setdefault(key, set()).add(connection)
+
+    def remove(self, connection: WebSocketConnection, key: tuple) -> None:
+        kind, _ = key
+        if kind in (KEY_PRICE_MAX, KEY_PRICE_MIN):
+            entry = self._thresholds.pop((id(connection), key), None)
+            if entry is not None:
+                entries = self._thresholds_of(kind)
+                entries.pop(bisect.bisect_left(entries, entry[:2]))
+        else:
+            connections = self._exact.get(key)
+            if connections is not None:
+                connections.discard(connection)
+                if not connections:
+                    del self._exact[key]
+
+    def match(self, data: dict, message_type: Optional[str]) -> set[WebSocketConnection]:
+        """Connections subscribed to an update (its "data" part)."""
+        matched = set()
+        for key in (
+            (KEY_COLLECTION, data.get("collection_id")),
+            (KEY_GIFT, data.get("gift_id")),
+            (KEY_GIFT_TYPE, data.get("gift_type")),
+        ):
+            connections = self._exact.get(key)
+            if connections:
+                matched.update(connections)
+
+        # Thresholds apply to listed prices, not to removals
+        if self._thresholds and message_type != MessageType.LISTING_REMOVED.value:
+            try:
+                price = Decimal(str(data.get("price_ton")))
+            except InvalidOperation:
+                return matched
+            if price.is_finite():
+                start = bisect.bisect_left(self._price_max, (price,))
+                matched.update(entry[2] for entry in self._price_max[start:])
+                end = bisect.bisect_right(self._price_min, (price, float("inf")))
+                matched.update(entry[2] for entry in self._price_min[:end])
+        return matched
+
+    def _thresholds_of(self, kind: str) -> list:
+        return self._price_max if kind == KEY_PRICE_MAX else self._price_min
+
+
 class ConnectionManager:
     """
     Manages WebSocket connections and message broadcasting.
 
-    Thread-safe connection management with:
-    - Connection tracking by subscription type
-    - Redis pub/sub integration
+    Works as a per-process hub:
+    - One Redis subscription per channel, shared by all sockets on it
+      (or, with WS_TRANSPORT=streams, one consumer of all price streams)
+    - Channel -> connections index for fan-out
+    - Multiplexed connections filtered from the all-prices feed by an
+      inverted index of their subscription keys (SubscriptionIndex)
+    - Messages are forwarded as the JSON text published to Redis, so a
+      broadcast costs no encoding per receiver, only a queue put
+    - A bounded send queue and one writer task per socket
+    - Slow consumers: pending price updates are coalesced per gift,
+      heartbeats are skipped while messages are pending, and a socket
+      whose queue stays full for WS_MAX_LAG_SECONDS is disconnected
     - Heartbeat/ping-pong support
     - Graceful disconnection handling
     """
@@ -78,11 +362,22 @@ class ConnectionManager:
             SubscriptionType.ALL_PRICES: set(),
             SubscriptionType.COLLECTION: set(),
             SubscriptionType.GIFT: set(),
+            SubscriptionType.MULTI: set(),
         }
+        self._by_channel: dict[str, Set[WebSocketConnection]] = {}
+        self._index = SubscriptionIndex()
         self._lock = asyncio.Lock()
         self._pubsub: Optional[RedisPubSub] = None
+        self._stream_consumer: Optional[StreamConsumer] = None
         self._heartbeat_task: Optional[asyncio.Task] = None
         self._running = False
+        self._messages_received = 0
+        self._counters = {
+            "coalesced_messages": 0,
+            "dropped_messages": 0,
+            "dropped_heartbeats": 0,
+            "slow_disconnects": 0,
+        }
 
     @property
     def total_connections(self) -> int:
@@ -95,7 +390,14 @@ class ConnectionManager:
             return
 
         self._running = True
-        self._pubsub = await RedisPubSub.get_instance()
+        if settings.WS_TRANSPORT == TRANSPORT_STREAMS:
+            self._stream_consumer = StreamConsumer(self._on_stream_message)
+            await self._stream_consumer.start()
+        else:
+            try:
+                self._pubsub = await RedisPubSub.get_instance()
+            except Exception as e:
+                logger.error(f"WebSocket updates unavailable, Redis pub/sub failed: {e}")
         self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
         logger.info("WebSocket ConnectionManager started")
 
@@ -110,11 +412,20 @@ class ConnectionManager:
             except asyncio.CancelledError:
                 pass
 
+        if self._stream_consumer:
+            await self._stream_consumer.stop()
+            self._stream_consumer = None
+
         # Close all connections
         async with self._lock:
-            for connections in self._connections.values():
-                for conn in list(connections):
-                    await self._close_connection(conn, code=1001, reason="Server shutdown")
+            all_connections = [
+                conn
+                for connections in self._connections.values()
+                for conn in connections
+            ]
+        for conn in all_connections:
+            await self._close_connection(conn, code=1001, reason="Server shutdown")
+            await self.disconnect(conn)
 
         logger.info("WebSocket ConnectionManager stopped")
 
@@ -123,6 +434,7 @@ class ConnectionManager:
         websocket: WebSocket,
         subscription_type: SubscriptionType,
         subscription_id: Optional[int] = None,
+        last_id: Optional[str] = None,
     ) -> WebSocketConnection:
         """
         Accept a new WebSocket connection and set up subscriptions.
@@ -131,10 +443,15 @@ class ConnectionManager:
             websocket: The WebSocket connection
             subscription_type: Type of subscription
             subscription_id: Collection or gift ID (if applicable)
+            last_id: Last stream ID the client received; missed updates
+                are replayed first (streams transport only)
 
         Returns:
             WebSocketConnection instance
         """
+        if not self._running:
+            await self.start()
+
         await websocket.accept()
 
         connection = WebSocketConnection(
@@ -142,16 +459,29 @@ class ConnectionManager:
             subscription_type=subscription_type,
             subscription_id=subscription_id,
         )
+        connection.writer_task = asyncio.create_task(self._writer(connection))
+
+        # Send welcome message (queued first, before any update)
+        self.send_json(connection, {
+            "type": "connected",
+            "subscription": {
+                "type": subscription_type.value,
+                "id": subscription_id,
+            },
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+        })
+
+        replay = bool(last_id) and self._stream_consumer is not None
+        if replay:
+            connection.replay_backlog = []
 
         async with self._lock:
+            for channel in self._redis_channels(connection):
+                if not self._listens(channel):
+                    await self._subscribe_channel(channel)
             self._connections[subscription_type].add(connection)
-
-        # Subscribe to Redis channels
-        if self._pubsub:
-            await self._pubsub.subscribe(
-                connection.channels,
-                lambda channel, message: self._on_redis_message(connection, channel, message),
-            )
+            for channel in connection.channels:
+                self._by_channel.setdefault(channel, set()).add(connection)
 
         logger.info(
             f"WebSocket connected: {subscription_type.value}"
@@ -159,34 +489,96 @@ class ConnectionManager:
             f"(total: {self.total_connections})"
         )
 
-        # Send welcome message
-        await self._send_json(connection, {
-            "type": "connected",
-            "subscription": {
-                "type": subscription_type.value,
-                "id": subscription_id,
-            },
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-        })
+        if replay:
+            await self._replay(connection, last_id)
 
         return connection
 
+    async def _replay(self, connection: WebSocketConnection, last_id: str) -> None:
+        """
+        Queue the updates a reconnecting client missed, then the live
+        updates that arrived meanwhile (without duplicates).
+        """
+        collection_ids = None
+        gift_id = None
+        if connection.subscription_type == SubscriptionType.COLLECTION:
+            collection_ids = [connection.subscription_id]
+        elif connection.subscription_type == SubscriptionType.GIFT:
+            gift_id = connection.subscription_id
+
+        entries: list[tuple[int, str, str]] = []
+        valid = True
+        try:
+            if gift_id is not None:
+                # Only the gift's collection stream can have its updates
+                collection_id = await _gift_collection_id(gift_id)
+                collection_ids = [collection_id] if collection_id is not None else []
+            entries, truncated = await read_since(
+                get_redis(), last_id, collection_ids=collection_ids, gift_id=gift_id,
+            )
+        except ValueError:
+            valid = False
+            self.send_json(connection, {
+                "type": MessageType.ERROR.value,
+                "message": f"Invalid last_id: {last_id}",
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+            })
+        except Exception as e:
+            logger.warning(f"Replay from {last_id} failed: {e}")
+            truncated = True
+
+        if valid:
+            self.send_json(connection, {
+                "type": "replay",
+                "count": len(entries),
+                "truncated": truncated,
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+            })
+        # Stream IDs repeat across collections: an entry is (collection, ID)
+        replayed = set()
+        for collection_id, stream_id, payload in entries:
+            replayed.add((collection_id, stream_id))
+            self._enqueue(connection, payload, _coalesce_key(_decode(payload)))
+
+        backlog, connection.replay_backlog = connection.replay_backlog or [], None
+        for collection_id, stream_id, payload, key in backlog:
+            if (collection_id, stream_id) not in replayed:
+                self._enqueue(connection, payload, key)
+
     async def disconnect(self, connection: WebSocketConnection) -> None:
         """
         Handle disconnection of a WebSocket.
 
+        Safe to call more than once (reader, writer and heartbeat may all
+        notice a dead socket).
+
         Args:
             connection: The connection to disconnect
         """
+        if connection.closed:
+            return
+        connection.closed = True
+
+        if connection.writer_task and connection.writer_task is not asyncio.current_task():
+            connection.writer_task.cancel()
+
         async with self._lock:
             self._connections[connection.subscription_type].discard(connection)
-
-        # Unsubscribe from Redis channels
-        if self._pubsub:
-            await self._pubsub.unsubscribe(
-                connection.channels,
-                lambda channel, message: self._on_redis_message(connection, channel, message),
-            )
+            for key in connection.keys:
+                self._index.remove(connection, key)
+            connection.keys.clear()
+            for channel in connection.channels:
+                subscribers = self._by_channel.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self._by_channel[channel]
+
+            # Unsubscribe from Redis channels nobody listens to anymore
+            for channel in self._redis_channels(connection):
+                if not self._listens(channel):
+                    await self._unsubscribe_channel(channel)
 
         logger.info(
             f"WebSocket disconnected: {connection.subscription_type.value}"
@@ -209,36 +601,143 @@ class ConnectionManager:
             subscription_id: Optional ID filter for collection/gift types
 
         Returns:
-            Number of connections that received the message
+            Number of connections the message was queued for
         """
+        payload = _encode(message)
+        key = _coalesce_key(message)
         sent_count = 0
-        async with self._lock:
-            connections = list(self._connections[subscription_type])
-
-        for connection in connections:
+        for connection in list(self._connections[subscription_type]):
             # Filter by subscription_id if specified
             if subscription_id is not None and connection.subscription_id != subscription_id:
                 continue
-
-            try:
-                await self._send_json(connection, message)
+            if self._enqueue(connection, payload, key) != QueueResult.DROPPED:
                 sent_count += 1
-            except Exception as e:
-                logger.warning(f"Failed to send to connection: {e}")
 
         return sent_count
 
-    async def _send_json(self, connection: WebSocketConnection, data: dict) -> None:
-        """Send JSON data to a connection."""
-        if connection.websocket.client_state != WebSocketState.CONNECTED:
+    def subscribe(self, connection: WebSocketConnection, keys: set[tuple]) -> set[tuple]:
+        """
+        Add subscription keys to a multiplexed connection.
+
+        Returns:
+            Keys that were not subscribed before
+
+        Raises:
+            ValueError: the connection would exceed WS_MAX_SUBSCRIPTIONS
+        """
+        added = keys - connection.keys
+        if len(connection.keys) + len(added) > settings.WS_MAX_SUBSCRIPTIONS:
+            raise ValueError(
+                f"Too many subscriptions (max {settings.WS_MAX_SUBSCRIPTIONS})"
+            )
+        if connection.closed:
+            return set()
+        for key in added:
+            self._index.add(connection, key)
+        connection.keys.update(added)
+        return added
+
+    def unsubscribe(self, connection: WebSocketConnection, keys: Optional[set[tuple]] = None) -> None:
+        """Remove subscription keys (all of them by default) from a multiplexed connection."""
+        removed = connection.keys & keys if keys is not None else set(connection.keys)
+        for key in removed:
+            self._index.remove(connection, key)
+        connection.keys -= removed
+
+    def send_json(self, connection: WebSocketConnection, data: dict) -> bool:
+        """Queue a JSON message for one connection."""
+        return self._enqueue(connection, _encode(data)) != QueueResult.DROPPED
+
+    def _enqueue(
+        self,
+        connection: WebSocketConnection,
+        payload: str,
+        key: Optional[Hashable] = None,
+    ) -> QueueResult:
+        """Queue a message for a connection, applying the overflow policy."""
+        if connection.closed:
+            return QueueResult.DROPPED
+
+        result = connection.queue.put(payload, key)
+        if result == QueueResult.COALESCED:
+            connection.coalesced_count += 1
+            self._counters["coalesced_messages"] += 1
+        elif result == QueueResult.DROPPED:
+            connection.dropped_count += 1
+            self._counters["dropped_messages"] += 1
+
+        if connection.queue.full:
+            now = time.monotonic()
+            if connection.lagging_since is None:
+                connection.lagging_since = now
+            elif now - connection.lagging_since > settings.WS_MAX_LAG_SECONDS:
+                self._disconnect_slow(connection)
+        return result
+
+    def _disconnect_slow(self, connection: WebSocketConnection) -> None:
+        """Close a socket that cannot keep up (from sync code)."""
+        if connection.closed:
             return
+        self._counters["slow_disconnects"] += 1
+        logger.info(
+            f"Disconnecting slow WebSocket client: {connection.subscription_type.value} "
+            f"({len(connection.queue)} messages pending)"
+        )
+        asyncio.create_task(self._close_and_disconnect(
+            connection, code=1013, reason="Client too slow",
+        ))
+
+    async def _close_and_disconnect(
+        self,
+        connection: WebSocketConnection,
+        code: int,
+        reason: str,
+    ) -> None:
+        await self.disconnect(connection)
+        await self._close_connection(connection, code=code, reason=reason)
 
+    @staticmethod
+    def _redis_channels(connection: WebSocketConnection) -> list[str]:
+        """Redis channels a connection needs (multiplexed ones filter the all-prices feed)."""
+        if connection.subscription_type == SubscriptionType.MULTI:
+            return [CHANNEL_ALL_PRICES]
+        return connection.channels
+
+    def _listens(self, channel: str) -> bool:
+        """Whether a connection of this process still needs the Redis channel."""
+        if self._by_channel.get(channel):
+            return True
+        return channel == CHANNEL_ALL_PRICES and bool(self._connections[SubscriptionType.MULTI])
+
+    async def _subscribe_channel(self, channel: str) -> None:
+        if self._pubsub:
+            await self._pubsub.subscribe([channel], self._on_redis_message, raw=True)
+
+    async def _unsubscribe_channel(self, channel: str) -> None:
+        if self._pubsub:
+            try:
+                await self._pubsub.unsubscribe([channel], self._on_redis_message)
+            except Exception as e:
+                logger.warning(f"Failed to unsubscribe from {channel}: {e}")
+
+    async def _writer(self, connection: WebSocketConnection) -> None:
+        """Write queued messages to the socket, one at a time."""
+        websocket = connection.websocket
         try:
-            await connection.websocket.send_json(data)
-            connection.message_count += 1
+            while True:
+                payload = await connection.queue.get()
+                if websocket.client_state != WebSocketState.CONNECTED:
+                    break
+                await websocket.send_text(payload)
+                connection.message_count += 1
+                # Caught up to half the queue: no longer lagging
+                if len(connection.queue) <= connection.queue.maxsize // 2:
+                    connection.lagging_since = None
+        except asyncio.CancelledError:
+            return
         except Exception as e:
             logger.debug(f"Error sending to WebSocket: {e}")
-            raise
+        await self.disconnect(connection)
 
     async def _close_connection(
         self,
@@ -253,35 +752,73 @@ class ConnectionManager:
         except Exception as e:
             logger.debug(f"Error closing WebSocket: {e}")
 
-    def _on_redis_message(
-        self,
-        connection: WebSocketConnection,
-        channel: str,
-        message: dict,
-    ) -> None:
+    def _on_redis_message(self, channel: str, payload: str) -> None:
         """
-        Handle incoming Redis pub/sub message.
+        Handle incoming Redis pub/sub message (raw JSON text).
 
-        Schedules async send in the event loop.
+        Fans the message out to the send queues of the channel's
+        connections; the text is forwarded as published. The coalescing
+        key is computed once per message.
         """
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                asyncio.create_task(self._forward_message(connection, message))
-        except Exception as e:
-            logger.error(f"Error handling Redis message: {e}")
+        self._messages_received += 1
+        subscribers = self._by_channel.get(channel)
+        multiplexed = channel == CHANNEL_ALL_PRICES and bool(self._index)
+        if not subscribers and not multiplexed:
+            return
+        message = _decode(payload)
+        key = _coalesce_key(message)
+        for connection in list(subscribers or ()):
+            self._enqueue(connection, payload, key)
+        if multiplexed and message:
+            self._dispatch_multiplexed(message, payload, key)
+
+    def _dispatch_multiplexed(self, message: dict, payload: str, key: Optional[Hashable]) -> None:
+        """Send an update to the multiplexed connections subscribed to it."""
+        if message.get("type") == MessageType.BATCH.value:
+            # Batches are unpacked: each update is matched on its own
+            for update in message.get("data") or ():
+                data = update.get("data") if isinstance(update, dict) else None
+                if not isinstance(data, dict):
+                    continue
+                connections = self._index.match(data, update.get("type"))
+                if connections:
+                    update_payload = _encode(update)
+                    update_key = _coalesce_key(update)
+                    for connection in connections:
+                        self._enqueue(connection, update_payload, update_key)
+            return
 
-    async def _forward_message(
-        self,
-        connection: WebSocketConnection,
-        message: dict,
-    ) -> None:
-        """Forward a message from Redis to the WebSocket client."""
-        try:
-            await self._send_json(connection, message)
-        except Exception as e:
-            logger.debug(f"Error forwarding message: {e}")
-            await self.disconnect(connection)
+        data = message.get("data")
+        if not isinstance(data, dict):
+            return
+        for connection in self._index.match(data, message.get("type")):
+            self._enqueue(connection, payload, key)
+
+    def _on_stream_message(self, stream_id: str, payload: str) -> None:
+        """
+        Handle an update read from the price streams (streams transport).
+
+        The update is routed to the all-prices, collection and gift
+        channels it would have been published to.
+        """
+        self._messages_received += 1
+        message = _decode(payload)
+        data = message.get("data") if message else None
+        if not isinstance(data, dict):
+            return
+        key = _coalesce_key(message)
+        for channel in (
+            CHANNEL_ALL_PRICES,
+            f"{CHANNEL_COLLECTION_PREFIX}{data.get('collection_id')}",
+            f"{CHANNEL_GIFT_PREFIX}{data.get('gift_id')}",
+        ):
+            for connection in list(self._by_channel.get(channel, ())):
+                if connection.replay_backlog is not None:
+                    connection.replay_backlog.append((data.get("collection_id"), stream_id, payload, key))
+                else:
+                    self._enqueue(connection, payload, key)
+        if self._index:
+            self._dispatch_multiplexed(message, payload, key)
 
     async def _heartbeat_loop(self) -> None:
         """
@@ -296,11 +833,11 @@ class ConnectionManager:
             try:
                 await asyncio.sleep(HEARTBEAT_INTERVAL)
 
-                heartbeat_message = {
+                heartbeat_message = _encode({
                     "type": MessageType.HEARTBEAT.value,
                     "timestamp": datetime.utcnow().isoformat() + "Z",
                     "connections": self.total_connections,
-                }
+                })
 
                 stale_connections = []
                 now = datetime.utcnow()
@@ -312,24 +849,31 @@ class ConnectionManager:
                         for conn in connections
                     ]
 
+                lag_deadline = time.monotonic() - settings.WS_MAX_LAG_SECONDS
                 for connection in all_connections:
-                    try:
-                        # Check if connection is stale
-                        time_since_heartbeat = (now - connection.last_heartbeat).total_seconds()
-                        if time_since_heartbeat > STALE_THRESHOLD:
-                            stale_connections.append(connection)
-                            continue
-
-                        # Send heartbeat
-                        await self._send_json(connection, heartbeat_message)
+                    # Still full since before the lag threshold
+                    if connection.lagging_since is not None and connection.lagging_since < lag_deadline:
+                        self._disconnect_slow(connection)
+                        continue
+
+                    # Check if connection is stale
+                    time_since_heartbeat = (now - connection.last_heartbeat).total_seconds()
+                    if time_since_heartbeat > STALE_THRESHOLD:
+                        stale_connections.append(connection)
+                        continue
+
+                    # Pending messages keep the client busy: skip the heartbeat
+                    if len(connection.queue):
+                        self._counters["dropped_heartbeats"] += 1
                         connection.last_heartbeat = now
+                        continue
 
-                    except Exception as e:
-                        logger.debug(f"Heartbeat failed for connection: {e}")
-                        stale_connections.append(connection)
+                    if self._enqueue(connection, heartbeat_message) != QueueResult.DROPPED:
+                        connection.last_heartbeat = now
 
                 # Clean up stale connections
                 for connection in stale_connections:
+                    await self._close_connection(connection, code=1001, reason="Stale connection")
                     await self.disconnect(connection)
 
             except asyncio.CancelledError:
@@ -340,12 +884,32 @@ class ConnectionManager:
 
     def get_stats(self) -> dict:
         """Get connection statistics."""
+        all_connections = [
+            conn
+            for connections in self._connections.values()
+            for conn in connections
+        ]
+        depths = [len(conn.queue) for conn in all_connections]
         return {
             "total_connections": self.total_connections,
             "by_type": {
                 sub_type.value: len(conns)
                 for sub_type, conns in self._connections.items()
             },
+            "transport": settings.WS_TRANSPORT,
+            "channels": len(self._by_channel),
+            "streams": self._stream_consumer.streams if self._stream_consumer else None,
+            "subscription_keys": len(self._index),
+            "messages_received": self._messages_received,
+            "queue_depth": {
+                "total": sum(depths),
+                "max": max(depths, default=0),
+                "limit": settings.WS_SEND_QUEUE_SIZE,
+                "lagging_connections": sum(
+                    1 for conn in all_connections if conn.lagging_since is not None
+                ),
+            },
+            **self._counters,
         }
 
 
@@ -363,7 +927,10 @@ async def get_manager() -> ConnectionManager:
 # WebSocket endpoints
 
 @router.websocket("/ws/prices")
-async def websocket_all_prices(websocket: WebSocket):
+async def websocket_all_prices(
+    websocket: WebSocket,
+    last_id: Optional[str] = Query(None, description="Last received stream_id, to replay missed updates"),
+):
     """
     WebSocket endpoint for all price updates.
 
@@ -383,10 +950,14 @@ async def websocket_all_prices(websocket: WebSocket):
       "timestamp": "2024-01-01T00:00:00Z"
     }
     ```
+
+    With WS_PUBLISH_BATCHES a sync delta arrives as one message per
+    collection: `{"type": "batch", "collection_id": 1, "data": [<message>, ...]}`.
     """
     connection = await manager.connect(
         websocket=websocket,
         subscription_type=SubscriptionType.ALL_PRICES,
+        last_id=last_id,
     )
 
     try:
@@ -413,12 +984,15 @@ async def websocket_all_prices(websocket: WebSocket):
 async def websocket_collection(
     websocket: WebSocket,
     collection_id: int,
+    last_id: Optional[str] = Query(None, description="Last received stream_id, to replay missed updates"),
 ):
     """
     WebSocket endpoint for collection-specific price updates.
 
     Args:
         collection_id: The collection ID to subscribe to
+        last_id: Last received stream_id; missed updates are replayed
+            first (streams transport)
 
     Receives updates only for listings in the specified collection.
     """
@@ -426,6 +1000,7 @@ async def websocket_collection(
         websocket=websocket,
         subscription_type=SubscriptionType.COLLECTION,
         subscription_id=collection_id,
+        last_id=last_id,
     )
 
     try:
@@ -450,12 +1025,15 @@ async def websocket_collection(
 async def websocket_gift(
     websocket: WebSocket,
     gift_id: int,
+    last_id: Optional[str] = Query(None, description="Last received stream_id, to replay missed updates"),
 ):
     """
     WebSocket endpoint for single gift price updates.
 
     Args:
         gift_id: The gift/NFT ID to subscribe to
+        last_id: Last received stream_id; missed updates are replayed
+            first (streams transport)
 
     Receives updates only for the specified gift's listings.
     """
@@ -463,6 +1041,53 @@ async def websocket_gift(
         websocket=websocket,
         subscription_type=SubscriptionType.GIFT,
         subscription_id=gift_id,
+        last_id=last_id,
+    )
+
+    try:
+        while True:
+            try:
+                data = await asyncio.wait_for(
+                    websocket.receive_text(),
+                    timeout=60.0,
+                )
+                await _handle_client_message(connection, data)
+            except asyncio.TimeoutError:
+                continue
+
+    except WebSocketDisconnect:
+        await manager.disconnect(connection)
+    except Exception as e:
+        logger.error(f"WebSocket error: {e}")
+        await manager.disconnect(connection)
+
+
+@router.websocket("/ws/subscribe")
+async def websocket_multiplexed(websocket: WebSocket):
+    """
+    WebSocket endpoint with client-managed subscriptions.
+
+    One socket follows any number of collections, gifts, gift types and
+    price thresholds; only matching updates are sent. Starts with no
+    subscriptions.
+
+    Client messages:
+    ```json
+    {"type": "subscribe", "collections": [1], "gifts": [123, 456],
+     "gift_types": ["Plush Pepe"], "price_max": "10", "price_min": "1000"}
+    {"type": "unsubscribe", "gifts": [123]}
+    {"type": "unsubscribe", "all": true}
+    ```
+
+    An update is sent once if it matches any subscription: its
+    collection, gift or gift type, or a listed price at or below
+    price_max / at or above price_min. Each change is answered with the
+    current subscriptions: `{"type": "subscriptions", "data": {...}}`.
+    Update messages have the format of /ws/prices (batches are unpacked).
+    """
+    connection = await manager.connect(
+        websocket=websocket,
+        subscription_type=SubscriptionType.MULTI,
     )
 
     try:
@@ -492,7 +1117,8 @@ async def _handle_client_message(
 
     Supports:
     - ping: Responds with pong
-    - subscribe: (future) Dynamic subscription changes
+    - stats: Connection statistics
+    - subscribe / unsubscribe: Change subscriptions (/ws/subscribe only)
     """
     try:
         data = json.loads(raw_data)
@@ -503,7 +1129,7 @@ async def _handle_client_message(
     message_type = data.get("type", "").lower()
 
     if message_type == "ping":
-        await connection.websocket.send_json({
+        manager.send_json(connection, {
             "type": "pong",
             "timestamp": datetime.utcnow().isoformat() + "Z",
         })
@@ -513,13 +1139,42 @@ async def _handle_client_message(
         # Client responded to our ping
         connection.last_heartbeat = datetime.utcnow()
 
+    elif message_type in ("subscribe", "unsubscribe"):
+        if connection.subscription_type != SubscriptionType.MULTI:
+            manager.send_json(connection, {
+                "type": "error",
+                "message": "Subscriptions can only be changed on /ws/subscribe",
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+            })
+            return
+        try:
+            keys = parse_subscription_keys(data)
+            if message_type == "subscribe":
+                manager.subscribe(connection, keys)
+            else:
+                manager.unsubscribe(connection, None if data.get("all") else keys)
+        except ValueError as e:
+            manager.send_json(connection, {
+                "type": "error",
+                "message": str(e),
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+            })
+            return
+        manager.send_json(connection, {
+            "type": "subscriptions",
+            "data": _describe_keys(connection.keys),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+        })
+
     elif message_type == "stats":
         # Return connection stats
-        await connection.websocket.send_json({
+        manager.send_json(connection, {
             "type": "stats",
             "data": {
                 "connected_at": connection.connected_at.isoformat() + "Z",
                 "messages_received": connection.message_count,
+                "messages_coalesced": connection.coalesced_count,
+                "messages_dropped": connection.dropped_count,
                 "subscription_type": connection.subscription_type.value,
                 "subscription_id": connection.subscription_id,
             },
@@ -528,7 +1183,7 @@ async def _handle_client_message(
 
     else:
         # Unknown message type
-        await connection.websocket.send_json({
+        manager.send_json(connection, {
             "type": "error",
             "message": f"Unknown message type: {message_type}",
             "timestamp": datetime.utcnow().isoformat() + "Z",
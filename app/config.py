@@ -40,6 +40,36 @@ class Settings(BaseSettings):
     # ============================================================
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_CACHE_TTL: int = 300  # 5 minutes default
+    FILTERS_CACHE_TTL: int = 600  # /gifts/filters facets (also invalidated by syncs)
+    RESPONSE_CACHE_ENABLED: bool = True  # Cache hot read endpoints in Redis
+    RESPONSE_CACHE_STALE_TTL: int = 60  # Serve expired responses this long while refreshing
+    RESPONSE_CACHE_LOCK_TIMEOUT: float = 5.0  # Max wait for another process computing the same key
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024  # gzip/brotli responses from this size (0 = off)
+
+    # Shared HTTP client pools (per host)
+    HTTP_POOL_MAX_CONNECTIONS: int = 20
+    HTTP_POOL_MAX_KEEPALIVE: int = 10
+
+    # Upstream rate limiting (token bucket per host / API key)
+    RATE_LIMIT_SHARED: bool = True  # Share buckets between processes via Redis
+    RATE_LIMIT_BURST_SECONDS: float = 1.0  # Bucket capacity, in seconds of rate
+    RATE_LIMIT_BACKOFF: float = 0.5  # Rate multiplier on HTTP 429
+    RATE_LIMIT_MIN_FACTOR: float = 0.1  # Lowest rate, as a fraction of the limit
+    RATE_LIMIT_RECOVERY: int = 60  # Seconds to recover the full rate after 429
+
+    # ============================================================
+    # WEBSOCKET
+    # ============================================================
+    WS_SEND_QUEUE_SIZE: int = 256  # Messages waiting to be sent per socket
+    WS_MAX_SUBSCRIPTIONS: int = 500  # Subscription keys per /ws/subscribe socket
+    WS_MAX_LAG_SECONDS: float = 10.0  # Disconnect sockets whose queue stays full this long
+    WS_PUBLISH_BATCHES: bool = False  # Pack a sync delta into "batch" messages per collection
+    WS_PUBLISH_BATCH_SIZE: int = 500  # Max updates per batch message
+    WS_TRANSPORT: str = "pubsub"  # "pubsub" or "streams" (replayable, see app.core.price_stream)
+    WS_STREAM_MAXLEN: int = 10000  # Entries kept per collection stream (approximate)
+    WS_STREAM_REPLAY_LIMIT: int = 1000  # Max missed messages replayed to a reconnecting client
+    WS_STREAM_GIFT_REPLAY_SCAN: int = 5000  # Max stream entries scanned to replay one gift's updates
+    WS_STREAM_GROUP_TTL: int = 3600  # Remove consumer groups of API processes idle this long
 
     # ============================================================
     # CELERY
@@ -94,6 +124,10 @@ class Settings(BaseSettings):
     TELEGRAM_API_HASH: str = "b7da0a94afbba393d358f0a214b24779"
     TELEGRAM_SESSION_NAME: str = "gift_indexer"
     TELEGRAM_SYNC_DELAY: float = 0.5  # Delay between API calls (seconds)
+    # Resale crawler: gift types are paged concurrently, FLOOD_WAIT pauses the session
+    TELEGRAM_EXTRA_SESSIONS: list[str] = []  # Additional user sessions to spread requests over
+    TELEGRAM_CRAWL_CONCURRENCY: int = 4  # Concurrent requests per session
+    TELEGRAM_FLOOD_WAIT_MAX: int = 60  # Longer FLOOD_WAIT takes the session out of the crawl
 
     # ============================================================
     # MARKET ADAPTERS
@@ -107,6 +141,9 @@ class Settings(BaseSettings):
     MRKT_INIT_DATA: Optional[str] = None  # Telegram initData for authentication
     MRKT_RATE_LIMIT: float = 3.0
 
+    # Tonnel
+    TONNEL_RATE_LIMIT: float = 2.0
+
     # Fragment (uses TON API)
     FRAGMENT_COLLECTION: str = "EQD-BJSVUJviud_Qv7Ymfd3qzXdrmV525e3YDzWQoHIAiInL"
 
@@ -122,11 +159,21 @@ class Settings(BaseSettings):
     # SYNC SETTINGS
     # ============================================================
     SYNC_ON_STARTUP: bool = True  # Синхронизировать данные при старте
+    SYNC_STARTUP_BACKGROUND: bool = True  # Не блокировать старт API синхронизацией
+    SYNC_CONCURRENCY: int = 5  # Сколько маркетов синхронизируется одновременно
+    SYNC_MARKET_TIMEOUT: float = 900.0  # Дедлайн на синхронизацию одного маркета (seconds)
     SYNC_INTERVAL_LISTINGS: int = 60  # seconds
     SYNC_INTERVAL_METADATA: int = 3600  # 1 hour
     SYNC_BATCH_SIZE: int = 100
     SYNC_MAX_ITEMS_PORTALS: int = 500  # Макс. записей с Portals.tg
     SYNC_MAX_ITEMS_MAJOR: int = 500  # Макс. записей с Major.tg
+    SYNC_DELTA_ENABLED: bool = True  # Инкрементальные прогоны по водяным знакам
+    SYNC_FULL_INTERVAL: int = 3600  # Полный прогон (reconciliation) не реже, seconds
+    SYNC_DELTA_HEAD_SIZE: int = 50  # Сколько id из головы потока хранить в водяном знаке
+    SYNC_RECONCILE_MAX_DROP: float = 0.5  # Макс. доля листингов, снимаемых одним полным прогоном
+    SYNC_FINGERPRINT_TTL: int = 3600  # Время жизни отпечатков листингов в Redis, seconds
+    SYNC_TOUCH_INTERVAL: int = 600  # Не чаще обновлять last_seen_at неизменённых листингов, seconds
+    SYNC_PAIR_LOCK_TIMEOUT: int = 300  # Лок (и лимит времени) синхронизации пары маркет × коллекция в Celery, seconds
 
     # ============================================================
     # FX RATES
@@ -0,0 +1,145 @@
+"""
+Redis-backed cache for data derived from listings.
+
+Everything cached here depends on the listings table, which only changes
+when a sync writes. Instead of tracking individual keys, syncs bump a
+global generation counter (bump_sync_generation) and cache keys embed the
+current generation, so a sync invalidates all derived data at once and
+the stale entries simply expire.
+
+Response caches (app.core.response_cache) invalidate at a finer grain:
+each entry depends on tags, every tag has a version counter, and a sync
+bumps only the tags of what it changed (its collection and the gift
+types of repriced NFTs). bump_sync_generation() does both.
+
+The cache is an optimization only: if Redis is unreachable, reads miss
+and writes are dropped.
+
+Usage:
+    key = await generation_key("facets", normalized_params)
+    data = await cache_get(key)
+    if data is None:
+        data = await compute()
+        await cache_set(key, data, ttl=settings.FILTERS_CACHE_TTL)
+"""
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Iterable, Optional
+
+from app.core.clients import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "cache:"
+SYNC_GENERATION_KEY = "sync:generation"
+TAG_PREFIX = "cache:tag:"
+# Hash: tag -> unix time of its last bump (Last-Modified of responses)
+TAG_MODIFIED_KEY = "cache:tag-modified"
+
+# Every response entry depends on ALL_TAG; bumped when a change has unknown scope
+ALL_TAG = "all"
+# Bumped by every sync that changed listings (unfiltered views depend on it)
+LISTINGS_TAG = "listings"
+COLLECTIONS_TAG = "collections"
+
+
+def collection_tag(collection_id: int) -> str:
+    return f"collection:{collection_id}"
+
+
+def gift_type_tag(gift_type: str) -> str:
+    return f"gift_type:{gift_type}"
+
+
+async def get_sync_generation() -> int:
+    """Current sync generation (0 if unknown)."""
+    try:
+        return int(await get_redis().get(SYNC_GENERATION_KEY) or 0)
+    except Exception as e:
+        logger.warning(f"Cache unavailable: {e}")
+        return 0
+
+
+async def bump_sync_generation(
+    collection_ids: Optional[Iterable[int]] = None,
+    gift_types: Optional[Iterable[str]] = None,
+) -> Optional[int]:
+    """
+    Invalidate listing-derived cache entries after a sync wrote data.
+
+    The generation invalidates everything keyed by generation_key(). Tags
+    of response caches are bumped for the given collections and gift
+    types; if neither is given the scope is unknown and all responses
+    are invalidated.
+    """
+    if collection_ids is None and gift_types is None:
+        tags = [ALL_TAG]
+    else:
+        tags = [
+            LISTINGS_TAG,
+            *(collection_tag(collection_id) for collection_id in collection_ids or ()),
+            *(gift_type_tag(gift_type) for gift_type in gift_types or ()),
+        ]
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.incr(SYNC_GENERATION_KEY)
+            _bump_tags(pipe, tags)
+            results = await pipe.execute()
+        return results[0]
+    except Exception as e:
+        logger.warning(f"Could not bump sync generation: {e}")
+        return None
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """Invalidate response cache entries depending on any of `tags`."""
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            _bump_tags(pipe, tags)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not invalidate cache tags {tags}: {e}")
+
+
+def _bump_tags(pipe, tags) -> None:
+    now = time.time()
+    for tag in tags:
+        pipe.incr(f"{TAG_PREFIX}{tag}")
+    pipe.hset(TAG_MODIFIED_KEY, mapping={tag: now for tag in tags})
+
+
+async def generation_key(namespace: str, params: Any) -> str:
+    """
+    Cache key for `params` in the current sync generation.
+
+    `params` must already be normalized (sorted lists, defaults applied)
+    so equivalent requests share one entry.
+    """
+    generation = await get_sync_generation()
+    return f"{KEY_PREFIX}{namespace}:{generation}:{params_digest(params)}"
+
+
+def params_digest(params: Any) -> str:
+    """Short stable digest of normalized request parameters."""
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+async def cache_get(key: str) -> Optional[Any]:
+    """Get a cached JSON value (None on miss or Redis error)."""
+    try:
+        raw = await get_redis().get(key)
+    except Exception as e:
+        logger.warning(f"Cache unavailable: {e}")
+        return None
+    return json.loads(raw) if raw is not None else None
+
+
+async def cache_set(key: str, value: Any, ttl: int) -> None:
+    """Store a JSON-serializable value for `ttl` seconds."""
+    try:
+        await get_redis().set(key, json.dumps(value, default=str), ex=ttl)
+    except Exception as e:
+        logger.warning(f"Cache unavailable: {e}")
@@ -0,0 +1,110 @@
+"""
+Shared async clients bound to the running event loop.
+
+HTTP clients are pooled per host and Redis per process, so keep-alive
+connections and TLS sessions survive between syncs instead of being
+re-established by every adapter instance. Clients are registered per
+event loop: a client created on one loop is never handed to another
+(httpx and redis connections cannot cross loops).
+
+Usage:
+    client = get_http_client("https://api.getgems.io", headers={...})
+    redis = get_redis()        # async, bound to the running loop
+    redis = get_sync_redis()   # blocking, for sync code
+    ...
+    await close_clients()  # on shutdown, from the owning loop
+"""
+import asyncio
+import logging
+import weakref
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+import redis.asyncio as aioredis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# loop -> {origin: client}
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+# loop -> redis client
+_redis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = (
+    weakref.WeakKeyDictionary()
+)
+# Blocking client for sync code (Celery task bodies); not loop-bound
+_sync_redis = None
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_http_client(
+    url: str,
+    headers: Optional[dict] = None,
+    timeout: float = 30.0,
+) -> httpx.AsyncClient:
+    """
+    Get the pooled HTTP client for the host of `url`.
+
+    The first caller for a host defines the client's default headers and
+    timeout. The client is shared: callers must not close it.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _http_clients.setdefault(loop, {})
+    origin = _origin(url)
+
+    client = clients.get(origin)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            headers=headers,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+            ),
+        )
+        clients[origin] = client
+    return client
+
+
+def get_redis() -> aioredis.Redis:
+    """Get the pooled Redis client of the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _redis_clients.get(loop)
+    if client is None:
+        client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+        _redis_clients[loop] = client
+    return client
+
+
+def get_sync_redis():
+    """Get the process-wide blocking Redis client."""
+    global _sync_redis
+    if _sync_redis is None:
+        import redis
+        _sync_redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _sync_redis
+
+
+async def close_clients() -> None:
+    """Close all shared clients of the running event loop."""
+    loop = asyncio.get_running_loop()
+
+    for origin, client in _http_clients.pop(loop, {}).items():
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing HTTP client for {origin}: {e}")
+
+    client = _redis_clients.pop(loop, None)
+    if client is not None:
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Error closing Redis client: {e}")
@@ -3,16 +3,21 @@ Database configuration and session management.
 
 Uses SQLAlchemy 2.0 async with PostgreSQL.
 """
+import json
 import logging
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
+from sqlalchemy import Integer, any_, literal, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
 from app.config import settings
 
@@ -46,6 +51,9 @@ async def init_db():
         # Import all models to register them
         from app.models import Collection, NFT, Listing, Market, Sale  # noqa
 
+        # Trigram indexes (NFT search) need pg_trgm
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
         # Create tables automatically
         await conn.run_sync(Base.metadata.create_all)
 
@@ -93,3 +101,54 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
 
 # Re-export for convenience
 AsyncSession = AsyncSession
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, sent with its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def explain(session, statement) -> dict:
+    """
+    Root node of the planner's JSON plan for a SELECT (not executed).
+
+    Works on a session or a connection. Filter values stay bound
+    parameters: user input is never rendered into the SQL text.
+    """
+    result = await session.execute(_Explain(statement))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def estimate_rows(session: AsyncSession, statement) -> int:
+    """
+    Planner row estimate for a SELECT (no scan).
+
+    Aggregate nodes are skipped, so for a COUNT query this is the
+    estimated number of rows counted.
+    """
+    node = await explain(session, statement)
+    while node.get("Node Type") == "Aggregate" and node.get("Plans"):
+        node = node["Plans"][0]
+    return int(node.get("Plan Rows", 0))
+
+
+def in_array(column, values, item_type=Integer):
+    """
+    column = ANY(:values) with all values bound as one array parameter.
+
+    IN (...) binds one parameter per value, and asyncpg rejects statements
+    with more than 32767 parameters; large id sets of a sync must not.
+    """
+    return column == any_(literal(list(values), ARRAY(item_type)))
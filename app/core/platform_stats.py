@@ -0,0 +1,169 @@
+"""
+Platform counters for /api/v1/stats.
+
+The homepage polls /api/v1/stats, so the endpoint reads one Redis hash
+and never counts rows on the request path. The counters are kept up to
+date by the sync pipeline:
+
+* total_collections / total_gifts — planner row estimates of the tables
+  (pg_class.reltuples), re-read after every sync;
+* gifts_on_sale — sum of the gift_facets summary, which syncs maintain,
+  plus on-sale gifts without a gift type (not in the summary);
+* total_listings — active listings, adjusted by each sync's delta
+  (activated minus deactivated listings).
+
+The recount_platform_stats Celery task periodically replaces all of them
+with exact counts, which also corrects drift of the listing delta. An
+empty hash (fresh Redis) is seeded with estimates on first read.
+
+Usage:
+    stats = await get_platform_stats()
+    ...
+    await refresh_platform_stats(listings_delta=activated - deactivated)
+"""
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import select, func, text
+
+from app.core.clients import get_redis
+from app.core.database import estimate_rows, get_async_session
+from app.models.collection import Collection
+from app.models.gift_facet import GiftFacet
+from app.models.listing import Listing
+from app.models.nft import NFT
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "stats:platform"
+COUNTERS = ("total_collections", "total_gifts", "gifts_on_sale", "total_listings")
+
+
+async def get_platform_stats() -> dict:
+    """Current counters; seeds them with estimates if Redis has none."""
+    try:
+        stored = await get_redis().hgetall(STATS_KEY)
+    except Exception as e:
+        logger.warning(f"Stats cache unavailable: {e}")
+        stored = None
+
+    if stored and all(name in stored for name in COUNTERS):
+        return _decode(stored)
+
+    async with get_async_session() as session:
+        counters = await _estimate(session)
+        counters["total_listings"] = await _estimate_active_listings(session)
+    mapping = _encode(counters, exact=False)
+    if stored is not None:
+        await _store(mapping)
+    return _decode(mapping)
+
+
+async def refresh_platform_stats(listings_delta: int = 0) -> None:
+    """
+    Update the counters after a sync committed.
+
+    Args:
+        listings_delta: change of the number of active listings
+    """
+    try:
+        async with get_async_session() as session:
+            counters = await _estimate(session)
+        redis = get_redis()
+        has_listings = await redis.hexists(STATS_KEY, "total_listings")
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(STATS_KEY, mapping=_encode(counters, exact=False))
+            # Without a base value the delta is meaningless: the next read seeds it
+            if listings_delta and has_listings:
+                pipe.hincrby(STATS_KEY, "total_listings", listings_delta)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not refresh platform stats: {e}")
+
+
+async def recount_platform_stats() -> dict:
+    """Replace all counters with exact counts (periodic job)."""
+    async with get_async_session() as session:
+        result = await session.execute(
+            select(
+                select(func.count(Collection.id)).scalar_subquery().label("total_collections"),
+                select(func.count(NFT.id)).scalar_subquery().label("total_gifts"),
+                select(func.count(NFT.id)).where(NFT.is_on_sale == True)
+                .scalar_subquery().label("gifts_on_sale"),
+                select(func.count(Listing.id)).where(Listing.is_active == True)
+                .scalar_subquery().label("total_listings"),
+            )
+        )
+        counters = dict(result.one()._mapping)
+
+    mapping = _encode(counters, exact=True)
+    await _store(mapping)
+    return _decode(mapping)
+
+
+async def _estimate(session) -> dict:
+    """Table totals from planner statistics and on-sale gifts from gift_facets."""
+    result = await session.execute(
+        text(
+            "SELECT relname, reltuples::bigint AS rows FROM pg_class "
+            "WHERE oid IN ('collections'::regclass, 'nfts'::regclass)"
+        )
+    )
+    estimates = {row.relname: row.rows for row in result}
+
+    counters = {}
+    for name, table, model in (
+        ("total_collections", "collections", Collection),
+        ("total_gifts", "nfts", NFT),
+    ):
+        rows = estimates.get(table, -1)
+        if rows < 0:
+            # Never analyzed (reltuples = -1): count once, tables are small then
+            rows = (await session.execute(select(func.count(model.id)))).scalar() or 0
+        counters[name] = rows
+
+    # gift_facets has no row for gifts without a type: they are counted
+    # apart (a short range of idx_nfts_sale_gift_type_price), so the sum
+    # matches the exact count of recount_platform_stats
+    on_sale = await session.execute(
+        select(
+            select(func.coalesce(func.sum(GiftFacet.count_on_sale), 0)).where(
+                GiftFacet.gift_type == "",  # Rows over all gift types
+                GiftFacet.dimension == "gift_type",
+            ).scalar_subquery(),
+            select(func.count(NFT.id)).where(
+                NFT.is_on_sale == True,
+                NFT.gift_type.is_(None),
+            ).scalar_subquery(),
+        )
+    )
+    typed, untyped = on_sale.one()
+    counters["gifts_on_sale"] = typed + untyped
+    return counters
+
+
+async def _estimate_active_listings(session) -> int:
+    """Planner estimate of active listings (no scan)."""
+    return await estimate_rows(session, select(Listing.id).where(Listing.is_active == True))
+
+
+def _encode(counters: dict, exact: bool) -> dict[str, str]:
+    mapping = {name: str(int(counters[name])) for name in COUNTERS if name in counters}
+    mapping["exact"] = "1" if exact else "0"
+    mapping["updated_at"] = datetime.now(timezone.utc).isoformat()
+    return mapping
+
+
+def _decode(stored: dict) -> dict:
+    return {
+        **{name: int(stored[name]) for name in COUNTERS},
+        "is_exact": stored.get("exact") == "1",
+        "updated_at": stored.get("updated_at"),
+    }
+
+
+async def _store(mapping: dict[str, str]) -> None:
+    try:
+        await get_redis().hset(STATS_KEY, mapping=mapping)
+    except Exception as e:
+        logger.warning(f"Stats cache unavailable: {e}")
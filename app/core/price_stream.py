@@ -0,0 +1,359 @@
+"""
+Redis Streams transport for real-time price updates.
+
+Alternative to plain pub/sub, enabled with WS_TRANSPORT=streams. Pub/sub
+delivers only to whoever is connected at the moment of PUBLISH; streams
+keep the recent updates, so nothing published during a reconnect is lost:
+
+* sync workers append each update to a capped stream per collection
+  (ws:stream:collection:{id}, ~WS_STREAM_MAXLEN entries) and register
+  the collection in the ws:streams set;
+* every API process reads all collection streams through its own
+  consumer group (StreamConsumer). After a network blip it re-reads its
+  pending entries and continues from the last delivered ID;
+* every message sent to WebSocket clients carries its "stream_id"; a
+  client reconnecting with ?last_id=<stream_id> gets what it missed
+  (read_since) instead of reloading full pages over REST.
+
+Stream IDs are Redis server timestamps ("<ms>-<seq>") assigned per
+stream, so two collections can have entries with the same ID: an update
+is identified by (collection_id, stream_id). StreamConsumer merges the
+streams by ID before dispatch, so clients get updates in ID order and
+one last-seen ID works as a cursor over all streams, but only to the
+millisecond: another stream may have appended in the same millisecond
+after the client's last update. read_since therefore includes the whole
+millisecond of last_id. Replays are at-least-once: updates of that
+millisecond can arrive twice, and clients drop repeats by
+(collection_id, stream_id).
+
+Usage:
+    async with redis.pipeline(transaction=False) as pipe:
+        queue_appends(pipe, messages)
+        await pipe.execute()
+
+    missed, truncated = await read_since(get_redis(), "1700000000000-0", collection_ids=[1])
+"""
+import asyncio
+import bisect
+import heapq
+import json
+import logging
+import os
+import socket
+import time
+from typing import Callable, Iterable, Optional
+
+from app.config import settings
+from app.core.clients import get_redis
+
+logger = logging.getLogger(__name__)
+
+STREAM_PREFIX = "ws:stream:collection:"
+STREAMS_KEY = "ws:streams"  # Set of collection ids that have a stream
+GROUP_PREFIX = "ws:"  # Consumer groups of API processes
+
+READ_COUNT = 500  # Entries per XREADGROUP
+READ_BLOCK_MS = 1000
+REFRESH_INTERVAL = 10.0  # Seconds between looking for new collection streams
+
+
+def stream_key(collection_id: int) -> str:
+    return f"{STREAM_PREFIX}{collection_id}"
+
+
+def parse_id(stream_id: str) -> tuple[int, int]:
+    """Stream ID "<ms>-<seq>" as a comparable tuple (ValueError if malformed)."""
+    ms, _, seq = stream_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def entry_order(stream_id: str, collection_id: int) -> tuple[int, int, int]:
+    """Order of entries across streams: by ID, ties (same ID) by collection."""
+    return (*parse_id(stream_id), collection_id)
+
+
+def _collection_id(key: str) -> int:
+    return int(key[len(STREAM_PREFIX):])
+
+
+def with_stream_id(payload: str, stream_id: str) -> str:
+    """
+    Add "stream_id" to an encoded JSON object without re-encoding it.
+
+    Payloads are the JSON objects written by queue_appends.
+    """
+    return f'{payload[:-1]},"stream_id":"{stream_id}"}}'
+
+
+def queue_appends(pipe, messages: Iterable) -> int:
+    """
+    Queue XADDs of PriceUpdateMessages on a (sync or async) pipeline.
+
+    Returns:
+        Number of entries queued
+    """
+    count = 0
+    collection_ids = set()
+    for message in messages:
+        pipe.xadd(
+            stream_key(message.collection_id),
+            {"m": message.to_json()},
+            maxlen=settings.WS_STREAM_MAXLEN,
+            approximate=True,
+        )
+        collection_ids.add(message.collection_id)
+        count += 1
+    if collection_ids:
+        pipe.sadd(STREAMS_KEY, *collection_ids)
+    return count
+
+
+async def read_since(
+    redis,
+    last_id: str,
+    collection_ids: Optional[list[int]] = None,
+    gift_id: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> tuple[list[tuple[int, str, str]], bool]:
+    """
+    Entries from the millisecond of last_id on, in dispatch order.
+
+    The millisecond of last_id is included (see the module docstring):
+    the client may get its last updates again.
+
+    Args:
+        last_id: last stream ID the client has seen
+        collection_ids: streams to read (default: all collections; pass
+            the gift's collection with gift_id)
+        gift_id: keep only updates of this gift. The newest
+            WS_STREAM_GIFT_REPLAY_SCAN entries of each stream are scanned
+            for them
+        limit: max entries (default: WS_STREAM_REPLAY_LIMIT)
+
+    Returns:
+        ((collection_id, stream_id, payload) triples, truncated). Payloads
+        include "stream_id". truncated means more than `limit` entries
+        were missed, or a gift scan stopped before last_id: only the
+        newest are returned and the client should reload instead.
+    """
+    ms, _ = parse_id(last_id)
+    limit = limit or settings.WS_STREAM_REPLAY_LIMIT
+    if collection_ids is None:
+        collection_ids = sorted(int(member) for member in await redis.smembers(STREAMS_KEY))
+    if not collection_ids:
+        return [], False
+
+    # Gift replays filter what they read, so they scan a bounded window
+    scan = settings.WS_STREAM_GIFT_REPLAY_SCAN if gift_id is not None else limit + 1
+    async with redis.pipeline(transaction=False) as pipe:
+        for collection_id in collection_ids:
+            # Newest first
+            pipe.xrevrange(stream_key(collection_id), max="+", min=f"{ms}-0", count=scan)
+        results = await pipe.execute()
+
+    entries = []
+    truncated = False
+    for collection_id, stream_entries in zip(collection_ids, results):
+        if gift_id is not None and len(stream_entries) >= scan:
+            truncated = True  # Older updates of the gift were not scanned
+        for entry_id, fields in stream_entries:
+            payload = fields.get("m")
+            if not payload:
+                continue
+            if gift_id is not None and _gift_id(payload) != gift_id:
+                continue
+            entries.append((entry_order(entry_id, collection_id), collection_id, entry_id, payload))
+
+    truncated = truncated or len(entries) > limit
+    newest = heapq.nlargest(limit, entries)
+    return [
+        (collection_id, entry_id, with_stream_id(payload, entry_id))
+        for _, collection_id, entry_id, payload in reversed(newest)
+    ], truncated
+
+
+def _gift_id(payload: str) -> Optional[int]:
+    try:
+        return json.loads(payload)["data"]["gift_id"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class StreamConsumer:
+    """
+    Reads all collection streams through a consumer group of this process.
+
+    Calls callback(stream_id, payload) for every entry, in the event loop,
+    with "stream_id" added to the payload. Entries of all streams are
+    merged and dispatched in entry_order. When a stream returns a full
+    read, its next entries may sort before entries already read from
+    other streams: those are held back until that stream catches up.
+    Entries are acknowledged once dispatched. Groups of processes that
+    are gone (no activity for WS_STREAM_GROUP_TTL) are removed on start.
+    """
+
+    def __init__(self, callback: Callable[[str, str], None]):
+        self._callback = callback
+        self._group = f"{GROUP_PREFIX}{socket.gethostname()}:{os.getpid()}"
+        self._consumer = "main"
+        # Groups start at the process start: earlier entries are for replays
+        self._start_id = f"{int(time.time() * 1000)}-0"
+        self._streams: set[str] = set()  # Streams our group is created on
+        self._last_ids: dict[str, str] = {}  # Stream -> last dispatched ID
+        # Read but not yet dispatched: (order, stream, entry ID, fields)
+        self._held: list[tuple] = []
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self.entries_received = 0
+
+    @property
+    def streams(self) -> int:
+        return len(self._streams)
+
+    async def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Price stream consumer started (group {self._group})")
+
+    async def stop(self) -> None:
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        redis = get_redis()
+        for key in list(self._streams):
+            try:
+                await redis.xgroup_destroy(key, self._group)
+            except Exception as e:
+                logger.debug(f"Could not remove consumer group from {key}: {e}")
+        self._streams.clear()
+
+    async def _run(self) -> None:
+        redis = get_redis()
+        refresh_at = 0.0
+        cleanup = True
+        recover = False
+
+        while self._running:
+            try:
+                if time.monotonic() >= refresh_at:
+                    await self._refresh_streams(redis, cleanup)
+                    cleanup = False
+                    refresh_at = time.monotonic() + REFRESH_INTERVAL
+                if not self._streams:
+                    await asyncio.sleep(REFRESH_INTERVAL)
+                    continue
+
+                if recover:
+                    await self._recover(redis)
+                    recover = False
+
+                response = await redis.xreadgroup(
+                    self._group, self._consumer,
+                    {key: ">" for key in self._streams},
+                    count=READ_COUNT,
+                    block=READ_BLOCK_MS,
+                )
+                await self._dispatch(redis, response or ())
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if "NOGROUP" in str(e):
+                    # Group or stream removed: recreate at the last dispatched IDs
+                    refresh_at = 0.0
+                    self._streams.clear()
+                else:
+                    logger.warning(f"Price stream consumer error: {e}")
+                # Held entries are still pending: recovery reads them again
+                self._held = []
+                recover = True
+                await asyncio.sleep(1)
+
+    async def _recover(self, redis) -> None:
+        """Dispatch all entries delivered to us but lost with the connection."""
+        cursors = {key: "0" for key in self._streams}
+        while cursors:
+            # Pending entries after the cursor, READ_COUNT per stream
+            response = await redis.xreadgroup(
+                self._group, self._consumer, cursors, count=READ_COUNT,
+            ) or ()
+            cursors = {key: entries[-1][0] for key, entries in response if entries}
+            await self._dispatch(redis, response)
+
+    async def _dispatch(self, redis, response) -> None:
+        entries, self._held = self._held, []
+        bound = None
+        for key, stream_entries in response:
+            collection_id = _collection_id(key)
+            for entry_id, fields in stream_entries:
+                entries.append((entry_order(entry_id, collection_id), key, entry_id, fields))
+            if len(stream_entries) >= READ_COUNT:
+                # More entries wait in this stream, possibly older than
+                # entries read from the other streams
+                last = entry_order(stream_entries[-1][0], collection_id)
+                bound = last if bound is None else min(bound, last)
+        entries.sort(key=lambda entry: entry[0])
+        if bound is not None:
+            ready = bisect.bisect_right(entries, bound, key=lambda entry: entry[0])
+            entries, self._held = entries[:ready], entries[ready:]
+
+        acks: dict[str, list[str]] = {}
+        for _, key, entry_id, fields in entries:
+            acks.setdefault(key, []).append(entry_id)
+            # Pending entries trimmed from the stream come back without fields
+            payload = (fields or {}).get("m")
+            if not payload:
+                continue
+            self.entries_received += 1
+            try:
+                self._callback(entry_id, with_stream_id(payload, entry_id))
+            except Exception as e:
+                logger.error(f"Error in price stream callback: {e}")
+        for key, ids in acks.items():
+            self._last_ids[key] = ids[-1]
+            await redis.xack(key, self._group, *ids)
+
+    async def _refresh_streams(self, redis, cleanup: bool) -> None:
+        """Join the streams of collections that appeared since the last check."""
+        members = await redis.smembers(STREAMS_KEY)
+        for member in members:
+            key = stream_key(int(member))
+            if key in self._streams:
+                continue
+            if cleanup:
+                await self._remove_stale_groups(redis, key)
+            try:
+                await redis.xgroup_create(
+                    key, self._group, id=self._last_ids.get(key, self._start_id), mkstream=True,
+                )
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+            self._streams.add(key)
+
+    async def _remove_stale_groups(self, redis, key: str) -> None:
+        """Destroy groups of API processes that stopped consuming long ago."""
+        ttl_ms = settings.WS_STREAM_GROUP_TTL * 1000
+        cutoff = parse_id(f"{int(time.time() * 1000) - ttl_ms}-0")
+        try:
+            groups = await redis.xinfo_groups(key)
+        except Exception:
+            return  # Stream does not exist yet
+        for group in groups:
+            name = group["name"]
+            if not name.startswith(GROUP_PREFIX) or name == self._group:
+                continue
+            if parse_id(group["last-delivered-id"]) >= cutoff:
+                continue
+            consumers = await redis.xinfo_consumers(key, name)
+            if all(consumer["idle"] > ttl_ms for consumer in consumers):
+                await redis.xgroup_destroy(key, name)
+                logger.info(f"Removed stale consumer group {name} from {key}")
@@ -3,6 +3,19 @@ Redis Pub/Sub helper for broadcasting real-time updates.
 
 This module provides a unified interface for publishing price updates
 from Celery workers and subscribing to them from WebSocket connections.
+
+Publishing many updates (a sync delta) goes through publish_many() /
+publish_updates(): all PUBLISH commands are pipelined in one round-trip.
+With WS_PUBLISH_BATCHES the updates of a collection are also packed into
+"batch" messages on the all-prices and collection channels:
+
+    {"type": "batch", "collection_id": 1, "data": [<update>, ...], "timestamp": ...}
+
+where each <update> has the format of a single message. Gift channels
+always receive single messages.
+
+With WS_TRANSPORT=streams the same calls append the updates to Redis
+Streams instead (see app.core.price_stream), which clients can replay.
 """
 import asyncio
 import json
@@ -12,11 +25,13 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import AsyncGenerator, Callable, Optional, Any
+from typing import AsyncGenerator, Callable, Iterable, Optional, Any
 
 import redis.asyncio as aioredis
 
 from app.config import settings
+from app.core.clients import get_redis
+from app.core.price_stream import queue_appends
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +43,14 @@ class MessageType(str, Enum):
     LISTING_REMOVED = "listing_removed"
     COLLECTION_UPDATE = "collection_update"
     HEARTBEAT = "heartbeat"
+    BATCH = "batch"
     ERROR = "error"
 
 
+# Transports (WS_TRANSPORT)
+TRANSPORT_PUBSUB = "pubsub"
+TRANSPORT_STREAMS = "streams"
+
 # Redis channel names
 CHANNEL_ALL_PRICES = "ws:prices:all"
 CHANNEL_COLLECTION_PREFIX = "ws:prices:collection:"
@@ -52,6 +72,7 @@ class PriceUpdateMessage:
     listing_url: Optional[str] = None
     nft_address: Optional[str] = None
     nft_name: Optional[str] = None
+    gift_type: Optional[str] = None
     timestamp: Optional[str] = None
 
     def __post_init__(self):
@@ -60,6 +81,36 @@ class PriceUpdateMessage:
         if isinstance(self.type, MessageType):
             self.type = self.type.value
 
+    @classmethod
+    def from_listing(
+        cls,
+        type: MessageType,
+        collection_id: int,
+        market_slug: str,
+        listing,
+        **kwargs,
+    ) -> "PriceUpdateMessage":
+        """
+        Build a message from a listing row (a mapping with Listing
+        column names: nft_id, price_ton, market_listing_id, ...; and
+        optionally the NFT's gift_type).
+        """
+        price_raw = listing.get("price_raw")
+        kwargs.setdefault("gift_type", listing.get("gift_type"))
+        return cls(
+            type=type,
+            gift_id=listing["nft_id"],
+            collection_id=collection_id,
+            price_ton=str(listing.get("price_ton") or 0),
+            price_raw=str(price_raw) if price_raw is not None else None,
+            currency=listing.get("currency") or "TON",
+            market_slug=market_slug,
+            market_listing_id=listing.get("market_listing_id"),
+            seller_address=listing.get("seller_address"),
+            listing_url=listing.get("listing_url"),
+            **kwargs,
+        )
+
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
         return {
@@ -76,6 +127,7 @@ class PriceUpdateMessage:
                 "listing_url": self.listing_url,
                 "nft_address": self.nft_address,
                 "nft_name": self.nft_name,
+                "gift_type": self.gift_type,
             },
             "timestamp": self.timestamp,
         }
@@ -85,6 +137,101 @@ class PriceUpdateMessage:
         return json.dumps(self.to_dict())
 
 
+def message_channels(message: PriceUpdateMessage) -> list[str]:
+    """Channels a single update is published to."""
+    return [
+        CHANNEL_ALL_PRICES,
+        f"{CHANNEL_COLLECTION_PREFIX}{message.collection_id}",
+        f"{CHANNEL_GIFT_PREFIX}{message.gift_id}",
+    ]
+
+
+def build_publications(
+    messages: Iterable[PriceUpdateMessage],
+    batch: Optional[bool] = None,
+) -> list[tuple[str, str]]:
+    """
+    Encode updates into (channel, payload) pairs to PUBLISH.
+
+    Every message is encoded once. With batch=True (default:
+    WS_PUBLISH_BATCHES) the all-prices and collection channels get one
+    "batch" message per collection and up to WS_PUBLISH_BATCH_SIZE
+    updates instead of one message per update.
+    """
+    if batch is None:
+        batch = settings.WS_PUBLISH_BATCHES
+
+    publications = []
+    if not batch:
+        for message in messages:
+            payload = message.to_json()
+            publications.extend((channel, payload) for channel in message_channels(message))
+        return publications
+
+    by_collection: dict[int, list[dict]] = {}
+    for message in messages:
+        data = message.to_dict()
+        by_collection.setdefault(message.collection_id, []).append(data)
+        publications.append((f"{CHANNEL_GIFT_PREFIX}{message.gift_id}", json.dumps(data)))
+
+    timestamp = datetime.utcnow().isoformat() + "Z"
+    size = max(settings.WS_PUBLISH_BATCH_SIZE, 1)
+    for collection_id, updates in by_collection.items():
+        for start in range(0, len(updates), size):
+            payload = json.dumps({
+                "type": MessageType.BATCH.value,
+                "collection_id": collection_id,
+                "data": updates[start:start + size],
+                "timestamp": timestamp,
+            })
+            publications.append((CHANNEL_ALL_PRICES, payload))
+            publications.append((f"{CHANNEL_COLLECTION_PREFIX}{collection_id}", payload))
+    return publications
+
+
+def queue_messages(pipe, messages: list[PriceUpdateMessage], batch: Optional[bool] = None) -> None:
+    """Queue the commands delivering `messages` on a pipeline, per WS_TRANSPORT."""
+    if settings.WS_TRANSPORT == TRANSPORT_STREAMS:
+        queue_appends(pipe, messages)
+        return
+    for channel, payload in build_publications(messages, batch):
+        pipe.publish(channel, payload)
+
+
+def _delivered(messages: list, results: list) -> int:
+    """Subscribers reached (pub/sub) or entries appended (streams)."""
+    if settings.WS_TRANSPORT == TRANSPORT_STREAMS:
+        return len(messages)
+    return sum(results)
+
+
+async def publish_updates(
+    messages: list[PriceUpdateMessage],
+    batch: Optional[bool] = None,
+) -> int:
+    """
+    Publish a sync delta with the shared Redis client of the running loop.
+
+    Used by the sync paths after commit; failures are logged, not raised
+    (real-time updates are best effort, the database is the source of truth).
+
+    Returns:
+        Number of subscribers that received the messages
+        (entries appended with the streams transport)
+    """
+    if not messages:
+        return 0
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            queue_messages(pipe, messages, batch)
+            delivered = _delivered(messages, await pipe.execute())
+    except Exception as e:
+        logger.warning(f"Failed to publish {len(messages)} price updates: {e}")
+        return 0
+    logger.debug(f"Published {len(messages)} price updates ({delivered} delivered)")
+    return delivered
+
+
 class DecimalEncoder(json.JSONEncoder):
     """JSON encoder that handles Decimal types."""
     def default(self, obj):
@@ -108,6 +255,7 @@ class RedisPubSub:
         self._redis: Optional[aioredis.Redis] = None
         self._pubsub: Optional[aioredis.client.PubSub] = None
         self._subscribers: dict[str, set[Callable]] = {}
+        self._raw_callbacks: set[Callable] = set()
         self._listener_task: Optional[asyncio.Task] = None
         self._running = False
 
@@ -162,6 +310,7 @@ class RedisPubSub:
             self._redis = None
 
         self._subscribers.clear()
+        self._raw_callbacks.clear()
         logger.info("Redis pub/sub connection closed")
 
     async def publish(
@@ -182,27 +331,37 @@ class RedisPubSub:
         Returns:
             Number of subscribers that received the message
         """
+        return await self.publish_many([message], batch=False)
+
+    async def publish_many(
+        self,
+        messages: Iterable[PriceUpdateMessage],
+        batch: Optional[bool] = None,
+    ) -> int:
+        """
+        Publish many updates in one pipelined round-trip.
+
+        Args:
+            messages: The price update messages to publish
+            batch: Pack updates per collection (see build_publications)
+
+        Returns:
+            Number of subscribers that received the messages
+        """
         if self._redis is None:
             await self.connect()
 
-        json_message = message.to_json()
-        total_receivers = 0
+        messages = list(messages)
+        if not messages:
+            return 0
 
         try:
-            # Publish to all channels
-            channels = [
-                CHANNEL_ALL_PRICES,
-                f"{CHANNEL_COLLECTION_PREFIX}{message.collection_id}",
-                f"{CHANNEL_GIFT_PREFIX}{message.gift_id}",
-            ]
-
-            for channel in channels:
-                receivers = await self._redis.publish(channel, json_message)
-                total_receivers += receivers
+            async with self._redis.pipeline(transaction=False) as pipe:
+                queue_messages(pipe, messages, batch)
+                total_receivers = _delivered(messages, await pipe.execute())
 
             logger.debug(
-                f"Published {message.type} for gift {message.gift_id} "
-                f"to {total_receivers} receivers"
+                f"Published {len(messages)} messages to {total_receivers} receivers"
             )
 
         except Exception as e:
@@ -215,6 +374,7 @@ class RedisPubSub:
         self,
         channels: list[str],
         callback: Callable[[str, dict], Any],
+        raw: bool = False,
     ) -> None:
         """
         Subscribe to one or more channels.
@@ -222,6 +382,8 @@ class RedisPubSub:
         Args:
             channels: List of channel names to subscribe to
             callback: Async function called with (channel, message_dict)
+            raw: Call back with the JSON text as published instead of
+                the parsed dict (for forwarding without re-encoding)
         """
         if self._redis is None:
             await self.connect()
@@ -235,6 +397,8 @@ class RedisPubSub:
                 self._subscribers[channel] = set()
                 await self._pubsub.subscribe(channel)
             self._subscribers[channel].add(callback)
+        if raw:
+            self._raw_callbacks.add(callback)
 
         # Start listener if not running
         if not self._running:
@@ -262,6 +426,8 @@ class RedisPubSub:
                     del self._subscribers[channel]
                     if self._pubsub:
                         await self._pubsub.unsubscribe(channel)
+        if not any(callback in callbacks for callbacks in self._subscribers.values()):
+            self._raw_callbacks.discard(callback)
 
         logger.debug(f"Unsubscribed from channels: {channels}")
 
@@ -282,19 +448,25 @@ class RedisPubSub:
                     data = message.get("data")
 
                     if channel and data and channel in self._subscribers:
-                        try:
-                            parsed_data = json.loads(data)
-                        except json.JSONDecodeError:
-                            logger.warning(f"Invalid JSON in message: {data}")
-                            continue
+                        parsed_data = None
 
                         # Dispatch to all callbacks for this channel
                         for callback in list(self._subscribers.get(channel, [])):
+                            if callback in self._raw_callbacks:
+                                argument = data
+                            else:
+                                if parsed_data is None:
+                                    try:
+                                        parsed_data = json.loads(data)
+                                    except json.JSONDecodeError:
+                                        logger.warning(f"Invalid JSON in message: {data}")
+                                        break
+                                argument = parsed_data
                             try:
                                 if asyncio.iscoroutinefunction(callback):
-                                    await callback(channel, parsed_data)
+                                    await callback(channel, argument)
                                 else:
-                                    callback(channel, parsed_data)
+                                    callback(channel, argument)
                             except Exception as e:
                                 logger.error(f"Error in subscriber callback: {e}")
 
@@ -335,20 +507,30 @@ class SyncRedisPubSub:
         Returns:
             Number of subscribers that received the message
         """
-        json_message = message.to_json()
-        total_receivers = 0
+        return self.publish_many([message], batch=False)
 
-        channels = [
-            CHANNEL_ALL_PRICES,
-            f"{CHANNEL_COLLECTION_PREFIX}{message.collection_id}",
-            f"{CHANNEL_GIFT_PREFIX}{message.gift_id}",
-        ]
+    def publish_many(
+        self,
+        messages: Iterable[PriceUpdateMessage],
+        batch: Optional[bool] = None,
+    ) -> int:
+        """
+        Publish many messages in one pipelined round-trip.
 
-        for channel in channels:
-            receivers = self._redis.publish(channel, json_message)
-            total_receivers += receivers
+        Args:
+            messages: The messages to publish
+            batch: Pack updates per collection (see build_publications)
 
-        return total_receivers
+        Returns:
+            Number of subscribers that received the messages
+        """
+        messages = list(messages)
+        if not messages:
+            return 0
+
+        pipe = self._redis.pipeline(transaction=False)
+        queue_messages(pipe, messages, batch)
+        return _delivered(messages, pipe.execute())
 
     def publish_price_update(
         self,
@@ -496,3 +678,21 @@ def broadcast_listing_removed(
         market_slug=market_slug,
         **kwargs,
     )
+
+
+def broadcast_updates(
+    messages: list[PriceUpdateMessage],
+    batch: Optional[bool] = None,
+) -> int:
+    """
+    Broadcast many updates from a Celery task in one round-trip.
+
+    Usage in tasks:
+        from app.core.pubsub import broadcast_updates
+
+        broadcast_updates([
+            PriceUpdateMessage(type=MessageType.PRICE_UPDATE, gift_id=123, ...),
+            ...
+        ])
+    """
+    return get_sync_pubsub().publish_many(messages, batch=batch)
@@ -0,0 +1,303 @@
+"""
+Adaptive token-bucket rate limiting for upstream APIs.
+
+One bucket per upstream (host or API key) is shared by every adapter
+instance in the process and, when RATE_LIMIT_SHARED is on, by every
+process through Redis: the bucket state lives in a Redis hash and is
+updated atomically by a Lua script, so N Celery workers together stay
+within the provider's quota instead of each spending it alone.
+
+The bucket allows bursts of up to `burst` requests and refills at `rate`
+per second. A 429 response lowers the rate (RATE_LIMIT_BACKOFF), blocks
+the bucket for the Retry-After interval, and the rate then recovers
+linearly to the configured value over RATE_LIMIT_RECOVERY seconds.
+
+If Redis is unreachable the limiter falls back to an in-process bucket
+(same algorithm, per-process quota) and retries Redis later.
+
+Usage:
+    limiter = get_rate_limiter("getgems", settings.GETGEMS_RATE_LIMIT)
+    await limiter.acquire()
+    response = await client.get(...)
+    if response.status_code == 429:
+        await limiter.penalize(parse_retry_after(response.headers.get("Retry-After")))
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from app.config import settings
+from app.core.clients import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ratelimit:"
+
+# How long to stay on the local bucket after a Redis error
+REDIS_RETRY_INTERVAL = 30.0
+
+# KEYS[1] = bucket hash
+# ARGV = max_rate, burst, cost, recovery_ms, ttl_ms
+# Returns 0 when the tokens were taken, otherwise milliseconds to wait.
+_ACQUIRE_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local max_rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local recovery = tonumber(ARGV[4])
+
+local s = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate', 'penalized_at', 'blocked_until')
+local blocked_until = tonumber(s[5]) or 0
+if now < blocked_until then
+    return blocked_until - now
+end
+
+local rate = max_rate
+local penalized = tonumber(s[3])
+if penalized then
+    local elapsed = now - (tonumber(s[4]) or 0)
+    if recovery > 0 and elapsed < recovery then
+        rate = penalized + (max_rate - penalized) * elapsed / recovery
+    end
+end
+
+local tokens = tonumber(s[1])
+local ts = tonumber(s[2]) or now
+if tokens == nil then
+    tokens = burst
+else
+    tokens = math.min(burst, tokens + (now - ts) * rate / 1000)
+end
+
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = math.ceil((cost - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], ARGV[5])
+return wait
+"""
+
+# KEYS[1] = bucket hash
+# ARGV = max_rate, min_rate, backoff, recovery_ms, delay_ms, ttl_ms
+# Returns the lowered rate (as a string, Lua numbers are truncated).
+_PENALIZE_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local max_rate = tonumber(ARGV[1])
+local min_rate = tonumber(ARGV[2])
+local backoff = tonumber(ARGV[3])
+local recovery = tonumber(ARGV[4])
+local delay = tonumber(ARGV[5])
+
+local s = redis.call('HMGET', KEYS[1], 'rate', 'penalized_at', 'blocked_until')
+local rate = max_rate
+local penalized = tonumber(s[1])
+if penalized then
+    local elapsed = now - (tonumber(s[2]) or 0)
+    if recovery > 0 and elapsed < recovery then
+        rate = penalized + (max_rate - penalized) * elapsed / recovery
+    end
+end
+rate = math.max(min_rate, rate * backoff)
+
+local blocked_until = math.max(tonumber(s[3]) or 0, now + delay)
+redis.call('HSET', KEYS[1],
+    'rate', tostring(rate), 'penalized_at', now,
+    'blocked_until', blocked_until, 'tokens', 0, 'ts', blocked_until)
+redis.call('PEXPIRE', KEYS[1], math.max(tonumber(ARGV[6]), blocked_until - now + recovery))
+return tostring(rate)
+"""
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimiter:
+    """
+    Token bucket for one upstream, optionally shared through Redis.
+
+    Args:
+        key: Bucket name (upstream host or hashed API key)
+        rate: Sustained requests per second
+        burst: Bucket capacity; defaults to RATE_LIMIT_BURST_SECONDS of rate
+        shared: Keep the bucket in Redis; defaults to RATE_LIMIT_SHARED
+    """
+
+    def __init__(
+        self,
+        key: str,
+        rate: float,
+        burst: Optional[float] = None,
+        shared: Optional[bool] = None,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.key = key
+        self.max_rate = float(rate)
+        self.burst = float(burst) if burst else max(1.0, self.max_rate * settings.RATE_LIMIT_BURST_SECONDS)
+        self.shared = settings.RATE_LIMIT_SHARED if shared is None else shared
+        self.min_rate = self.max_rate * settings.RATE_LIMIT_MIN_FACTOR
+        self.backoff = settings.RATE_LIMIT_BACKOFF
+        self.recovery = float(settings.RATE_LIMIT_RECOVERY)
+
+        self._redis_key = f"{KEY_PREFIX}{key}"
+        self._redis_retry_at = 0.0
+
+        # Local bucket (used when not shared or Redis is down)
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._penalized_rate: Optional[float] = None
+        self._penalized_at = 0.0
+        self._blocked_until = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Current (possibly lowered) rate of the local bucket."""
+        return self._current_rate(time.monotonic())
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        """Wait until `cost` tokens are available and take them."""
+        if self._use_redis():
+            try:
+                while True:
+                    wait_ms = await self._acquire_shared(cost)
+                    if wait_ms <= 0:
+                        return
+                    await asyncio.sleep(wait_ms / 1000)
+            except Exception as e:
+                self._redis_failed(e)
+
+        wait = self._reserve_local(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def penalize(self, delay: float) -> float:
+        """
+        React to a 429: lower the rate and block the bucket for `delay`
+        seconds (normally the Retry-After value).
+
+        Returns: the lowered rate
+        """
+        now = time.monotonic()
+        rate = max(self.min_rate, self._current_rate(now) * self.backoff)
+        self._penalized_rate = rate
+        self._penalized_at = now
+        self._blocked_until = max(self._blocked_until, now + delay)
+        self._tokens = 0.0
+        self._updated_at = self._blocked_until
+
+        if self._use_redis():
+            try:
+                script = get_redis().register_script(_PENALIZE_SCRIPT)
+                rate = float(await script(
+                    keys=[self._redis_key],
+                    args=[
+                        self.max_rate, self.min_rate, self.backoff,
+                        int(self.recovery * 1000), int(delay * 1000), self._ttl_ms(),
+                    ],
+                ))
+            except Exception as e:
+                self._redis_failed(e)
+
+        logger.warning(f"Rate limited by {self.key}: pausing {delay:g}s, rate lowered to {rate:.2f}/s")
+        return rate
+
+    def _use_redis(self) -> bool:
+        return self.shared and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, error: Exception) -> None:
+        logger.warning(f"Shared rate limit for {self.key} unavailable, using local bucket: {error}")
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+
+    def _ttl_ms(self) -> int:
+        refill = self.burst / self.min_rate
+        return int((max(refill, self.recovery) + 60) * 1000)
+
+    async def _acquire_shared(self, cost: float) -> int:
+        script = get_redis().register_script(_ACQUIRE_SCRIPT)
+        return int(await script(
+            keys=[self._redis_key],
+            args=[self.max_rate, self.burst, cost, int(self.recovery * 1000), self._ttl_ms()],
+        ))
+
+    def _current_rate(self, now: float) -> float:
+        if self._penalized_rate is None:
+            return self.max_rate
+        elapsed = now - self._penalized_at
+        if self.recovery <= 0 or elapsed >= self.recovery:
+            self._penalized_rate = None
+            return self.max_rate
+        return self._penalized_rate + (self.max_rate - self._penalized_rate) * elapsed / self.recovery
+
+    def _reserve_local(self, cost: float) -> float:
+        """
+        Take tokens from the local bucket, going into debt if needed.
+
+        Callers are ordered by reservation, so concurrent waiters sleep
+        for staggered intervals instead of racing for the same token.
+        Returns the number of seconds to wait.
+        """
+        now = time.monotonic()
+        rate = self._current_rate(now)
+        start = max(now, self._blocked_until)
+
+        if start > self._updated_at:
+            self._tokens = min(self.burst, self._tokens + (start - self._updated_at) * rate)
+            self._updated_at = start
+
+        self._tokens -= cost
+        wait = start - now
+        if self._tokens < 0:
+            wait += -self._tokens / rate
+        return wait
+
+
+_limiters: dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(
+    key: str,
+    rate: float,
+    burst: Optional[float] = None,
+    api_key: Optional[str] = None,
+) -> RateLimiter:
+    """
+    Get the process-wide limiter for an upstream.
+
+    Limits of keyed APIs apply per key, so when `api_key` is given the
+    bucket is named after a hash of it (the key itself never reaches Redis).
+    """
+    if api_key:
+        key = f"{key}:{hashlib.blake2b(api_key.encode(), digest_size=8).hexdigest()}"
+
+    limiter = _limiters.get(key)
+    if limiter is None or limiter.max_rate != rate:
+        limiter = RateLimiter(key, rate, burst=burst)
+        _limiters[key] = limiter
+    return limiter
@@ -0,0 +1,417 @@
+"""
+Redis response cache for hot read endpoints.
+
+`@cached` stores the JSON-encoded result of an endpoint under a key built
+from its normalized query parameters. On top of a plain TTL cache it
+provides:
+
+* tag invalidation: an entry records the versions of its tags (always
+  ALL_TAG, plus e.g. the gift types it filters on) and is discarded once
+  any of them is bumped by a sync (see app.core.cache);
+* stale-while-revalidate: for RESPONSE_CACHE_STALE_TTL seconds after
+  the TTL an entry is still served while one background task refreshes
+  it;
+* single flight: concurrent misses for one key are computed once per
+  process (shared future) and, through a short Redis lock, once across
+  processes; other processes wait for the result up to
+  RESPONSE_CACHE_LOCK_TIMEOUT;
+* conditional requests: responses carry an ETag (hash of the key and
+  the current versions of its tags) and Last-Modified (last bump of the
+  tags, i.e. the last sync that changed them). Both are known from the
+  tag lookup alone, so a matching If-None-Match, or an If-Modified-Since
+  not older than Last-Modified, gets 304 before the cache entry is read
+  or the endpoint called, even if the entry has expired.
+
+Hit ratio and latency are counted per endpoint (cache_metrics()).
+
+Cached endpoints return a FastJSONResponse: the cached data is already
+JSON-encoded, so FastAPI does not validate it against response_model
+again.
+
+Redis is optional: on errors the endpoint is simply called.
+
+Usage:
+    @router.get("/collections")
+    @cached("collections", ttl=300, tags=lambda **params: [COLLECTIONS_TAG])
+    async def list_collections(..., session: AsyncSession = Depends(get_db_session)):
+        ...
+
+The decorator must sit below the route decorator. Endpoint arguments
+that are database sessions are not part of the key; a background
+refresh runs with a fresh session.
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.cache import ALL_TAG, KEY_PREFIX, TAG_MODIFIED_KEY, TAG_PREFIX, params_digest
+from app.core.clients import get_redis
+from app.core.database import get_async_session
+from app.core.responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_PREFIX = f"{KEY_PREFIX}resp:"
+LOCK_SUFFIX = ":lock"
+
+# Poll interval while another process computes the same key
+LOCK_POLL_INTERVAL = 0.05
+
+# Extra endpoint argument through which FastAPI passes the request
+REQUEST_ARG = "_cache_request"
+
+
+@dataclass
+class EndpointCacheStats:
+    """Per-endpoint counters of one process."""
+    hits: int = 0
+    stale: int = 0
+    misses: int = 0
+    not_modified: int = 0
+    errors: int = 0
+    refreshes: int = 0
+    hit_seconds: float = 0.0
+    miss_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        served = self.hits + self.stale
+        total = served + self.misses
+        return {
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "refreshes": self.refreshes,
+            "hit_ratio": round(served / total, 4) if total else None,
+            "avg_hit_ms": round(self.hit_seconds * 1000 / served, 2) if served else None,
+            "avg_miss_ms": round(self.miss_seconds * 1000 / self.misses, 2) if self.misses else None,
+        }
+
+
+_stats: dict[str, EndpointCacheStats] = {}
+# key -> future of the computation in progress (single flight within the process)
+_inflight: dict[str, asyncio.Future] = {}
+# Keys being refreshed in the background, and the tasks (kept referenced)
+_refreshing: set[str] = set()
+_background: set[asyncio.Task] = set()
+
+
+def cache_metrics() -> dict[str, dict]:
+    """Hit ratio and latency per cached endpoint (this process)."""
+    return {namespace: stats.to_dict() for namespace, stats in sorted(_stats.items())}
+
+
+def _default_params(kwargs: dict) -> dict:
+    """Scalar endpoint arguments, without unset (None) ones."""
+    return {
+        name: value
+        for name, value in kwargs.items()
+        if value is not None and not isinstance(value, AsyncSession)
+    }
+
+
+def cached(
+    namespace: str,
+    ttl: Optional[int] = None,
+    tags: Optional[Callable[..., list[str]]] = None,
+    key: Optional[Callable[..., Any]] = None,
+):
+    """
+    Cache an async endpoint's response in Redis.
+
+    Args:
+        namespace: Endpoint name (key prefix and metrics label)
+        ttl: Fresh lifetime in seconds; defaults to REDIS_CACHE_TTL
+        tags: Called with the endpoint arguments, returns the tags the
+            response depends on (ALL_TAG is always added)
+        key: Called with the endpoint arguments, returns normalized
+            parameters for the key; defaults to all non-None scalars
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        stats = _stats.setdefault(namespace, EndpointCacheStats())
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            request: Optional[Request] = kwargs.pop(REQUEST_ARG, None)
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return FastJSONResponse(jsonable_encoder(await func(**kwargs)))
+
+            started = time.perf_counter()
+            fresh_ttl = ttl or settings.REDIS_CACHE_TTL
+            params = key(**kwargs) if key else _default_params(kwargs)
+            cache_key = f"{RESPONSE_PREFIX}{namespace}:{params_digest(params)}"
+            entry_tags = sorted({ALL_TAG, *(tags(**kwargs) if tags else ())})
+
+            try:
+                entry, versions, modified = await _lookup(cache_key, entry_tags)
+            except Exception as e:
+                logger.warning(f"Response cache unavailable: {e}")
+                stats.errors += 1
+                return FastJSONResponse(jsonable_encoder(await func(**kwargs)))
+
+            etag = _version_etag(cache_key, versions)
+            if _not_modified(request, etag, modified):
+                stats.not_modified += 1
+                return Response(status_code=304, headers=_validators(etag, modified))
+
+            if entry is not None and entry.get("etag") == etag and entry["tags"] == versions:
+                if time.time() - entry["t"] < fresh_ttl:
+                    stats.hits += 1
+                else:
+                    stats.stale += 1
+                    _refresh_in_background(
+                        cache_key, func, kwargs, entry_tags, fresh_ttl, stats,
+                    )
+                response = _respond(entry, modified)
+                stats.hit_seconds += time.perf_counter() - started
+                return response
+
+            stats.misses += 1
+            try:
+                entry = await _single_flight(
+                    cache_key, func, kwargs, entry_tags, versions, fresh_ttl,
+                )
+                return _respond(entry, modified)
+            finally:
+                stats.miss_seconds += time.perf_counter() - started
+
+        # FastAPI passes the request through an extra keyword-only argument
+        signature = inspect.signature(func)
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter(REQUEST_ARG, inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+        ])
+        return wrapper
+
+    return decorator
+
+
+async def _lookup(
+    cache_key: str,
+    tags: list[str],
+) -> tuple[Optional[dict], dict[str, int], Optional[float]]:
+    """Entry, current tag versions and last tag bump time in one round trip."""
+    async with get_redis().pipeline(transaction=False) as pipe:
+        pipe.get(cache_key)
+        pipe.mget([f"{TAG_PREFIX}{tag}" for tag in tags])
+        pipe.hmget(TAG_MODIFIED_KEY, tags)
+        raw, raw_versions, raw_times = await pipe.execute()
+    versions = {tag: int(version or 0) for tag, version in zip(tags, raw_versions)}
+    times = [float(value) for value in raw_times if value is not None]
+    return (json.loads(raw) if raw is not None else None), versions, max(times, default=None)
+
+
+def _version_etag(cache_key: str, versions: dict[str, int]) -> str:
+    """
+    ETag of a response: its key and the versions of its tags.
+
+    A response changes only when a sync bumps one of its tags, so the ETag
+    can be checked before anything is read or computed.
+    """
+    state = json.dumps([cache_key, versions], sort_keys=True)
+    return f'W/"{hashlib.blake2b(state.encode(), digest_size=12).hexdigest()}"'
+
+
+def _validators(etag: str, modified: Optional[float]) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if modified is not None:
+        headers["Last-Modified"] = formatdate(modified, usegmt=True)
+    return headers
+
+
+def _respond(entry: dict, modified: Optional[float]) -> Response:
+    return FastJSONResponse(entry["v"], headers=_validators(entry["etag"], modified))
+
+
+def _not_modified(request: Optional[Request], etag: str, modified: Optional[float]) -> bool:
+    """
+    Whether the client's copy is current.
+
+    If-Modified-Since is only used without If-None-Match (RFC 9110).
+    """
+    if request is None:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # Last-Modified has whole seconds
+    return int(modified) <= since
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as for GET)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    strip = lambda tag: tag.strip().removeprefix("W/")
+    return strip(etag) in {strip(tag) for tag in header.split(",")}
+
+
+async def _store(cache_key: str, entry: dict, ttl: int) -> None:
+    try:
+        await get_redis().set(
+            cache_key, json.dumps(entry, default=str),
+            ex=ttl + settings.RESPONSE_CACHE_STALE_TTL,
+        )
+    except Exception as e:
+        logger.warning(f"Response cache unavailable: {e}")
+
+
+async def _compute(cache_key: str, func, kwargs: dict, versions: dict[str, int], ttl: int) -> dict:
+    """
+    Call the endpoint and store the result as a cache entry.
+
+    Tag versions are read before the call: if a sync bumps a tag while
+    the endpoint runs, the stored entry is already outdated and the next
+    lookup discards it.
+    """
+    value = jsonable_encoder(await func(**kwargs))
+    entry = {"v": value, "t": time.time(), "tags": versions, "etag": _version_etag(cache_key, versions)}
+    await _store(cache_key, entry, ttl)
+    return entry
+
+
+async def _single_flight(
+    cache_key: str,
+    func,
+    kwargs: dict,
+    tags: list[str],
+    versions: dict[str, int],
+    ttl: int,
+) -> dict:
+    """Compute a missing entry once, however many requests ask for it."""
+    future = _inflight.get(cache_key)
+    if future is not None:
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    try:
+        entry = await _compute_or_wait(cache_key, func, kwargs, tags, versions, ttl)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Nobody else may be waiting: mark the exception as retrieved
+        future.exception()
+        raise
+    else:
+        future.set_result(entry)
+        return entry
+    finally:
+        _inflight.pop(cache_key, None)
+
+
+async def _compute_or_wait(
+    cache_key: str,
+    func,
+    kwargs: dict,
+    tags: list[str],
+    versions: dict[str, int],
+    ttl: int,
+) -> dict:
+    """Compute under the Redis lock, or wait for the process holding it."""
+    redis = get_redis()
+    lock_key = cache_key + LOCK_SUFFIX
+    timeout = settings.RESPONSE_CACHE_LOCK_TIMEOUT
+    try:
+        locked = await redis.set(lock_key, 1, nx=True, px=int(timeout * 1000))
+    except Exception as e:
+        logger.warning(f"Response cache unavailable: {e}")
+        locked = True  # Compute without the lock
+
+    if not locked:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            try:
+                entry, current, _ = await _lookup(cache_key, tags)
+            except Exception:
+                break
+            if entry is not None and entry.get("etag") and entry["tags"] == current:
+                return entry
+        # The other process is slow or gone: compute it ourselves
+        return await _compute(cache_key, func, kwargs, versions, ttl)
+
+    try:
+        return await _compute(cache_key, func, kwargs, versions, ttl)
+    finally:
+        try:
+            await redis.delete(lock_key)
+        except Exception:
+            pass  # Expires on its own
+
+
+def _refresh_in_background(
+    cache_key: str,
+    func,
+    kwargs: dict,
+    tags: list[str],
+    ttl: int,
+    stats: EndpointCacheStats,
+) -> None:
+    """Start one refresh of a stale entry (per key and process)."""
+    if cache_key in _refreshing or cache_key in _inflight:
+        return
+    _refreshing.add(cache_key)
+    task = asyncio.create_task(_refresh(cache_key, func, kwargs, tags, ttl, stats))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def _refresh(
+    cache_key: str,
+    func,
+    kwargs: dict,
+    tags: list[str],
+    ttl: int,
+    stats: EndpointCacheStats,
+) -> None:
+    redis = get_redis()
+    lock_key = cache_key + LOCK_SUFFIX
+    try:
+        # Another process is already refreshing this key
+        if not await redis.set(lock_key, 1, nx=True, px=int(settings.RESPONSE_CACHE_LOCK_TIMEOUT * 1000)):
+            return
+        try:
+            _, versions, _ = await _lookup(cache_key, tags)
+            # The request's session is closed by now: use a fresh one
+            async with AsyncExitStack() as stack:
+                fresh_kwargs = {
+                    name: await stack.enter_async_context(get_async_session())
+                    if isinstance(value, AsyncSession) else value
+                    for name, value in kwargs.items()
+                }
+                await _compute(cache_key, func, fresh_kwargs, versions, ttl)
+            stats.refreshes += 1
+        finally:
+            await redis.delete(lock_key)
+    except Exception as e:
+        stats.errors += 1
+        logger.warning(f"Background refresh of {cache_key} failed: {e}")
+    finally:
+        _refreshing.discard(cache_key)
@@ -0,0 +1,42 @@
+"""
+Fast JSON responses.
+
+FastJSONResponse renders with orjson (several times faster than the
+stdlib encoder on large pages) and falls back to the standard
+JSONResponse when orjson is not installed. Decimals are written as
+strings, as Pydantic does for response models.
+
+Endpoints under the response cache (app.core.response_cache) return
+their data as a FastJSONResponse directly, which also makes FastAPI skip
+response_model validation and jsonable_encoder for them.
+"""
+import json
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when available."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            content,
+            default=_default,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
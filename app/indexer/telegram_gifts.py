@@ -10,18 +10,22 @@ because resale happens through Telegram itself.
 Requires a USER account (not a bot).
 """
 import asyncio
+import contextlib
 import logging
 from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import AsyncIterator, Callable, Optional
 
 from telethon import TelegramClient, functions, types
+from telethon.errors import FloodWaitError
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+PAGE_SIZE = 100
+
 
 def int_to_hex(n: int) -> str:
     """Convert RGB24 integer to #RRGGBB hex string."""
@@ -102,20 +106,27 @@ class TelegramGiftIndexer:
         api_id: int = None,
         api_hash: str = None,
         session_name: str = None,
+        flood_sleep_threshold: Optional[int] = None,
     ):
         self.api_id = api_id or settings.TELEGRAM_API_ID
         self.api_hash = api_hash or settings.TELEGRAM_API_HASH
         self.session_name = session_name or settings.TELEGRAM_SESSION_NAME
+        # None keeps Telethon's default (it sleeps through short flood waits itself)
+        self.flood_sleep_threshold = flood_sleep_threshold
         self.delay = settings.TELEGRAM_SYNC_DELAY
         self.stars_to_ton = Decimal(str(settings.STARS_TO_TON_RATE))
         self.client: Optional[TelegramClient] = None
 
     async def connect(self):
         """Connect to Telegram."""
+        kwargs = {}
+        if self.flood_sleep_threshold is not None:
+            kwargs['flood_sleep_threshold'] = self.flood_sleep_threshold
         self.client = TelegramClient(
             self.session_name,
             self.api_id,
             self.api_hash,
+            **kwargs,
         )
         await self.client.start()
         me = await self.client.get_me()
@@ -160,18 +171,24 @@ class TelegramGiftIndexer:
         gift_id: int,
         offset: str = '',
         limit: int = 100,
+        sort_by_price: bool = True,
     ) -> dict:
         """
         Fetch one page of resale gifts for a gift type.
 
+        Args:
+            sort_by_price: cheapest first; otherwise Telegram's default
+                order (most recently listed first)
+
         Returns dict with keys: gifts, count, next_offset, attributes.
         """
         kwargs = {
             'gift_id': gift_id,
             'offset': offset,
             'limit': limit,
-            'sort_by_price': True,
         }
+        if sort_by_price:
+            kwargs['sort_by_price'] = True
         # Get attributes on first page only
         if offset == '':
             kwargs['attributes_hash'] = 0
@@ -274,6 +291,7 @@ class TelegramGiftIndexer:
         self,
         gift_id: int,
         max_pages: int = 100,
+        sort_by_price: bool = True,
     ):
         """
         Iterate through ALL resale gifts for a gift type.
@@ -285,7 +303,7 @@ class TelegramGiftIndexer:
 
         while page < max_pages:
             page += 1
-            data = await self.get_resale_page(gift_id, offset=offset)
+            data = await self.get_resale_page(gift_id, offset=offset, sort_by_price=sort_by_price)
 
             for raw_gift in data['gifts']:
                 parsed = self._parse_unique_gift(raw_gift)
@@ -319,24 +337,280 @@ class TelegramGiftIndexer:
         """
         Fetch ALL gifts on resale across ALL gift types.
 
+        Gift types are paged concurrently by TelegramResaleCrawler over
+        this indexer's session.
+
         Returns dict: gift_type_id -> list of ParsedGift.
         """
         catalog = await self.get_catalog()
-        all_gifts = {}
+        all_gifts = {gift_type.id: [] for gift_type in catalog}
 
-        for gift_type in catalog:
-            logger.info(
-                f"[TelegramIndexer] Fetching {gift_type.title or gift_type.id} "
-                f"({gift_type.availability_resale} on resale)..."
-            )
-            gifts = await self.fetch_all_resale_gifts(
-                gift_type.id,
-                max_items=max_items_per_type,
-            )
-            all_gifts[gift_type.id] = gifts
-            logger.info(f"[TelegramIndexer] Got {len(gifts)} gifts for {gift_type.title or gift_type.id}")
-            await asyncio.sleep(self.delay)
+        crawler = TelegramResaleCrawler(indexers=[self])
+        async for gift_type, batch in crawler.crawl(
+            catalog,
+            max_pages=max_items_per_type // PAGE_SIZE + 1,
+        ):
+            gifts = all_gifts[gift_type.id]
+            gifts.extend(batch[:max_items_per_type - len(gifts)])
 
         total = sum(len(g) for g in all_gifts.values())
         logger.info(f"[TelegramIndexer] Total: {total} gifts across {len(all_gifts)} types")
         return all_gifts
+
+
+class SessionThrottled(Exception):
+    """The session got a FLOOD_WAIT longer than TELEGRAM_FLOOD_WAIT_MAX."""
+
+    def __init__(self, seconds: float):
+        super().__init__(f"FLOOD_WAIT {seconds:.0f}s")
+        self.seconds = seconds
+
+
+class FloodWaitLimiter:
+    """
+    Request gate of one MTProto session.
+
+    Caps the number of in-flight requests and, when Telegram answers
+    FLOOD_WAIT_X, pauses every request of the session for X seconds
+    instead of sleeping a fixed delay between pages. A wait longer than
+    TELEGRAM_FLOOD_WAIT_MAX raises SessionThrottled for this and every
+    later call until it expires: the session is out of the crawl.
+    """
+
+    def __init__(self, concurrency: int, max_wait: int = None):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.max_wait = settings.TELEGRAM_FLOOD_WAIT_MAX if max_wait is None else max_wait
+        self.paused_until = 0.0
+        self.flood_waits = 0
+
+    async def _wait_pause(self):
+        loop = asyncio.get_running_loop()
+        while (delay := self.paused_until - loop.time()) > 0:
+            if delay > self.max_wait:
+                raise SessionThrottled(delay)
+            await asyncio.sleep(delay)
+
+    async def call(self, func: Callable, *args, **kwargs):
+        """Run `await func(*args, **kwargs)`, retrying after FLOOD_WAIT."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wait_pause()
+            async with self._semaphore:
+                await self._wait_pause()
+                try:
+                    return await func(*args, **kwargs)
+                except FloodWaitError as e:
+                    self.flood_waits += 1
+                    self.paused_until = max(self.paused_until, loop.time() + e.seconds + 1)
+                    if e.seconds > self.max_wait:
+                        raise SessionThrottled(e.seconds) from e
+                    logger.warning(f"[TelegramCrawler] FLOOD_WAIT {e.seconds}s, pausing session")
+
+
+@dataclass
+class _CrawlTask:
+    """Progress of one gift type (handed over to another session on flood)."""
+    gift_type: CatalogGift
+    offset: str = ''
+    pages: int = 0
+    count: int = 0
+
+
+_DONE = object()
+
+
+class TelegramResaleCrawler:
+    """
+    Concurrent resale crawler over one or more MTProto sessions.
+
+    Every session runs TELEGRAM_CRAWL_CONCURRENCY workers; each worker
+    takes a gift type and pages through it. Large types are scheduled
+    first, so the crawl isn't stretched by one big type started last.
+    Pages are yielded as soon as they arrive, so the caller can stream
+    them into the DB writer while the crawl goes on.
+
+    Usage:
+        crawler = TelegramResaleCrawler()
+        await crawler.connect()
+        catalog = await crawler.get_catalog()
+        async for gift_type, gifts in crawler.crawl(catalog):
+            ...
+        await crawler.disconnect()
+    """
+
+    def __init__(
+        self,
+        session_names: Optional[list[str]] = None,
+        indexers: Optional[list[TelegramGiftIndexer]] = None,
+        concurrency: Optional[int] = None,
+    ):
+        if indexers is None:
+            names = session_names or [settings.TELEGRAM_SESSION_NAME, *settings.TELEGRAM_EXTRA_SESSIONS]
+            # Flood waits are handled by FloodWaitLimiter, not inside Telethon
+            indexers = [
+                TelegramGiftIndexer(session_name=name, flood_sleep_threshold=0)
+                for name in dict.fromkeys(names)
+            ]
+        self.indexers = indexers
+        self.concurrency = concurrency or settings.TELEGRAM_CRAWL_CONCURRENCY
+        self._limiters = {id(indexer): FloodWaitLimiter(self.concurrency) for indexer in indexers}
+
+        # Results of the last crawl()
+        self.type_counts: dict[int, int] = {}
+        self.truncated_types: list[int] = []
+        self.failed_types: list[int] = []
+
+    async def connect(self):
+        """Connect all sessions; sessions that fail to connect are skipped."""
+        connected = []
+        for indexer in self.indexers:
+            try:
+                await indexer.connect()
+                connected.append(indexer)
+            except Exception as e:
+                logger.error(f"[TelegramCrawler] Session {indexer.session_name} failed to connect: {e}")
+        if not connected:
+            raise RuntimeError("No Telegram session could connect")
+        self.indexers = connected
+
+    async def disconnect(self):
+        for indexer in self.indexers:
+            try:
+                await indexer.disconnect()
+            except Exception as e:
+                logger.warning(f"[TelegramCrawler] Error disconnecting {indexer.session_name}: {e}")
+
+    async def get_catalog(self) -> list[CatalogGift]:
+        indexer = self.indexers[0]
+        return await self._limiters[id(indexer)].call(indexer.get_catalog)
+
+    async def crawl(
+        self,
+        catalog: list[CatalogGift],
+        max_pages: int = 100,
+        sort_by_price: bool = True,
+        accept: Optional[Callable[[CatalogGift, ParsedGift], bool]] = None,
+        queue_size: int = None,
+    ) -> AsyncIterator[tuple[CatalogGift, list[ParsedGift]]]:
+        """
+        Page all gift types of `catalog` concurrently.
+
+        Args:
+            max_pages: page limit per gift type
+            sort_by_price: see TelegramGiftIndexer.get_resale_page
+            accept: called for every gift in page order; False stops the
+                gift type there (delta syncs stop at the first known gift)
+            queue_size: pages buffered ahead of the consumer
+
+        Yields:
+            (gift type, parsed gifts of one page)
+        """
+        self.type_counts = {}
+        self.truncated_types = []
+        self.failed_types = []
+
+        tasks: asyncio.Queue = asyncio.Queue()
+        for gift_type in sorted(catalog, key=lambda g: g.availability_resale or 0, reverse=True):
+            tasks.put_nowait(_CrawlTask(gift_type))
+
+        workers_total = len(self.indexers) * self.concurrency
+        pages: asyncio.Queue = asyncio.Queue(maxsize=queue_size or workers_total * 2)
+
+        async def worker(indexer: TelegramGiftIndexer):
+            limiter = self._limiters[id(indexer)]
+            while True:
+                try:
+                    task = tasks.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    await self._crawl_type(indexer, limiter, task, pages, max_pages, sort_by_price, accept)
+                except SessionThrottled as e:
+                    # The session is throttled for too long: hand the type over
+                    logger.warning(
+                        f"[TelegramCrawler] Session {indexer.session_name} throttled "
+                        f"({e}), leaving the crawl"
+                    )
+                    tasks.put_nowait(task)
+                    return
+                except Exception as e:
+                    logger.error(f"[TelegramCrawler] Gift type {task.gift_type.id} failed: {e}")
+                    self.failed_types.append(task.gift_type.id)
+
+        async def run_workers():
+            try:
+                await asyncio.gather(*[
+                    worker(indexer)
+                    for indexer in self.indexers
+                    for _ in range(self.concurrency)
+                ])
+                # Types left behind by throttled sessions
+                while not tasks.empty():
+                    self.failed_types.append(tasks.get_nowait().gift_type.id)
+            except asyncio.CancelledError:
+                # The consumer stopped early and no longer reads pages:
+                # waiting for room in a full queue would hang the cleanup
+                with contextlib.suppress(asyncio.QueueFull):
+                    pages.put_nowait(_DONE)
+                raise
+            except BaseException:
+                await pages.put(_DONE)
+                raise
+            await pages.put(_DONE)
+
+        runner = asyncio.create_task(run_workers())
+        try:
+            while (item := await pages.get()) is not _DONE:
+                yield item
+            await runner
+        finally:
+            if not runner.done():
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
+
+        if self.failed_types:
+            logger.warning(f"[TelegramCrawler] {len(self.failed_types)} gift types not crawled")
+
+    async def _crawl_type(
+        self,
+        indexer: TelegramGiftIndexer,
+        limiter: FloodWaitLimiter,
+        task: _CrawlTask,
+        pages: asyncio.Queue,
+        max_pages: int,
+        sort_by_price: bool,
+        accept: Optional[Callable[[CatalogGift, ParsedGift], bool]],
+    ) -> None:
+        gift_type = task.gift_type
+        while task.pages < max_pages:
+            data = await limiter.call(
+                indexer.get_resale_page,
+                gift_type.id,
+                offset=task.offset,
+                limit=PAGE_SIZE,
+                sort_by_price=sort_by_price,
+            )
+            task.pages += 1
+
+            batch = []
+            stopped = False
+            for raw_gift in data['gifts']:
+                parsed = indexer._parse_unique_gift(raw_gift)
+                if not parsed:
+                    continue
+                if accept is not None and not accept(gift_type, parsed):
+                    stopped = True
+                    break
+                batch.append(parsed)
+
+            if batch:
+                task.count += len(batch)
+                self.type_counts[gift_type.id] = task.count
+                await pages.put((gift_type, batch))
+
+            next_offset = data.get('next_offset')
+            if stopped or not next_offset:
+                return
+            task.offset = next_offset
+
+        self.truncated_types.append(gift_type.id)
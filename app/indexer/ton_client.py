@@ -15,11 +15,13 @@ from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional, AsyncIterator
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 
 import httpx
 
 from app.config import settings
+from app.core.clients import get_http_client
+from app.core.ratelimit import get_rate_limiter, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -95,15 +97,16 @@ class TonAPIClient:
         self.rate_limit = rate_limit or settings.TONAPI_RATE_LIMIT
         self.timeout = timeout or settings.TONAPI_TIMEOUT
 
-        # Rate limiting state
-        self._last_request_time = 0.0
-        self._request_interval = 1.0 / self.rate_limit
+        # Rate limiting: TON API quotas are per key, shared by all workers
+        self._rate_limiter = get_rate_limiter(
+            urlsplit(self.base_url).netloc, self.rate_limit, api_key=self.api_key
+        )
 
         # HTTP client (created on first use)
         self._client: Optional[httpx.AsyncClient] = None
 
     async def _get_client(self) -> httpx.AsyncClient:
-        """Get or create HTTP client."""
+        """Get the shared pooled HTTP client for the TON API host."""
         if self._client is None or self._client.is_closed:
             headers = {
                 "Accept": "application/json",
@@ -112,25 +115,12 @@ class TonAPIClient:
             if self.api_key:
                 headers["Authorization"] = f"Bearer {self.api_key}"
 
-            self._client = httpx.AsyncClient(
-                base_url=self.base_url,
-                headers=headers,
-                timeout=httpx.Timeout(self.timeout),
-            )
+            self._client = get_http_client(self.base_url, headers=headers, timeout=self.timeout)
         return self._client
 
     async def close(self):
-        """Close HTTP client."""
-        if self._client and not self._client.is_closed:
-            await self._client.aclose()
-
-    async def _rate_limit_wait(self):
-        """Wait to respect rate limit."""
-        now = asyncio.get_event_loop().time()
-        elapsed = now - self._last_request_time
-        if elapsed < self._request_interval:
-            await asyncio.sleep(self._request_interval - elapsed)
-        self._last_request_time = asyncio.get_event_loop().time()
+        """Release HTTP client (the shared pool stays open for reuse)."""
+        self._client = None
 
     async def _request(
         self,
@@ -159,11 +149,11 @@ class TonAPIClient:
 
         for attempt in range(retries):
             try:
-                await self._rate_limit_wait()
+                await self._rate_limiter.acquire()
 
                 response = await client.request(
                     method=method,
-                    url=endpoint,
+                    url=f"{self.base_url}{endpoint}",
                     params=params,
                 )
                 response.raise_for_status()
@@ -178,11 +168,11 @@ class TonAPIClient:
                     logger.error(f"Client error {status} for {endpoint}: {e.response.text}")
                     raise
 
-                # Rate limited - wait and retry
+                # Rate limited - the next acquire() waits out the pause
                 if status == 429:
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Rate limited, waiting {wait_time}s before retry")
-                    await asyncio.sleep(wait_time)
+                    await self._rate_limiter.penalize(
+                        parse_retry_after(e.response.headers.get("Retry-After"), default=2 ** attempt)
+                    )
                     continue
 
                 # Server error - retry with backoff
@@ -3,14 +3,21 @@ TON Gift Aggregator - FastAPI Application
 
 Main entry point for the REST API.
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 
 from app.config import settings
+from app.core.cache import ALL_TAG, invalidate_tags
+from app.core.clients import close_clients
+from app.core.response_cache import cache_metrics, cached
+from app.core.responses import FastJSONResponse
 from app.core.database import init_db, close_db
 from app.api.v1.gifts import router as gifts_router
 from app.api.v1.stars import router as stars_router
@@ -27,6 +34,11 @@ except Exception:
     search_router = None
     logging.getLogger(__name__).warning("Search router unavailable (Meilisearch not configured)")
 
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
 try:
     from app.api.websocket import router as websocket_router
 except Exception:
@@ -41,6 +53,21 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def _startup_sync() -> None:
+    """Синхронизация маркетов при старте приложения."""
+    logger.info("Starting data sync from markets...")
+    try:
+        from app.sync import run_sync
+        stats = await run_sync()
+        logger.info(
+            f"Sync completed: {stats.get('total', 0)} items loaded"
+            f"{' (partial)' if stats.get('partial') else ''}"
+        )
+    except Exception as e:
+        logger.error(f"Sync failed: {e}")
+        # Не падаем, продолжаем работу
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
@@ -50,26 +77,31 @@ async def lifespan(app: FastAPI):
     logger.info("Database initialized")
 
     # Запускаем синхронизацию данных при старте (если включено)
+    sync_task = None
     if settings.SYNC_ON_STARTUP:
-        logger.info("Starting data sync from markets...")
-        try:
-            from app.sync import run_sync
-            stats = await run_sync()
-            logger.info(f"Sync completed: {stats.get('total', 0)} items loaded")
-        except Exception as e:
-            logger.error(f"Sync failed: {e}")
-            # Не падаем, продолжаем работу
+        if settings.SYNC_STARTUP_BACKGROUND:
+            logger.info("Starting data sync from markets in background...")
+            sync_task = asyncio.create_task(_startup_sync())
+        else:
+            await _startup_sync()
 
     yield
 
     # Shutdown
     logger.info("Shutting down...")
+    if sync_task and not sync_task.done():
+        sync_task.cancel()
+        try:
+            await sync_task
+        except asyncio.CancelledError:
+            pass
     try:
         from app.sync import get_loader
         loader = await get_loader()
         await loader.close()
     except Exception:
         pass
+    await close_clients()
     await close_db()
     logger.info("Shutdown complete")
 
@@ -94,6 +126,7 @@ app = FastAPI(
     - Real-time updates via WebSocket
     """,
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
 )
@@ -107,6 +140,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression of large JSON responses (brotli if installed, gzip otherwise)
+if settings.RESPONSE_COMPRESSION_MIN_SIZE > 0:
+    if BrotliMiddleware:
+        app.add_middleware(
+            BrotliMiddleware,
+            minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+            gzip_fallback=True,
+        )
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE)
+
 
 # Exception handlers
 @app.exception_handler(Exception)
@@ -200,6 +244,7 @@ if websocket_router:
 
 # Markets endpoint
 @app.get("/api/v1/markets", tags=["Markets"])
+@cached("markets")
 async def list_markets():
     """List all supported markets."""
     from app.core.database import get_async_session
@@ -232,61 +277,46 @@ async def list_markets():
 # Stats endpoint
 @app.get("/api/v1/stats", tags=["Stats"])
 async def get_stats():
-    """Get platform statistics."""
-    from app.core.database import get_async_session
-    from app.models.collection import Collection
-    from app.models.nft import NFT
-    from app.models.listing import Listing
-    from sqlalchemy import select, func
-
-    async with get_async_session() as session:
-        # Total collections
-        collections_count = await session.execute(
-            select(func.count(Collection.id))
-        )
-        total_collections = collections_count.scalar() or 0
-
-        # Total NFTs
-        nfts_count = await session.execute(
-            select(func.count(NFT.id))
-        )
-        total_nfts = nfts_count.scalar() or 0
-
-        # NFTs on sale
-        on_sale_count = await session.execute(
-            select(func.count(NFT.id)).where(NFT.is_on_sale == True)
-        )
-        total_on_sale = on_sale_count.scalar() or 0
+    """
+    Get platform statistics.
 
-        # Active listings
-        listings_count = await session.execute(
-            select(func.count(Listing.id)).where(Listing.is_active == True)
-        )
-        total_listings = listings_count.scalar() or 0
+    Counters are maintained by syncs and read from Redis (totals are
+    planner estimates between exact recounts, see is_exact).
+    """
+    from app.core.platform_stats import get_platform_stats
 
-        return {
-            "total_collections": total_collections,
-            "total_gifts": total_nfts,
-            "gifts_on_sale": total_on_sale,
-            "total_listings": total_listings,
-        }
+    return await get_platform_stats()
 
 
 # =====================================
 # SYNC ENDPOINTS (БЕЗ CELERY)
 # =====================================
 
+def _ingest_stats(loader, market_slug: str) -> dict | None:
+    """Статистика пакетной записи последнего прогона маркета."""
+    stats = loader.run_stats.get(market_slug)
+    if not stats:
+        return None
+    data = stats.to_dict()
+    data["mode"] = loader.sync_modes.get(market_slug)
+    return data
+
+
 @app.post("/api/v1/admin/sync", tags=["Admin"])
-async def sync_all_markets():
+async def sync_all_markets(mode: Optional[str] = Query(None, pattern="^(full|delta)$")):
     """
     Синхронизировать данные со всех маркетов.
 
     Запускает синхронный загрузчик (без Celery).
     Загружает данные с Portals.tg и Major.tg.
+
+    mode: full — принудительный полный прогон (reconciliation),
+    delta — только новые листинги; по умолчанию выбирается по водяному знаку.
     """
-    from app.sync import run_sync
+    from app.sync import get_loader
     try:
-        stats = await run_sync()
+        loader = await get_loader()
+        stats = await loader.sync_all(mode=mode)
         return {
             "status": "completed",
             "stats": stats,
@@ -297,16 +327,20 @@ async def sync_all_markets():
 
 
 @app.post("/api/v1/admin/sync/portals", tags=["Admin"])
-async def sync_portals_market(max_items: int = 500):
+async def sync_portals_market(
+    max_items: int = 500,
+    mode: Optional[str] = Query(None, pattern="^(full|delta)$"),
+):
     """Синхронизировать только Portals.tg."""
     from app.sync import get_loader
     try:
         loader = await get_loader()
-        count = await loader.sync_portals_listings(max_items)
+        count = await loader.sync_portals_listings(max_items, mode=mode)
         return {
             "status": "completed",
             "market": "portals",
             "synced": count,
+            "ingest": _ingest_stats(loader, "portals"),
         }
     except Exception as e:
         logger.error(f"Portals sync error: {e}", exc_info=True)
@@ -324,6 +358,7 @@ async def sync_major_market(max_items: int = 500):
             "status": "completed",
             "market": "major",
             "synced": count,
+            "ingest": _ingest_stats(loader, "major"),
         }
     except Exception as e:
         logger.error(f"Major sync error: {e}", exc_info=True)
@@ -341,6 +376,7 @@ async def sync_getgems_market(max_items: int = 1000):
             "status": "completed",
             "market": "getgems",
             "synced": count,
+            "ingest": _ingest_stats(loader, "getgems"),
         }
     except Exception as e:
         logger.error(f"GetGems sync error: {e}", exc_info=True)
@@ -358,12 +394,30 @@ async def sync_fragment_market(max_items: int = 1000):
             "status": "completed",
             "market": "fragment",
             "synced": count,
+            "ingest": _ingest_stats(loader, "fragment"),
         }
     except Exception as e:
         logger.error(f"Fragment sync error: {e}", exc_info=True)
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
 
+# =====================================
+# CACHE
+# =====================================
+
+@app.get("/api/v1/admin/cache", tags=["Admin"])
+async def response_cache_metrics():
+    """Попадания в кэш ответов и задержка по эндпоинтам (этот процесс)."""
+    return {"endpoints": cache_metrics()}
+
+
+@app.post("/api/v1/admin/cache/invalidate", tags=["Admin"])
+async def invalidate_response_cache():
+    """Сбросить кэш ответов всех эндпоинтов."""
+    await invalidate_tags(ALL_TAG)
+    return {"status": "ok"}
+
+
 # =====================================
 # LEGACY CELERY ENDPOINTS (deprecated)
 # =====================================
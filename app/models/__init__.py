@@ -6,6 +6,8 @@ from app.models.nft import NFT
 from app.models.listing import Listing
 from app.models.market import Market
 from app.models.sale import Sale
+from app.models.sync_watermark import SyncWatermark
+from app.models.gift_facet import GiftFacet
 from app.models.user import User
 from app.models.referral import Referral, ReferralReward, ReferralTier
 from app.models.quest import Quest, UserQuest, Badge, UserBadge, QuestType, QuestStatus
@@ -18,6 +20,8 @@ __all__ = [
     "Listing",
     "Market",
     "Sale",
+    "SyncWatermark",
+    "GiftFacet",
     # User & Social
     "User",
     "Referral",
@@ -37,8 +37,8 @@ class Collection(Base):
     is_verified: Mapped[bool] = mapped_column(Boolean, default=False)
     is_telegram_gift: Mapped[bool] = mapped_column(Boolean, default=False)
 
-    # Raw data
-    raw_metadata: Mapped[Optional[dict]] = mapped_column(JSONB)
+    # Raw data (deferred, see NFT.raw_metadata)
+    raw_metadata: Mapped[Optional[dict]] = mapped_column(JSONB, deferred=True, deferred_raiseload=True)
 
     # Indexing state
     last_indexed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
@@ -0,0 +1,50 @@
+"""Gift facet summary model."""
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import String, Integer, Numeric, DateTime, func, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class GiftFacet(Base):
+    """
+    Precomputed facet of gifts on sale.
+
+    One row per attribute value (gift_type = '') and per gift type x
+    attribute value pair. Maintained by the sync pipeline
+    (app.sync.facets) and read by /gifts/filters instead of aggregating
+    nfts on every request.
+    """
+
+    __tablename__ = "gift_facets"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Scope: '' for all gifts, otherwise the gift type the row is limited to
+    gift_type: Mapped[str] = mapped_column(String(200), nullable=False, default="")
+    # gift_type / model / backdrop / symbol / pattern / rarity
+    dimension: Mapped[str] = mapped_column(String(20), nullable=False)
+    value: Mapped[str] = mapped_column(String(200), nullable=False)
+
+    # Aggregates over NFTs on sale
+    count_on_sale: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    floor_price_ton: Mapped[Optional[Decimal]] = mapped_column(Numeric(18, 9))
+    max_price_ton: Mapped[Optional[Decimal]] = mapped_column(Numeric(18, 9))
+    image_url: Mapped[Optional[str]] = mapped_column(String(500))
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    __table_args__ = (
+        UniqueConstraint("gift_type", "dimension", "value", name="uq_gift_facets_scope_value"),
+    )
+
+    def __repr__(self) -> str:
+        scope = self.gift_type or "*"
+        return f"<GiftFacet {scope} {self.dimension}={self.value} ({self.count_on_sale})>"
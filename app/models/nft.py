@@ -2,7 +2,9 @@
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
 
-from sqlalchemy import String, Text, Boolean, Integer, Numeric, DateTime, ForeignKey, func
+from sqlalchemy import (
+    String, Text, Boolean, Integer, SmallInteger, Numeric, DateTime, ForeignKey, Computed, Index, func, text,
+)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -13,6 +15,13 @@ if TYPE_CHECKING:
     from app.models.listing import Listing
 
 
+# Rarity order: Common < Uncommon < Rare < Epic < Legendary (unknown = 0)
+RARITY_RANKS = {"Common": 1, "Uncommon": 2, "Rare": 3, "Epic": 4, "Legendary": 5}
+_RARITY_RANK_SQL = "CASE rarity {} ELSE 0 END".format(
+    " ".join(f"WHEN '{name}' THEN {rank}" for name, rank in RARITY_RANKS.items())
+)
+
+
 class NFT(Base):
     """NFT item model."""
 
@@ -42,6 +51,8 @@ class NFT(Base):
 
     # Denormalized attributes for search
     rarity: Mapped[Optional[str]] = mapped_column(String(50), index=True)
+    # Sort key for rarity, maintained by PostgreSQL
+    rarity_rank: Mapped[int] = mapped_column(SmallInteger, Computed(_RARITY_RANK_SQL, persisted=True))
     backdrop: Mapped[Optional[str]] = mapped_column(String(100), index=True)
     model: Mapped[Optional[str]] = mapped_column(String(100), index=True)
     symbol: Mapped[Optional[str]] = mapped_column(String(100), index=True)
@@ -58,8 +69,9 @@ class NFT(Base):
     lowest_price_ton: Mapped[Optional[Numeric]] = mapped_column(Numeric(18, 9))
     lowest_price_market: Mapped[Optional[str]] = mapped_column(String(50))
 
-    # Raw data
-    raw_metadata: Mapped[Optional[dict]] = mapped_column(JSONB)
+    # Raw data (deferred: list and detail queries never need it; access
+    # without undefer() raises instead of lazy-loading on the async session)
+    raw_metadata: Mapped[Optional[dict]] = mapped_column(JSONB, deferred=True, deferred_raiseload=True)
     metadata_url: Mapped[Optional[str]] = mapped_column(String(500))
     metadata_resolved_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
 
@@ -84,5 +96,31 @@ class NFT(Base):
         lazy="dynamic",
     )
 
+    # Indexes for the /gifts query shapes: "on sale, optional gift_type,
+    # ordered by <key>, id" and ILIKE search (pg_trgm)
+    __table_args__ = (
+        Index(
+            "idx_nfts_sale_gift_type_price", "gift_type", "lowest_price_ton", "id",
+            postgresql_where=text("is_on_sale = true"),
+        ),
+        Index(
+            "idx_nfts_sale_price_id", "lowest_price_ton", "id",
+            postgresql_where=text("is_on_sale = true"),
+        ),
+        Index(
+            "idx_nfts_sale_rarity_rank", "rarity_rank", "id",
+            postgresql_where=text("is_on_sale = true"),
+        ),
+        Index("idx_nfts_created_at", text("created_at DESC NULLS LAST"), text("id DESC")),
+        Index(
+            "idx_nfts_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_nfts_gift_type_trgm", "gift_type",
+            postgresql_using="gin", postgresql_ops={"gift_type": "gin_trgm_ops"},
+        ),
+    )
+
     def __repr__(self) -> str:
         return f"<NFT {self.name} ({self.address[:8]}...)>"
@@ -0,0 +1,58 @@
+"""Sync watermark model."""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, Integer, DateTime, ForeignKey, func, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class SyncWatermark(Base):
+    """
+    Delta sync position of one market for one collection.
+
+    Records the newest data seen by the previous sync so the next
+    delta sync can stop paging as soon as it reaches known listings.
+    """
+
+    __tablename__ = "sync_watermarks"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    market_id: Mapped[int] = mapped_column(
+        ForeignKey("markets.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    collection_id: Mapped[int] = mapped_column(
+        ForeignKey("collections.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # Position: newest listed_at seen + ids at the head of each stream
+    # ({partition: [market_listing_id, ...]}, newest first)
+    last_listed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    head_listing_ids: Mapped[dict] = mapped_column(JSONB, default=dict)
+
+    # Run bookkeeping
+    last_mode: Mapped[Optional[str]] = mapped_column(String(20))
+    last_sync_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    last_full_sync_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    last_items_seen: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        onupdate=func.now(),
+    )
+
+    __table_args__ = (
+        UniqueConstraint("market_id", "collection_id", name="uq_sync_watermarks_market_collection"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SyncWatermark market={self.market_id} collection={self.collection_id} ({self.last_mode})>"
@@ -8,6 +8,8 @@ from app.sync.data_loader import (
     get_loader,
     run_sync,
 )
+from app.sync.bulk import BulkListingWriter, IngestItem, IngestStats
+from app.sync.pipeline import run_pipeline, limit_pages
 
 __all__ = [
     "SyncDataLoader",
@@ -15,4 +17,9 @@ __all__ = [
     "MajorMarketLoader",
     "get_loader",
     "run_sync",
+    "BulkListingWriter",
+    "IngestItem",
+    "IngestStats",
+    "run_pipeline",
+    "limit_pages",
 ]
@@ -0,0 +1,367 @@
+"""
+Пакетная запись листингов в БД.
+
+Общий этап для всех синхронизаций SyncDataLoader: принимает страницу
+нормализованных записей и пишет NFT и листинги несколькими
+multi-row `INSERT ... ON CONFLICT` вместо SELECT/flush на каждый элемент.
+
+Лучшая цена NFT здесь не считается — после прогона её пересчитывает
+app.sync.prices.recompute_best_prices для NFT из changed_nft_ids.
+
+На один пакет уходит 4 запроса:
+    1. SELECT существующих NFT (address IN ...)
+    2. INSERT ... ON CONFLICT (address) для NFT, RETURNING id
+    3. SELECT существующих листингов (market_listing_id IN ...)
+    4. INSERT ... ON CONFLICT (uq_listings_market_nft) для листингов
+"""
+import logging
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, Iterable
+
+from sqlalchemy import select, func, null
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.config import settings
+from app.core.pubsub import MessageType, PriceUpdateMessage
+from app.models.nft import NFT
+from app.models.listing import Listing
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestItem:
+    """Одна нормализованная запись (NFT + его листинг на маркете)."""
+    # NFT
+    nft_address: str
+    name: str
+    market_listing_id: str
+    price_ton: Decimal
+
+    gift_type: Optional[str] = None
+    index: Optional[int] = None
+    image_url: Optional[str] = None
+    model: Optional[str] = None
+    backdrop: Optional[str] = None
+    symbol: Optional[str] = None
+    pattern: Optional[str] = None
+    rarity: Optional[str] = None
+    attributes: Optional[list] = None
+    owner_address: Optional[str] = None
+    raw_metadata: Optional[dict] = None
+
+    # Listing
+    price_raw: Optional[Decimal] = None
+    currency: str = "TON"
+    seller_address: Optional[str] = None
+    listing_url: Optional[str] = None
+    listed_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+
+@dataclass
+class IngestStats:
+    """Статистика одного прогона пакетной записи."""
+    received: int = 0
+    skipped: int = 0
+    nfts_inserted: int = 0
+    nfts_updated: int = 0
+    listings_inserted: int = 0
+    listings_updated: int = 0
+    listings_unchanged: int = 0
+    listings_deactivated: int = 0
+    listings_reactivated: int = 0
+    nfts_repriced: int = 0
+    batches: int = 0
+    round_trips: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def written(self) -> int:
+        """Количество листингов, прошедших через запись."""
+        return self.listings_inserted + self.listings_updated + self.listings_unchanged
+
+    def merge(self, other: "IngestStats") -> None:
+        """Добавить статистику другого прогона."""
+        for key, value in asdict(other).items():
+            setattr(self, key, getattr(self, key) + value)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["written"] = self.written
+        data["elapsed"] = round(self.elapsed, 3)
+        return data
+
+
+class BulkListingWriter:
+    """
+    Пакетный upsert NFT и листингов одного маркета.
+
+    Usage:
+        writer = BulkListingWriter(session, market, collection_id)
+        for item in items:
+            await writer.add(item)
+        await writer.flush()
+        stats = writer.stats
+        changed = writer.changed_nft_ids  # NFT, чью цену нужно пересчитать
+
+    Args:
+        authoritative: источник считается эталонным для атрибутов NFT —
+            непустые входящие значения перезаписывают сохранённые
+            (Telegram). Иначе атрибуты только дозаполняются.
+        updates: если передан, сюда добавляются сообщения для WebSocket
+            (новые листинги и изменения цены); публикует их вызывающий
+            после commit
+    """
+
+    def __init__(
+        self,
+        session,
+        market,
+        collection_id: int,
+        batch_size: int = None,
+        authoritative: bool = False,
+        updates: Optional[list] = None,
+    ):
+        self.session = session
+        self.market_id = market.id
+        self.market_slug = market.slug
+        self.collection_id = collection_id
+        self.batch_size = batch_size or settings.SYNC_BATCH_SIZE
+        self.authoritative = authoritative
+        self.updates = updates
+        self.stats = IngestStats()
+        # NFT с новыми, изменёнными или вновь активными листингами
+        self.changed_nft_ids: set[int] = set()
+        self._buffer: list[IngestItem] = []
+
+    async def add(self, item: IngestItem) -> None:
+        """Добавить запись в буфер; пишет пакет при заполнении."""
+        self._buffer.append(item)
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def write_many(self, items: Iterable[IngestItem]) -> IngestStats:
+        """Записать все записи пакетами и вернуть статистику."""
+        for item in items:
+            await self.add(item)
+        await self.flush()
+        return self.stats
+
+    async def flush(self) -> None:
+        """Записать накопленный буфер."""
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+
+        started = time.monotonic()
+        try:
+            await self._write_batch(batch)
+        finally:
+            self.stats.batches += 1
+            self.stats.elapsed += time.monotonic() - started
+
+    async def _execute(self, stmt):
+        self.stats.round_trips += 1
+        return await self.session.execute(stmt)
+
+    # ================================================================
+    # BATCH
+    # ================================================================
+
+    async def _write_batch(self, batch: list[IngestItem]) -> None:
+        self.stats.received += len(batch)
+
+        # Дедупликация: один листинг на market_listing_id (последний побеждает),
+        # одна строка NFT на адрес — иначе ON CONFLICT упадёт на повторном
+        # изменении той же строки.
+        listings: dict[str, IngestItem] = {}
+        for item in batch:
+            if not item.nft_address or not item.market_listing_id:
+                self.stats.skipped += 1
+                continue
+            listings[item.market_listing_id] = item
+
+        nfts: dict[str, IngestItem] = {}
+        for item in listings.values():
+            nfts.setdefault(item.nft_address, item)
+
+        if not nfts:
+            return
+
+        nft_ids = await self._upsert_nfts(list(nfts.values()))
+        await self._upsert_listings(list(listings.values()), nft_ids)
+
+    async def _upsert_nfts(self, items: list[IngestItem]) -> dict[str, int]:
+        """Upsert NFT пакета. Returns: address -> id."""
+        addresses = [item.nft_address for item in items]
+
+        result = await self._execute(
+            select(NFT.address).where(NFT.address.in_(addresses))
+        )
+        existing = set(result.scalars().all())
+
+        rows = [self._nft_row(item) for item in items]
+        stmt = pg_insert(NFT).values(rows)
+        excluded = stmt.excluded
+
+        if self.authoritative:
+            # Входящие непустые значения перезаписывают сохранённые
+            prefer = lambda col: func.coalesce(getattr(excluded, col), getattr(NFT, col))
+            attributes = excluded.attributes
+        else:
+            # Только дозаполняем пустые поля
+            prefer = lambda col: func.coalesce(getattr(NFT, col), getattr(excluded, col))
+            attributes = NFT.attributes
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["address"],
+            set_={
+                "gift_type": func.coalesce(NFT.gift_type, excluded.gift_type),
+                "image_url": func.coalesce(NFT.image_url, excluded.image_url),
+                "model": prefer("model"),
+                "backdrop": prefer("backdrop"),
+                "symbol": prefer("symbol"),
+                "pattern": prefer("pattern"),
+                "rarity": prefer("rarity"),
+                "owner_address": func.coalesce(excluded.owner_address, NFT.owner_address),
+                "attributes": attributes,
+                "updated_at": func.now(),
+            },
+        ).returning(NFT.id, NFT.address)
+
+        result = await self._execute(stmt)
+        nft_ids = {row.address: row.id for row in result}
+
+        inserted = len(set(nft_ids) - existing)
+        self.stats.nfts_inserted += inserted
+        self.stats.nfts_updated += len(nft_ids) - inserted
+        return nft_ids
+
+    async def _upsert_listings(
+        self,
+        items: list[IngestItem],
+        nft_ids: dict[str, int],
+    ) -> None:
+        """Upsert листингов пакета."""
+        listing_ids = [item.market_listing_id for item in items]
+
+        result = await self._execute(
+            select(
+                Listing.market_listing_id,
+                Listing.price_raw,
+                Listing.price_ton,
+                Listing.currency,
+                Listing.seller_address,
+                Listing.is_active,
+            ).where(
+                Listing.market_id == self.market_id,
+                Listing.market_listing_id.in_(listing_ids),
+            )
+        )
+        existing = {row.market_listing_id: row for row in result}
+
+        now = datetime.utcnow()
+        rows = []
+        for item in items:
+            nft_id = nft_ids.get(item.nft_address)
+            if nft_id is None:
+                self.stats.skipped += 1
+                continue
+
+            row = {
+                "nft_id": nft_id,
+                "market_id": self.market_id,
+                "market_listing_id": item.market_listing_id,
+                "price_raw": item.price_raw if item.price_raw is not None else item.price_ton,
+                "currency": item.currency or "TON",
+                "price_ton": item.price_ton,
+                "seller_address": item.seller_address,
+                "listing_url": item.listing_url,
+                "is_active": True,
+                "listed_at": item.listed_at,
+                "expires_at": item.expires_at,
+                "last_seen_at": now,
+            }
+            rows.append(row)
+
+            current = existing.get(item.market_listing_id)
+            if current is None:
+                self.stats.listings_inserted += 1
+                self.changed_nft_ids.add(nft_id)
+                self._add_update(MessageType.NEW_LISTING, row, item)
+            elif _listing_changed(current, row):
+                self.stats.listings_updated += 1
+                self.changed_nft_ids.add(nft_id)
+                if not current.is_active:
+                    self.stats.listings_reactivated += 1
+                    self._add_update(MessageType.NEW_LISTING, row, item)
+                elif current.price_ton != row["price_ton"]:
+                    self._add_update(MessageType.PRICE_UPDATE, row, item)
+            else:
+                self.stats.listings_unchanged += 1
+
+        if not rows:
+            return
+
+        stmt = pg_insert(Listing).values(rows)
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_listings_market_nft",
+            set_={
+                "price_raw": excluded.price_raw,
+                "price_ton": excluded.price_ton,
+                "currency": excluded.currency,
+                "seller_address": func.coalesce(excluded.seller_address, Listing.seller_address),
+                "is_active": True,
+                "last_seen_at": excluded.last_seen_at,
+                "updated_at": func.now(),
+            },
+        )
+        await self._execute(stmt)
+
+    def _add_update(self, message_type: MessageType, row: dict, item: IngestItem) -> None:
+        if self.updates is None:
+            return
+        self.updates.append(PriceUpdateMessage.from_listing(
+            message_type, self.collection_id, self.market_slug, row,
+            nft_address=item.nft_address,
+            nft_name=item.name,
+            gift_type=item.gift_type,
+        ))
+
+    def _nft_row(self, item: IngestItem) -> dict:
+        return {
+            "address": item.nft_address,
+            "collection_id": self.collection_id,
+            "index": item.index,
+            "name": item.name,
+            "gift_type": item.gift_type,
+            "image_url": item.image_url or None,
+            "model": item.model,
+            "backdrop": item.backdrop,
+            "symbol": item.symbol,
+            "pattern": item.pattern,
+            "rarity": item.rarity,
+            "attributes": item.attributes if item.attributes is not None else [],
+            "owner_address": item.owner_address,
+            "raw_metadata": item.raw_metadata if item.raw_metadata is not None else null(),
+        }
+
+
+# ================================================================
+# HELPERS
+# ================================================================
+
+def _listing_changed(current, row: dict) -> bool:
+    """Изменился ли листинг относительно сохранённой строки."""
+    return (
+        not current.is_active
+        or current.price_ton != row["price_ton"]
+        or current.price_raw != row["price_raw"]
+        or current.currency != row["currency"]
+        or (row["seller_address"] is not None and current.seller_address != row["seller_address"])
+    )
@@ -5,24 +5,45 @@
 и по API-триггеру.
 """
 import asyncio
+import functools
 import logging
 import re
+import time
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
 import httpx
 
+from app.config import settings
+from app.core.cache import bump_sync_generation
+from app.core.platform_stats import refresh_platform_stats
+from app.core.pubsub import MessageType, PriceUpdateMessage, publish_updates
 from app.core.database import get_async_session
 from app.models.collection import Collection
-from app.models.nft import NFT
-from app.models.listing import Listing
 from app.models.market import Market
+from app.sync.bulk import BulkListingWriter, IngestItem, IngestStats
+from app.sync.facets import refresh_gift_facets
+from app.sync.pipeline import run_pipeline, limit_pages
+from app.sync.prices import recompute_best_prices
+from app.sync.watermark import (
+    DeltaSync,
+    MODE_FULL,
+    choose_mode,
+    deactivate_unseen,
+    load_watermark,
+)
 from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 logger = logging.getLogger(__name__)
 
+# Коллекция, в которую маркеты пишут все гифты
+DEFAULT_COLLECTION = {
+    "address": "telegram-gifts",
+    "name": "Telegram Gifts",
+    "slug": "telegram-gifts",
+}
+
 
 def extract_gift_type(name: str) -> str:
     """
@@ -43,6 +64,25 @@ def extract_gift_type(name: str) -> str:
     return cleaned
 
 
+class _Throttle:
+    """
+    Минимальный интервал между запросами.
+
+    В отличие от фиксированного sleep после каждой страницы, ждёт только
+    остаток интервала — время на парсинг/запись страницы засчитывается.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last = 0.0
+
+    async def wait(self):
+        delay = self._last + self.interval - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._last = time.monotonic()
+
+
 class PortalsMarketLoader:
     """
     Загрузчик данных с Portals.tg API.
@@ -58,6 +98,7 @@ class PortalsMarketLoader:
     API_BASE = "https://portal-market.com/api"
     MARKET_SLUG = "portals"
     MARKET_NAME = "Portals.tg"
+    PAGE_INTERVAL = 0.5  # Минимальный интервал между запросами страниц (seconds)
 
     def __init__(self):
         self.client = httpx.AsyncClient(
@@ -112,30 +153,47 @@ class PortalsMarketLoader:
             return response.json()
         except Exception as e:
             logger.error(f"[PortalsLoader] Ошибка загрузки: {e}")
-            return {"results": []}
+            return {"results": [], "error": str(e)}
 
-    async def fetch_all_listings(self, max_items: int = 1000) -> list[dict]:
-        """Загрузить все листинги с пагинацией."""
-        all_listings = []
+    async def iter_pages(self, max_items: int = 1000, limit: int = 50) -> AsyncIterator[list[dict]]:
+        """
+        Постранично отдавать листинги (от новых к старым), не накапливая
+        их в памяти.
+
+        Raises:
+            RuntimeError: страница не загрузилась — поток оборван
+        """
         offset = 0
-        limit = 50
+        loaded = 0
+        throttle = _Throttle(self.PAGE_INTERVAL)
 
-        while len(all_listings) < max_items:
+        while loaded < max_items:
+            # Небольшая пауза между запросами чтобы не нагружать API
+            await throttle.wait()
             data = await self.fetch_listings(offset=offset, limit=limit)
+            if data.get("error"):
+                raise RuntimeError(f"Portals offset={offset}: {data['error']}")
             results = data.get("results", [])
 
             if not results:
                 break
 
-            all_listings.extend(results)
+            results = results[:max_items - loaded]
+            loaded += len(results)
             offset += limit
 
-            logger.info(f"[PortalsLoader] Загружено {len(all_listings)} листингов")
+            logger.info(f"[PortalsLoader] Загружено {loaded} листингов")
+            yield results
 
-            # Небольшая пауза чтобы не нагружать API
-            await asyncio.sleep(0.5)
-
-        return all_listings[:max_items]
+    async def fetch_all_listings(self, max_items: int = 1000) -> list[dict]:
+        """Загрузить все листинги с пагинацией."""
+        all_listings = []
+        try:
+            async for page in self.iter_pages(max_items):
+                all_listings.extend(page)
+        except RuntimeError:
+            pass  # Ошибка уже в логе, отдаём то, что успели загрузить
+        return all_listings
 
 
 class MajorMarketLoader:
@@ -151,6 +209,7 @@ class MajorMarketLoader:
     API_BASE = "https://major.tg/api/v1"
     MARKET_SLUG = "major"
     MARKET_NAME = "Major.tg"
+    PAGE_INTERVAL = 0.3
 
     def __init__(self):
         self.client = httpx.AsyncClient(
@@ -204,29 +263,45 @@ class MajorMarketLoader:
             return response.json()
         except Exception as e:
             logger.error(f"[MajorLoader] Ошибка загрузки: {e}")
-            return {"items": []}
+            return {"items": [], "error": str(e)}
 
-    async def fetch_all_listings(self, max_items: int = 500) -> list[dict]:
-        """Загрузить все листинги с пагинацией."""
-        all_listings = []
+    async def iter_pages(self, max_items: int = 500, limit: int = 30) -> AsyncIterator[list[dict]]:
+        """
+        Постранично отдавать листинги, не накапливая их в памяти.
+
+        Raises:
+            RuntimeError: страница не загрузилась — поток оборван
+        """
         offset = 0
-        limit = 30
+        loaded = 0
+        throttle = _Throttle(self.PAGE_INTERVAL)
 
-        while len(all_listings) < max_items:
+        while loaded < max_items:
+            await throttle.wait()
             data = await self.fetch_listings(offset=offset, limit=limit)
+            if data.get("error"):
+                raise RuntimeError(f"Major offset={offset}: {data['error']}")
             items = data.get("items", [])
 
             if not items:
                 break
 
-            all_listings.extend(items)
+            items = items[:max_items - loaded]
+            loaded += len(items)
             offset += limit
 
-            logger.info(f"[MajorLoader] Загружено {len(all_listings)} листингов")
+            logger.info(f"[MajorLoader] Загружено {loaded} листингов")
+            yield items
 
-            await asyncio.sleep(0.3)
-
-        return all_listings[:max_items]
+    async def fetch_all_listings(self, max_items: int = 500) -> list[dict]:
+        """Загрузить все листинги с пагинацией."""
+        all_listings = []
+        try:
+            async for page in self.iter_pages(max_items):
+                all_listings.extend(page)
+        except RuntimeError:
+            pass  # Ошибка уже в логе, отдаём то, что успели загрузить
+        return all_listings
 
 
 class SyncDataLoader:
@@ -240,7 +315,17 @@ class SyncDataLoader:
         self.portals_loader = PortalsMarketLoader()
         self.major_loader = MajorMarketLoader()
         self._adapters = []
-        self._telegram_indexer = None
+        self._telegram_crawler = None
+        # Статистика пакетной записи последнего прогона по маркетам
+        self.run_stats: dict[str, IngestStats] = {}
+        # Режим последнего прогона по маркетам (full / delta)
+        self.sync_modes: dict[str, str] = {}
+        # Что изменил прогон маркета: (id коллекции, типы гифтов) — для тегов кэша
+        self._changed_scope: dict[str, tuple[int, set[str]]] = {}
+        # Сообщения для WebSocket, публикуемые после commit прогона маркета
+        self._pending_updates: dict[str, list[PriceUpdateMessage]] = {}
+        # Не даём двум полным синхронизациям идти одновременно
+        self._sync_lock = asyncio.Lock()
 
     async def close(self):
         await self.portals_loader.close()
@@ -250,9 +335,9 @@ class SyncDataLoader:
                 await adapter.close()
             except Exception:
                 pass
-        if self._telegram_indexer:
+        if self._telegram_crawler:
             try:
-                await self._telegram_indexer.disconnect()
+                await self._telegram_crawler.disconnect()
             except Exception:
                 pass
 
@@ -303,249 +388,371 @@ class SyncDataLoader:
 
         return collection
 
-    async def sync_portals_listings(self, max_items: int = 500) -> int:
-        """
-        Синхронизировать листинги с Portals.tg.
+    async def _ensure_default_targets(self, session, slug: str, name: str, url: str):
+        """Маркет + дефолтная коллекция для гифтов."""
+        market = await self.ensure_market_exists(session, slug=slug, name=name, url=url)
+        collection = await self.ensure_collection_exists(session, **DEFAULT_COLLECTION)
+        return market, collection
 
-        Returns: количество добавленных/обновлённых записей
+    async def _ensure_shared_targets(self) -> None:
         """
-        logger.info("[SyncLoader] Начинаю синхронизацию с Portals.tg...")
+        Создать общую коллекцию гифтов отдельной закоммиченной транзакцией.
 
-        listings = await self.portals_loader.fetch_all_listings(max_items)
+        Маркеты синхронизируются параллельно, каждый в своей транзакции.
+        Если коллекцию создаёт каждый маркет сам, на пустой БД их INSERT
+        ждут друг друга на уникальном address, а после коммита первого
+        остальные падают с IntegrityError.
+        """
+        try:
+            async with get_async_session() as session:
+                await self.ensure_collection_exists(session, **DEFAULT_COLLECTION)
+                await session.commit()
+        except Exception as e:
+            # Маркеты попробуют сами и сообщат ошибку в своих отчётах
+            logger.error(f"[SyncLoader] Не удалось создать коллекцию гифтов: {e}")
+
+    async def _record_stats(self, market_slug: str, stats: IngestStats) -> None:
+        self.run_stats[market_slug] = stats
+        # Кэш фасетов и ответов по изменённым коллекции и типам гифтов устарел
+        scope = self._changed_scope.pop(market_slug, None)
+        updates = self._pending_updates.pop(market_slug, None)
+        if stats.written or stats.listings_deactivated or stats.nfts_repriced:
+            if scope is None:
+                await bump_sync_generation()
+            else:
+                collection_id, gift_types = scope
+                await bump_sync_generation(collection_ids=[collection_id], gift_types=gift_types)
+            await refresh_platform_stats(
+                listings_delta=stats.listings_inserted + stats.listings_reactivated - stats.listings_deactivated,
+            )
+        if updates:
+            await publish_updates(updates)
+        logger.info(
+            f"[SyncLoader] {market_slug} ({self.sync_modes.get(market_slug, MODE_FULL)}): "
+            f"+{stats.listings_inserted} ~{stats.listings_updated} "
+            f"={stats.listings_unchanged} -{stats.listings_deactivated} листингов, "
+            f"{stats.round_trips} запросов к БД за {stats.elapsed:.2f}s"
+        )
 
-        if not listings:
-            logger.warning("[SyncLoader] Нет данных с Portals.tg")
-            return 0
+    async def _start_delta(
+        self,
+        session,
+        market: Market,
+        collection: Collection,
+        mode: Optional[str],
+        supports_delta: bool,
+        heads_in_full: bool = True,
+    ) -> DeltaSync:
+        """
+        Загрузить водяной знак и выбрать режим прогона.
 
-        count = 0
+        Args:
+            heads_in_full: полный прогон идёт в том же порядке (по новизне),
+                что и delta, и его голову можно запомнить
+        """
+        watermark = await load_watermark(session, market.id, collection.id)
+        mode = choose_mode(watermark, mode, supports_delta)
+        delta = DeltaSync(
+            watermark,
+            mode,
+            track_heads=supports_delta and (heads_in_full or mode != MODE_FULL),
+        )
+        self.sync_modes[market.slug] = delta.mode
+        logger.info(f"[SyncLoader] {market.slug}: режим {delta.mode}")
+        return delta
 
-        async with get_async_session() as session:
-            # Создаём маркет
-            market = await self.ensure_market_exists(
-                session,
-                slug="portals",
-                name="Portals.tg",
-                url="https://portals.tg",
+    async def _finish_delta(
+        self,
+        session,
+        delta: DeltaSync,
+        market: Market,
+        collection: Collection,
+        stats: IngestStats,
+        exhausted: bool,
+        nft_ids: set[int],
+        updates: Optional[list] = None,
+    ) -> None:
+        """
+        Закрыть прогон: полный прогон, прошедший источник до конца,
+        снимает с продажи невстреченные листинги; лучшие цены и фасеты
+        NFT, чьи листинги изменились, пересчитываются; водяной знак
+        сдвигается.
+
+        Args:
+            nft_ids: NFT с новыми и изменёнными листингами
+                (BulkListingWriter.changed_nft_ids); дополняются NFT
+                снятых листингов
+            updates: сообщения для WebSocket, собранные BulkListingWriter;
+                дополняются снятыми листингами и публикуются в _record_stats
+        """
+        nft_ids = set(nft_ids)
+        if delta.mode == MODE_FULL and delta.complete and exhausted:
+            removed = []
+            stats.listings_deactivated += await deactivate_unseen(
+                session, market.id, collection.id, delta.started_at, removed=removed,
             )
+            nft_ids.update(row.nft_id for row in removed)
+            if updates is not None:
+                for row in removed:
+                    updates.append(PriceUpdateMessage.from_listing(
+                        MessageType.LISTING_REMOVED, collection.id, market.slug, row._mapping,
+                    ))
+        changed: set[int] = set()
+        repriced, cleared = await recompute_best_prices(session, nft_ids=nft_ids, changed=changed)
+        stats.nfts_repriced += repriced + cleared
+        stats.round_trips += 2
+        gift_types: set[str] = set()
+        if changed:
+            await refresh_gift_facets(session, changed, gift_types=gift_types)
+            stats.round_trips += 4
+        self._changed_scope[market.slug] = (collection.id, gift_types)
+        if updates is not None:
+            self._pending_updates[market.slug] = updates
+        delta.commit(items_seen=stats.received)
+
+    @staticmethod
+    def _portals_key(item: dict) -> tuple[str, Optional[datetime]]:
+        listed_at = item.get("listed_at")
+        return (
+            item.get("id", item.get("tg_id", "")),
+            datetime.fromisoformat(listed_at.replace("Z", "+00:00")) if listed_at else None,
+        )
 
-            # Создаём дефолтную коллекцию для гифтов
-            collection = await self.ensure_collection_exists(
-                session,
-                address="telegram-gifts",
-                name="Telegram Gifts",
-                slug="telegram-gifts",
-            )
+    @staticmethod
+    def _major_key(item: dict) -> tuple[str, Optional[datetime]]:
+        return item.get("address") or item.get("slug", ""), None
+
+    @staticmethod
+    def _normalized_listing_key(nl) -> tuple[str, Optional[datetime]]:
+        return nl.market_listing_id or nl.nft_address, nl.listed_at
+
+    def _parse_portals_item(self, item: dict) -> IngestItem:
+        tg_id = item.get("tg_id", "")
+        name = item.get("name", "Unknown")
+        price = Decimal(str(item.get("price", "0")))
+        listed_at = item.get("listed_at")
+
+        # Атрибуты
+        attributes = item.get("attributes", [])
+        model = None
+        backdrop = None
+        symbol = None
+
+        for attr in attributes:
+            attr_type = attr.get("type", "")
+            attr_value = attr.get("value", "")
+            if attr_type == "model":
+                model = attr_value
+            elif attr_type == "backdrop":
+                backdrop = attr_value
+            elif attr_type == "symbol":
+                symbol = attr_value
+
+        return IngestItem(
+            nft_address=f"portals-{tg_id}",
+            name=name,
+            gift_type=extract_gift_type(name),
+            image_url=item.get("photo_url", ""),
+            model=model,
+            backdrop=backdrop,
+            symbol=symbol,
+            attributes=attributes,
+            market_listing_id=item.get("id", tg_id),
+            price_raw=price,
+            price_ton=price,
+            listing_url=f"https://portals.tg/nft/{tg_id}",
+            listed_at=datetime.fromisoformat(listed_at.replace("Z", "+00:00")) if listed_at else None,
+        )
 
-            for item in listings:
-                try:
-                    # Парсим данные
-                    tg_id = item.get("tg_id", "")
-                    name = item.get("name", "Unknown")
-                    photo_url = item.get("photo_url", "")
-                    price = Decimal(str(item.get("price", "0")))
-                    floor_price = Decimal(str(item.get("floor_price", "0")))
-                    listed_at = item.get("listed_at")
-                    market_listing_id = item.get("id", tg_id)
-
-                    # Атрибуты
-                    attributes = item.get("attributes", [])
-                    model = None
-                    backdrop = None
-                    symbol = None
-
-                    for attr in attributes:
-                        attr_type = attr.get("type", "")
-                        attr_value = attr.get("value", "")
-                        if attr_type == "model":
-                            model = attr_value
-                        elif attr_type == "backdrop":
-                            backdrop = attr_value
-                        elif attr_type == "symbol":
-                            symbol = attr_value
-
-                    # Создаём или обновляем NFT
-                    nft_address = f"portals-{tg_id}"
-
-                    result = await session.execute(
-                        select(NFT).where(NFT.address == nft_address)
-                    )
-                    nft = result.scalar_one_or_none()
-
-                    gift_type = extract_gift_type(name)
-
-                    if not nft:
-                        nft = NFT(
-                            address=nft_address,
-                            collection_id=collection.id,
-                            name=name,
-                            gift_type=gift_type,
-                            image_url=photo_url,
-                            model=model,
-                            backdrop=backdrop,
-                            symbol=symbol,
-                            attributes=attributes,
-                            is_on_sale=True,
-                            lowest_price_ton=price,
-                            lowest_price_market="portals",
-                        )
-                        session.add(nft)
-                        await session.flush()
-                    else:
-                        nft.is_on_sale = True
-                        nft.lowest_price_ton = min(nft.lowest_price_ton or price, price)
-                        if gift_type and not nft.gift_type:
-                            nft.gift_type = gift_type
-
-                    # Создаём или обновляем листинг
-                    result = await session.execute(
-                        select(Listing).where(
-                            Listing.market_id == market.id,
-                            Listing.market_listing_id == market_listing_id,
-                        )
-                    )
-                    listing = result.scalar_one_or_none()
-
-                    if not listing:
-                        listing = Listing(
-                            nft_id=nft.id,
-                            market_id=market.id,
-                            market_listing_id=market_listing_id,
-                            price_raw=price,
-                            currency="TON",
-                            price_ton=price,
-                            listing_url=f"https://portals.tg/nft/{tg_id}",
-                            is_active=True,
-                            listed_at=datetime.fromisoformat(listed_at.replace("Z", "+00:00")) if listed_at else None,
-                            last_seen_at=datetime.utcnow(),
-                        )
-                        session.add(listing)
-                    else:
-                        listing.price_raw = price
-                        listing.price_ton = price
-                        listing.is_active = True
-                        listing.last_seen_at = datetime.utcnow()
-
-                    count += 1
-
-                except Exception as e:
-                    logger.error(f"[SyncLoader] Ошибка обработки: {e}")
-                    continue
+    def _parse_major_item(self, item: dict) -> IngestItem:
+        address = item.get("address", "")
+        name = item.get("name", "Unknown")
+        slug = item.get("slug", "")
+        min_bid = Decimal(str(item.get("min_bid", 0)))
+
+        return IngestItem(
+            nft_address=f"major-{address}" if address else f"major-{slug}",
+            name=name,
+            gift_type=extract_gift_type(name),
+            image_url=item.get("image", ""),
+            market_listing_id=address or slug,
+            price_raw=min_bid,
+            price_ton=min_bid,
+            listing_url=f"https://major.tg/nft/{slug}",
+        )
 
-            await session.commit()
+    def _parse_normalized_listing(self, nl) -> Optional[IngestItem]:
+        if not nl.nft_address:
+            return None
+
+        extra = nl.extra or {}
+        name = extra.get("name") or "Unknown"
+        attributes = extra.get("attributes") or []
+
+        # Парсим атрибуты (model, backdrop, symbol)
+        model = None
+        backdrop = None
+        symbol = None
+        if isinstance(attributes, list):
+            for attr in attributes:
+                if isinstance(attr, dict):
+                    attr_name = attr.get("trait_type", attr.get("type", ""))
+                    attr_value = attr.get("value", "")
+                    if attr_name.lower() == "model":
+                        model = attr_value
+                    elif attr_name.lower() == "backdrop":
+                        backdrop = attr_value
+                    elif attr_name.lower() == "symbol":
+                        symbol = attr_value
+
+        return IngestItem(
+            nft_address=nl.nft_address,
+            name=name,
+            gift_type=extract_gift_type(name),
+            image_url=extra.get("image_url") or None,
+            model=model,
+            backdrop=backdrop,
+            symbol=symbol,
+            market_listing_id=nl.market_listing_id or nl.nft_address,
+            price_raw=nl.price_ton,
+            currency=nl.currency or "TON",
+            price_ton=nl.price_ton,
+            seller_address=nl.seller_address,
+            listing_url=nl.listing_url,
+            listed_at=nl.listed_at,
+        )
 
-        logger.info(f"[SyncLoader] Синхронизировано {count} листингов с Portals.tg")
-        return count
+    def _parse_telegram_gift(self, gift) -> IngestItem:
+        # NFT address: используем slug (уникальный) или gift_address (TON)
+        nft_address = gift.gift_address or f"tg-{gift.slug}"
+
+        price_ton = gift.price_ton or Decimal("0")
+        price_stars = gift.price_stars or 0
+
+        # Определяем rarity по самому редкому атрибуту
+        rarity = None
+        rarities = [
+            r for r in [gift.model_rarity, gift.pattern_rarity, gift.backdrop_rarity]
+            if r is not None
+        ]
+        if rarities:
+            min_rarity = min(rarities)
+            if min_rarity <= 10:
+                rarity = "Legendary"
+            elif min_rarity <= 50:
+                rarity = "Epic"
+            elif min_rarity <= 150:
+                rarity = "Rare"
+            elif min_rarity <= 350:
+                rarity = "Uncommon"
+            else:
+                rarity = "Common"
+
+        return IngestItem(
+            nft_address=nft_address,
+            index=gift.num,
+            name=f"{gift.title} #{gift.num}",
+            gift_type=gift.title,  # Already base name like "Snoop Dogg"
+            image_url=f"https://t.me/nft/{gift.slug}",
+            model=gift.model_name,
+            backdrop=gift.backdrop_name,
+            pattern=gift.pattern_name,
+            rarity=rarity,
+            attributes=gift.attributes_raw or [],
+            owner_address=gift.owner_address,
+            raw_metadata={
+                'unique_id': gift.unique_id,
+                'gift_id': gift.gift_id,
+                'slug': gift.slug,
+                'num': gift.num,
+                'price_stars': price_stars,
+                'availability_issued': gift.availability_issued,
+                'availability_total': gift.availability_total,
+            },
+            market_listing_id=gift.slug,
+            price_raw=Decimal(str(price_stars)),
+            currency="STARS",
+            price_ton=price_ton,
+            listing_url=f"https://t.me/nft/{gift.slug}",
+        )
 
-    async def sync_major_listings(self, max_items: int = 500) -> int:
+    async def sync_portals_listings(self, max_items: int = 500, mode: Optional[str] = None) -> int:
         """
-        Синхронизировать листинги с Major.tg.
+        Синхронизировать листинги с Portals.tg.
+
+        Portals отдаёт листинги по listed_at desc, поэтому поддерживает
+        delta-режим: листаем только до уже известных листингов.
+
+        Args:
+            max_items: максимум листингов за прогон
+            mode: "full" / "delta" (по умолчанию выбирается по водяному знаку)
 
         Returns: количество добавленных/обновлённых записей
         """
-        logger.info("[SyncLoader] Начинаю синхронизацию с Major.tg...")
+        logger.info("[SyncLoader] Начинаю синхронизацию с Portals.tg...")
 
-        listings = await self.major_loader.fetch_all_listings(max_items)
+        async with get_async_session() as session:
+            market, collection = await self._ensure_default_targets(
+                session, slug="portals", name="Portals.tg", url="https://portals.tg",
+            )
+            delta = await self._start_delta(session, market, collection, mode, supports_delta=True)
+            updates = []
+            writer = BulkListingWriter(session, market, collection.id, updates=updates)
+            stats = await run_pipeline(
+                delta.track(self.portals_loader.iter_pages(max_items), self._portals_key),
+                self._parse_portals_item,
+                writer,
+                name="Portals",
+            )
+            await self._finish_delta(
+                session, delta, market, collection, stats, exhausted=stats.received < max_items,
+                nft_ids=writer.changed_nft_ids, updates=updates,
+            )
+            await session.commit()
 
-        if not listings:
-            logger.warning("[SyncLoader] Нет данных с Major.tg")
-            return 0
+        if not stats.received:
+            logger.warning("[SyncLoader] Нет данных с Portals.tg")
 
-        count = 0
+        await self._record_stats("portals", stats)
+        logger.info(f"[SyncLoader] Синхронизировано {stats.written} листингов с Portals.tg")
+        return stats.written
 
-        async with get_async_session() as session:
-            # Создаём маркет
-            market = await self.ensure_market_exists(
-                session,
-                slug="major",
-                name="Major.tg",
-                url="https://major.tg",
-            )
+    async def sync_major_listings(self, max_items: int = 500, mode: Optional[str] = None) -> int:
+        """
+        Синхронизировать листинги с Major.tg.
 
-            # Создаём дефолтную коллекцию
-            collection = await self.ensure_collection_exists(
-                session,
-                address="telegram-gifts",
-                name="Telegram Gifts",
-                slug="telegram-gifts",
-            )
+        Major сортирует по цене, delta-режим не поддерживается — каждый
+        прогон полный.
 
-            for item in listings:
-                try:
-                    address = item.get("address", "")
-                    name = item.get("name", "Unknown")
-                    slug = item.get("slug", "")
-                    image = item.get("image", "")
-                    min_bid = Decimal(str(item.get("min_bid", 0)))
-
-                    # Создаём или обновляем NFT
-                    nft_address = f"major-{address}" if address else f"major-{slug}"
-                    gift_type = extract_gift_type(name)
-
-                    result = await session.execute(
-                        select(NFT).where(NFT.address == nft_address)
-                    )
-                    nft = result.scalar_one_or_none()
-
-                    if not nft:
-                        nft = NFT(
-                            address=nft_address,
-                            collection_id=collection.id,
-                            name=name,
-                            gift_type=gift_type,
-                            image_url=image,
-                            is_on_sale=True,
-                            lowest_price_ton=min_bid,
-                            lowest_price_market="major",
-                        )
-                        session.add(nft)
-                        await session.flush()
-                    else:
-                        nft.is_on_sale = True
-                        if min_bid > 0:
-                            nft.lowest_price_ton = min(nft.lowest_price_ton or min_bid, min_bid)
-                        if gift_type and not nft.gift_type:
-                            nft.gift_type = gift_type
-
-                    # Создаём или обновляем листинг
-                    market_listing_id = address or slug
-
-                    result = await session.execute(
-                        select(Listing).where(
-                            Listing.market_id == market.id,
-                            Listing.market_listing_id == market_listing_id,
-                        )
-                    )
-                    listing = result.scalar_one_or_none()
-
-                    if not listing:
-                        listing = Listing(
-                            nft_id=nft.id,
-                            market_id=market.id,
-                            market_listing_id=market_listing_id,
-                            price_raw=min_bid,
-                            currency="TON",
-                            price_ton=min_bid,
-                            listing_url=f"https://major.tg/nft/{slug}",
-                            is_active=True,
-                            last_seen_at=datetime.utcnow(),
-                        )
-                        session.add(listing)
-                    else:
-                        listing.price_raw = min_bid
-                        listing.price_ton = min_bid
-                        listing.is_active = True
-                        listing.last_seen_at = datetime.utcnow()
-
-                    count += 1
-
-                except Exception as e:
-                    logger.error(f"[SyncLoader] Ошибка обработки Major: {e}")
-                    continue
+        Returns: количество добавленных/обновлённых записей
+        """
+        logger.info("[SyncLoader] Начинаю синхронизацию с Major.tg...")
 
+        async with get_async_session() as session:
+            market, collection = await self._ensure_default_targets(
+                session, slug="major", name="Major.tg", url="https://major.tg",
+            )
+            delta = await self._start_delta(session, market, collection, mode, supports_delta=False)
+            updates = []
+            writer = BulkListingWriter(session, market, collection.id, updates=updates)
+            stats = await run_pipeline(
+                delta.track(self.major_loader.iter_pages(max_items), self._major_key),
+                self._parse_major_item,
+                writer,
+                name="Major",
+            )
+            await self._finish_delta(
+                session, delta, market, collection, stats, exhausted=stats.received < max_items,
+                nft_ids=writer.changed_nft_ids, updates=updates,
+            )
             await session.commit()
 
-        logger.info(f"[SyncLoader] Синхронизировано {count} листингов с Major.tg")
-        return count
+        if not stats.received:
+            logger.warning("[SyncLoader] Нет данных с Major.tg")
+
+        await self._record_stats("major", stats)
+        logger.info(f"[SyncLoader] Синхронизировано {stats.written} листингов с Major.tg")
+        return stats.written
 
     async def sync_adapter_listings(
         self,
@@ -555,162 +762,60 @@ class SyncDataLoader:
         market_name: str,
         market_url: str,
         max_items: int = 1000,
+        mode: Optional[str] = None,
+        supports_delta: bool = False,
     ) -> int:
         """
         Синхронизировать листинги через адаптер маркета.
 
         Универсальный метод для любого адаптера, который реализует
-        BaseMarketAdapter.fetch_collection_listings().
+        BaseMarketAdapter.iter_collection_pages(): страницы загружаются,
+        парсятся и пишутся в БД конвейером.
+
+        Args:
+            supports_delta: адаптер отдаёт страницы от новых к старым
 
         Returns: количество добавленных/обновлённых записей
         """
         logger.info(f"[SyncLoader] Начинаю синхронизацию с {market_name}...")
 
-        try:
-            normalized_listings = await adapter.fetch_collection_listings(
-                collection_address=collection_address,
-                limit=max_items,
-            )
-        except Exception as e:
-            logger.error(f"[SyncLoader] Ошибка загрузки с {market_name}: {e}")
-            return 0
-
-        if not normalized_listings:
-            logger.warning(f"[SyncLoader] Нет данных с {market_name}")
-            return 0
-
-        logger.info(f"[SyncLoader] Загружено {len(normalized_listings)} листингов с {market_name}")
-
-        count = 0
+        pages = limit_pages(
+            adapter.iter_collection_pages(collection_address=collection_address),
+            max_items,
+        )
 
         async with get_async_session() as session:
-            market = await self.ensure_market_exists(
+            market, collection = await self._ensure_default_targets(
                 session, slug=market_slug, name=market_name, url=market_url,
             )
-
-            collection = await self.ensure_collection_exists(
-                session,
-                address="telegram-gifts",
-                name="Telegram Gifts",
-                slug="telegram-gifts",
+            delta = await self._start_delta(session, market, collection, mode, supports_delta)
+            updates = []
+            writer = BulkListingWriter(session, market, collection.id, updates=updates)
+            try:
+                stats = await run_pipeline(
+                    delta.track(pages, self._normalized_listing_key),
+                    self._parse_normalized_listing,
+                    writer,
+                    name=market_name,
+                )
+            except Exception as e:
+                logger.error(f"[SyncLoader] Ошибка загрузки с {market_name}: {e}")
+                return 0
+            await self._finish_delta(
+                session, delta, market, collection, stats, exhausted=stats.received < max_items,
+                nft_ids=writer.changed_nft_ids, updates=updates,
             )
-
-            for nl in normalized_listings:
-                try:
-                    nft_address = nl.nft_address
-                    if not nft_address:
-                        continue
-
-                    extra = nl.extra or {}
-                    name = extra.get("name", "Unknown")
-                    image_url = extra.get("image_url", "")
-                    attributes = extra.get("attributes") or []
-
-                    # Парсим атрибуты (model, backdrop, symbol)
-                    model = None
-                    backdrop = None
-                    symbol = None
-                    if isinstance(attributes, list):
-                        for attr in attributes:
-                            if isinstance(attr, dict):
-                                attr_name = attr.get("trait_type", attr.get("type", ""))
-                                attr_value = attr.get("value", "")
-                                if attr_name.lower() == "model":
-                                    model = attr_value
-                                elif attr_name.lower() == "backdrop":
-                                    backdrop = attr_value
-                                elif attr_name.lower() == "symbol":
-                                    symbol = attr_value
-
-                    # Создаём или обновляем NFT
-                    gift_type = extract_gift_type(name)
-
-                    result = await session.execute(
-                        select(NFT).where(NFT.address == nft_address)
-                    )
-                    nft = result.scalar_one_or_none()
-
-                    price_ton = nl.price_ton
-
-                    if not nft:
-                        nft = NFT(
-                            address=nft_address,
-                            collection_id=collection.id,
-                            name=name,
-                            gift_type=gift_type,
-                            image_url=image_url or None,
-                            model=model,
-                            backdrop=backdrop,
-                            symbol=symbol,
-                            is_on_sale=True,
-                            lowest_price_ton=price_ton,
-                            lowest_price_market=market_slug,
-                        )
-                        session.add(nft)
-                        await session.flush()
-                    else:
-                        nft.is_on_sale = True
-                        # Обновляем lowest_price если новая цена ниже
-                        if price_ton > 0 and (nft.lowest_price_ton is None or price_ton < nft.lowest_price_ton):
-                            nft.lowest_price_ton = price_ton
-                            nft.lowest_price_market = market_slug
-                        # Обновляем данные если они лучше
-                        if image_url and not nft.image_url:
-                            nft.image_url = image_url
-                        if model and not nft.model:
-                            nft.model = model
-                        if backdrop and not nft.backdrop:
-                            nft.backdrop = backdrop
-                        if gift_type and not nft.gift_type:
-                            nft.gift_type = gift_type
-
-                    # Создаём или обновляем листинг
-                    market_listing_id = nl.market_listing_id or nft_address
-
-                    result = await session.execute(
-                        select(Listing).where(
-                            Listing.market_id == market.id,
-                            Listing.market_listing_id == market_listing_id,
-                        )
-                    )
-                    listing = result.scalar_one_or_none()
-
-                    if not listing:
-                        listing = Listing(
-                            nft_id=nft.id,
-                            market_id=market.id,
-                            market_listing_id=market_listing_id,
-                            price_raw=price_ton,
-                            currency=nl.currency or "TON",
-                            price_ton=price_ton,
-                            seller_address=nl.seller_address,
-                            listing_url=nl.listing_url,
-                            is_active=True,
-                            listed_at=nl.listed_at,
-                            last_seen_at=datetime.utcnow(),
-                        )
-                        session.add(listing)
-                    else:
-                        listing.price_raw = price_ton
-                        listing.price_ton = price_ton
-                        listing.is_active = True
-                        listing.last_seen_at = datetime.utcnow()
-                        if nl.seller_address:
-                            listing.seller_address = nl.seller_address
-
-                    count += 1
-
-                except Exception as e:
-                    logger.error(f"[SyncLoader] Ошибка обработки {market_name}: {e}")
-                    continue
-
             await session.commit()
 
-        logger.info(f"[SyncLoader] Синхронизировано {count} листингов с {market_name}")
-        return count
+        if not stats.received:
+            logger.warning(f"[SyncLoader] Нет данных с {market_name}")
+
+        await self._record_stats(market_slug, stats)
+        logger.info(f"[SyncLoader] Синхронизировано {stats.written} листингов с {market_name}")
+        return stats.written
 
-    async def sync_getgems_listings(self, max_items: int = 1000) -> int:
-        """Синхронизировать листинги с GetGems."""
+    async def sync_getgems_listings(self, max_items: int = 1000, mode: Optional[str] = None) -> int:
+        """Синхронизировать листинги с GetGems (PRICE_ASC — всегда полный прогон)."""
         from app.adapters.getgems import GetGemsAdapter
 
         adapter = GetGemsAdapter()
@@ -723,10 +828,11 @@ class SyncDataLoader:
             market_name="GetGems",
             market_url="https://getgems.io",
             max_items=max_items,
+            mode=mode,
         )
 
-    async def sync_fragment_listings(self, max_items: int = 1000) -> int:
-        """Синхронизировать листинги с Fragment."""
+    async def sync_fragment_listings(self, max_items: int = 1000, mode: Optional[str] = None) -> int:
+        """Синхронизировать листинги с Fragment (порядок по индексу — всегда полный прогон)."""
         from app.adapters.fragment import FragmentAdapter
 
         adapter = FragmentAdapter()
@@ -739,254 +845,200 @@ class SyncDataLoader:
             market_name="Fragment",
             market_url="https://fragment.com",
             max_items=max_items,
+            mode=mode,
         )
 
-    async def sync_telegram_listings(self, max_items_per_type: int = 5000) -> int:
+    async def sync_telegram_listings(self, max_items_per_type: int = 5000, mode: Optional[str] = None) -> int:
         """
         Синхронизировать листинги через Telegram MTProto API.
 
         Это основной источник данных — видит ВСЕ гифты на ресейле,
         т.к. ресейл происходит через сам Telegram.
 
+        Типы гифтов листаются параллельно (TelegramResaleCrawler, по
+        нескольким сессиям, если они настроены), страницы сразу уходят
+        в конвейер записи.
+
+        Полный прогон идёт по цене (сначала самые дешёвые), delta — в
+        порядке выставления, до первого известного гифта каждого типа.
+
         Returns: количество добавленных/обновлённых записей
         """
-        from app.indexer.telegram_gifts import TelegramGiftIndexer
+        from app.indexer.telegram_gifts import PAGE_SIZE, TelegramResaleCrawler
 
         logger.info("[SyncLoader] Начинаю синхронизацию с Telegram MTProto...")
 
-        indexer = TelegramGiftIndexer()
-        self._telegram_indexer = indexer
+        crawler = TelegramResaleCrawler()
+        self._telegram_crawler = crawler
 
         try:
-            await indexer.connect()
+            await crawler.connect()
         except Exception as e:
             logger.error(f"[SyncLoader] Не удалось подключиться к Telegram: {e}")
             return 0
 
-        count = 0
+        stats = IngestStats()
+        max_pages = max_items_per_type // PAGE_SIZE + 1
 
         try:
-            catalog = await indexer.get_catalog()
+            catalog = await crawler.get_catalog()
 
             async with get_async_session() as session:
                 # Маркет "telegram" — сам Telegram (ресейл через приложение)
-                market = await self.ensure_market_exists(
-                    session,
-                    slug="telegram",
-                    name="Telegram",
-                    url="https://t.me",
+                market, collection = await self._ensure_default_targets(
+                    session, slug="telegram", name="Telegram", url="https://t.me",
                 )
-
-                collection = await self.ensure_collection_exists(
-                    session,
-                    address="telegram-gifts",
-                    name="Telegram Gifts",
-                    slug="telegram-gifts",
+                # Полный прогон сортирует по цене — его голова не граница для delta
+                delta = await self._start_delta(
+                    session, market, collection, mode,
+                    supports_delta=True, heads_in_full=False,
+                )
+                # Telegram — эталон для атрибутов гифтов
+                updates = []
+                writer = BulkListingWriter(
+                    session, market, collection.id, authoritative=True, updates=updates,
                 )
 
-                for gift_type in catalog:
-                    type_count = 0
-                    logger.info(
-                        f"[SyncLoader] Telegram: {gift_type.title or gift_type.id} "
-                        f"({gift_type.availability_resale} on resale)"
-                    )
-
-                    async for gift in indexer.iter_resale_gifts(
-                        gift_type.id,
-                        max_pages=max_items_per_type // 100 + 1,
+                async def pages():
+                    async for _, gifts in crawler.crawl(
+                        catalog,
+                        max_pages=max_pages,
+                        sort_by_price=not delta.is_delta,
+                        accept=lambda gift_type, gift: delta.accept(gift.slug, partition=str(gift_type.id)),
                     ):
-                        try:
-                            # NFT address: используем slug (уникальный) или gift_address (TON)
-                            nft_address = gift.gift_address or f"tg-{gift.slug}"
-
-                            price_ton = gift.price_ton or Decimal("0")
-                            price_stars = gift.price_stars or 0
-
-                            # Определяем rarity
-                            rarity = None
-                            min_rarity = min(
-                                r for r in [
-                                    gift.model_rarity,
-                                    gift.pattern_rarity,
-                                    gift.backdrop_rarity,
-                                ] if r is not None
-                            ) if any(r is not None for r in [gift.model_rarity, gift.pattern_rarity, gift.backdrop_rarity]) else None
-
-                            if min_rarity is not None:
-                                if min_rarity <= 10:
-                                    rarity = "Legendary"
-                                elif min_rarity <= 50:
-                                    rarity = "Epic"
-                                elif min_rarity <= 150:
-                                    rarity = "Rare"
-                                elif min_rarity <= 350:
-                                    rarity = "Uncommon"
-                                else:
-                                    rarity = "Common"
-
-                            # Upsert NFT
-                            result = await session.execute(
-                                select(NFT).where(NFT.address == nft_address)
-                            )
-                            nft = result.scalar_one_or_none()
-
-                            attributes_json = gift.attributes_raw or []
-
-                            gift_type_name = gift.title  # Already base name like "Snoop Dogg"
-
-                            if not nft:
-                                nft = NFT(
-                                    address=nft_address,
-                                    collection_id=collection.id,
-                                    index=gift.num,
-                                    name=f"{gift.title} #{gift.num}",
-                                    gift_type=gift_type_name,
-                                    image_url=f"https://t.me/nft/{gift.slug}",
-                                    model=gift.model_name,
-                                    backdrop=gift.backdrop_name,
-                                    pattern=gift.pattern_name,
-                                    rarity=rarity,
-                                    attributes=attributes_json,
-                                    owner_address=gift.owner_address,
-                                    is_on_sale=True,
-                                    lowest_price_ton=price_ton if price_ton > 0 else None,
-                                    lowest_price_market="telegram",
-                                    raw_metadata={
-                                        'unique_id': gift.unique_id,
-                                        'gift_id': gift.gift_id,
-                                        'slug': gift.slug,
-                                        'num': gift.num,
-                                        'price_stars': price_stars,
-                                        'availability_issued': gift.availability_issued,
-                                        'availability_total': gift.availability_total,
-                                    },
-                                )
-                                session.add(nft)
-                                await session.flush()
-                            else:
-                                nft.is_on_sale = True
-                                nft.owner_address = gift.owner_address or nft.owner_address
-                                nft.attributes = attributes_json
-                                if gift_type_name and not nft.gift_type:
-                                    nft.gift_type = gift_type_name
-                                if rarity:
-                                    nft.rarity = rarity
-                                if gift.model_name:
-                                    nft.model = gift.model_name
-                                if gift.backdrop_name:
-                                    nft.backdrop = gift.backdrop_name
-                                if gift.pattern_name:
-                                    nft.pattern = gift.pattern_name
-                                # Обновляем lowest_price
-                                if price_ton > 0 and (nft.lowest_price_ton is None or price_ton < nft.lowest_price_ton):
-                                    nft.lowest_price_ton = price_ton
-                                    nft.lowest_price_market = "telegram"
-
-                            # Upsert Listing
-                            market_listing_id = gift.slug
-
-                            result = await session.execute(
-                                select(Listing).where(
-                                    Listing.market_id == market.id,
-                                    Listing.market_listing_id == market_listing_id,
-                                )
-                            )
-                            listing = result.scalar_one_or_none()
-
-                            if not listing:
-                                listing = Listing(
-                                    nft_id=nft.id,
-                                    market_id=market.id,
-                                    market_listing_id=market_listing_id,
-                                    price_raw=Decimal(str(price_stars)),
-                                    currency="STARS",
-                                    price_ton=price_ton,
-                                    listing_url=f"https://t.me/nft/{gift.slug}",
-                                    is_active=True,
-                                    last_seen_at=datetime.utcnow(),
-                                )
-                                session.add(listing)
-                            else:
-                                listing.price_raw = Decimal(str(price_stars))
-                                listing.price_ton = price_ton
-                                listing.is_active = True
-                                listing.last_seen_at = datetime.utcnow()
-
-                            type_count += 1
-                            count += 1
-
-                            # Flush every 100 items
-                            if count % 100 == 0:
-                                await session.flush()
-
-                        except Exception as e:
-                            logger.error(f"[SyncLoader] Ошибка обработки Telegram gift {gift.slug}: {e}")
-                            continue
-
-                    logger.info(f"[SyncLoader] Telegram {gift_type.title}: {type_count} gifts synced")
+                        yield gifts
 
+                stats = await run_pipeline(
+                    pages(), self._parse_telegram_gift, writer,
+                    queue_size=4, name="Telegram",
+                )
+
+                if crawler.failed_types:
+                    delta.complete = False
+                await self._finish_delta(
+                    session, delta, market, collection, stats,
+                    exhausted=not crawler.truncated_types,
+                    nft_ids=writer.changed_nft_ids,
+                    updates=updates,
+                )
                 await session.commit()
 
+            logger.info(
+                f"[SyncLoader] Telegram: {len(crawler.type_counts)} из {len(catalog)} типов, "
+                f"не загружено {len(crawler.failed_types)}"
+            )
+
         except Exception as e:
             logger.error(f"[SyncLoader] Ошибка синхронизации Telegram: {e}")
+            # Изменения не записаны — публиковать нечего
+            self._pending_updates.pop("telegram", None)
         finally:
-            await indexer.disconnect()
-
-        logger.info(f"[SyncLoader] Синхронизировано {count} листингов с Telegram")
-        return count
+            await crawler.disconnect()
+
+        await self._record_stats("telegram", stats)
+        logger.info(f"[SyncLoader] Синхронизировано {stats.written} листингов с Telegram")
+        return stats.written
+
+    def _market_jobs(self) -> dict[str, Callable[[], Awaitable[int]]]:
+        """Синхронизации маркетов, участвующие в полном прогоне."""
+        return {
+            # Telegram MTProto — основной источник
+            "telegram": self.sync_telegram_listings,
+            "portals": self.sync_portals_listings,
+            "major": self.sync_major_listings,
+            "getgems": self.sync_getgems_listings,
+            "fragment": self.sync_fragment_listings,
+        }
 
-    async def sync_all(self) -> dict:
+    async def _run_market_job(
+        self,
+        market_slug: str,
+        job: Callable[[], Awaitable[int]],
+        semaphore: asyncio.Semaphore,
+        timeout: float,
+    ) -> dict:
         """
-        Синхронизировать данные со всех маркетов.
+        Запустить синхронизацию одного маркета в рамках общего бюджета.
 
-        Returns: статистика синхронизации
+        Каждый маркет открывает собственную сессию БД, поэтому ошибка
+        или таймаут одного не откатывает данные остальных.
         """
-        logger.info("[SyncLoader] ===== НАЧАЛО ПОЛНОЙ СИНХРОНИЗАЦИИ =====")
-
-        stats = {
-            "started_at": datetime.utcnow().isoformat(),
-            "telegram": 0,
-            "portals": 0,
-            "major": 0,
-            "getgems": 0,
-            "fragment": 0,
-            "total": 0,
-            "errors": [],
-        }
-
-        # Telegram MTProto — основной источник
-        try:
-            stats["telegram"] = await self.sync_telegram_listings()
-        except Exception as e:
-            logger.error(f"[SyncLoader] Ошибка Telegram: {e}")
-            stats["errors"].append(f"telegram: {str(e)}")
+        async with semaphore:
+            started = time.monotonic()
+            report = {"status": "ok", "count": 0, "error": None}
+            try:
+                report["count"] = await asyncio.wait_for(job(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"[SyncLoader] {market_slug}: превышен дедлайн {timeout:g}s")
+                report["status"] = "timeout"
+                report["error"] = f"deadline {timeout:g}s exceeded"
+            except Exception as e:
+                logger.error(f"[SyncLoader] Ошибка {market_slug}: {e}")
+                report["status"] = "error"
+                report["error"] = str(e)
+            report["elapsed"] = round(time.monotonic() - started, 3)
+            return report
+
+    async def sync_all(
+        self,
+        markets: Optional[list[str]] = None,
+        concurrency: Optional[int] = None,
+        market_timeout: Optional[float] = None,
+        mode: Optional[str] = None,
+    ) -> dict:
+        """
+        Синхронизировать данные со всех маркетов параллельно.
 
-        try:
-            stats["portals"] = await self.sync_portals_listings()
-        except Exception as e:
-            logger.error(f"[SyncLoader] Ошибка Portals: {e}")
-            stats["errors"].append(f"portals: {str(e)}")
+        Args:
+            markets: подмножество маркетов (по умолчанию все)
+            concurrency: сколько маркетов синхронизируется одновременно
+            market_timeout: дедлайн на один маркет, секунды
+            mode: "full" / "delta" для всех маркетов (по умолчанию
+                каждый маркет выбирает режим по своему водяному знаку)
 
-        try:
-            stats["major"] = await self.sync_major_listings()
-        except Exception as e:
-            logger.error(f"[SyncLoader] Ошибка Major: {e}")
-            stats["errors"].append(f"major: {str(e)}")
-
-        try:
-            stats["getgems"] = await self.sync_getgems_listings()
-        except Exception as e:
-            logger.error(f"[SyncLoader] Ошибка GetGems: {e}")
-            stats["errors"].append(f"getgems: {str(e)}")
+        Returns: статистика синхронизации, включая статус каждого маркета
+        """
+        jobs = self._market_jobs()
+        if markets:
+            jobs = {slug: job for slug, job in jobs.items() if slug in markets}
+        if mode:
+            jobs = {slug: functools.partial(job, mode=mode) for slug, job in jobs.items()}
+
+        concurrency = concurrency or settings.SYNC_CONCURRENCY
+        market_timeout = market_timeout or settings.SYNC_MARKET_TIMEOUT
+
+        async with self._sync_lock:
+            logger.info(
+                f"[SyncLoader] ===== НАЧАЛО ПОЛНОЙ СИНХРОНИЗАЦИИ "
+                f"({len(jobs)} маркетов, параллельно {concurrency}) ====="
+            )
 
-        try:
-            stats["fragment"] = await self.sync_fragment_listings()
-        except Exception as e:
-            logger.error(f"[SyncLoader] Ошибка Fragment: {e}")
-            stats["errors"].append(f"fragment: {str(e)}")
+            stats = {
+                "started_at": datetime.utcnow().isoformat(),
+                **{slug: 0 for slug in jobs},
+                "total": 0,
+                "errors": [],
+            }
 
-        stats["total"] = sum(v for k, v in stats.items() if isinstance(v, int) and k != "total")
-        stats["finished_at"] = datetime.utcnow().isoformat()
+            await self._ensure_shared_targets()
+
+            semaphore = asyncio.Semaphore(concurrency)
+            reports = await asyncio.gather(*(
+                self._run_market_job(slug, job, semaphore, market_timeout)
+                for slug, job in jobs.items()
+            ))
+
+            stats["markets"] = dict(zip(jobs, reports))
+            for slug, report in stats["markets"].items():
+                report["mode"] = self.sync_modes.get(slug)
+                stats[slug] = report["count"]
+                if report["error"]:
+                    stats["errors"].append(f"{slug}: {report['error']}")
+
+            stats["total"] = sum(stats[slug] for slug in jobs)
+            stats["partial"] = any(r["status"] != "ok" for r in reports)
+            stats["ingest"] = {slug: s.to_dict() for slug, s in self.run_stats.items()}
+            stats["finished_at"] = datetime.utcnow().isoformat()
 
         logger.info(f"[SyncLoader] ===== СИНХРОНИЗАЦИЯ ЗАВЕРШЕНА: {stats['total']} записей =====")
 
@@ -0,0 +1,226 @@
+"""
+Сводная таблица фасетов gift_facets.
+
+Фильтры каталога (/gifts/filters) показывают по каждому значению
+атрибута число гифтов на продаже, floor и картинку — по всем гифтам и
+внутри выбранных типов. Данные меняются только при синхронизации,
+поэтому сводка считается при записи, а не при каждом чтении.
+
+Обновление инкрементальное: на вход — id NFT, у которых изменились
+цена или статус продажи (recompute_best_prices(changed=...)).
+Пересчитываются только затронутые строки:
+
+    * все строки типов гифтов, к которым относятся изменённые NFT;
+    * общие строки значений атрибутов изменённых NFT.
+
+Одним запросом с GROUPING SETS по NFT, подходящим хотя бы под одно
+затронутое значение. Полная пересборка (rebuild) — при пустой таблице
+и раз в час задачей Celery: она ловит то, чего не видит инкремент
+(например, смену атрибутов у NFT без смены цены).
+"""
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import select, delete, func, and_, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.database import in_array
+from app.models.gift_facet import GiftFacet
+from app.models.nft import NFT
+
+logger = logging.getLogger(__name__)
+
+# Пустой gift_type строки — фасет по всем типам
+ALL_TYPES = ""
+
+# Измерения фасетов: имя -> колонка NFT (gift_type — всегда первое)
+DIMENSIONS = {
+    "gift_type": NFT.gift_type,
+    "model": NFT.model,
+    "backdrop": NFT.backdrop,
+    "symbol": NFT.symbol,
+    "pattern": NFT.pattern,
+    "rarity": NFT.rarity,
+}
+ATTRIBUTES = [name for name in DIMENSIONS if name != "gift_type"]
+
+
+async def refresh_gift_facets(
+    session,
+    nft_ids: Optional[Iterable[int]] = None,
+    gift_types: Optional[set[str]] = None,
+) -> int:
+    """
+    Обновить gift_facets по изменённым NFT (None — пересобрать целиком).
+
+    Args:
+        gift_types: сюда добавляются типы гифтов изменённых NFT
+            (для инвалидации кэша ответов по тегам)
+
+    Returns: количество записанных или удалённых строк
+    """
+    scope = None
+    if nft_ids is not None:
+        nft_ids = list(nft_ids)
+        if not nft_ids:
+            return 0
+        scope = await _affected_scope(session, nft_ids)
+        if gift_types is not None:
+            gift_types.update(scope["gift_type"])
+        if not scope["gift_type"] and not any(scope[name] for name in ATTRIBUTES):
+            return 0
+        has_rows = await session.execute(select(GiftFacet.id).limit(1))
+        if has_rows.first() is None:
+            scope = None  # Таблица пуста — собираем с нуля
+
+    computed = await _compute(session, scope)
+    return await _store(session, scope, computed)
+
+
+async def _affected_scope(session, nft_ids: list[int]) -> dict[str, set[str]]:
+    """Значения каждого измерения у изменённых NFT."""
+    columns = list(DIMENSIONS.values())
+    result = await session.execute(
+        select(*columns).where(in_array(NFT.id, nft_ids)).distinct()
+    )
+    scope: dict[str, set[str]] = {name: set() for name in DIMENSIONS}
+    for row in result:
+        for name, value in zip(DIMENSIONS, row):
+            if value is not None:
+                scope[name].add(value)
+    return scope
+
+
+async def _compute(session, scope: Optional[dict[str, set[str]]]) -> dict[tuple, dict]:
+    """
+    Посчитать строки фасетов в области scope (None — все).
+
+    Returns: (gift_type, dimension, value) -> агрегаты
+    """
+    gift_type = DIMENSIONS["gift_type"]
+    attributes = [DIMENSIONS[name] for name in ATTRIBUTES]
+
+    # Общие строки (gift_type), (model), ... и строки по типу (gift_type, model), ...
+    sets = [gift_type, *attributes, *[tuple_(gift_type, column) for column in attributes]]
+
+    conditions = [NFT.is_on_sale == True]
+    if scope is not None:
+        matches = [
+            DIMENSIONS[name].in_(values)
+            for name, values in scope.items()
+            if values
+        ]
+        conditions.append(or_(*matches))
+
+    columns = list(DIMENSIONS.values())
+    result = await session.execute(
+        select(
+            func.grouping(*columns).label("mask"),
+            *columns,
+            func.count(NFT.id).label("cnt"),
+            func.min(NFT.lowest_price_ton).label("floor"),
+            func.max(NFT.lowest_price_ton).label("ceiling"),
+            func.min(NFT.image_url).label("img"),
+        )
+        .where(and_(*conditions))
+        .group_by(func.grouping_sets(*sets))
+    )
+
+    # grouping(): бит колонки = 0, если она в группировке (gift_type — старший)
+    width = len(columns)
+    full = (1 << width) - 1
+    bit = {name: 1 << (width - 1 - i) for i, name in enumerate(DIMENSIONS)}
+    layouts = {full ^ bit["gift_type"]: (None, "gift_type")}
+    for name in ATTRIBUTES:
+        layouts[full ^ bit[name]] = (None, name)
+        layouts[full ^ bit[name] ^ bit["gift_type"]] = ("gift_type", name)
+
+    rows = {}
+    for row in result:
+        layout = layouts.get(row.mask)
+        if layout is None:
+            continue
+        scoped, name = layout
+        value = getattr(row, name)
+        scope_type = row.gift_type if scoped else ALL_TYPES
+        if value is None or scope_type is None:
+            continue
+
+        # Вне области запрос видит только часть NFT — такие группы не годятся
+        if scope is not None:
+            if scoped and scope_type not in scope["gift_type"]:
+                continue
+            if not scoped and value not in scope[name]:
+                continue
+
+        rows[(scope_type, name, value)] = {
+            "gift_type": scope_type,
+            "dimension": name,
+            "value": value,
+            "count_on_sale": row.cnt,
+            "floor_price_ton": row.floor,
+            "max_price_ton": row.ceiling,
+            "image_url": row.img,
+        }
+    return rows
+
+
+def _scope_filter(scope: dict[str, set[str]]):
+    """Условие на строки gift_facets, попадающие в область пересчёта."""
+    conditions = []
+    if scope["gift_type"]:
+        conditions.append(GiftFacet.gift_type.in_(scope["gift_type"]))
+    for name, values in scope.items():
+        if values:
+            conditions.append(and_(
+                GiftFacet.gift_type == ALL_TYPES,
+                GiftFacet.dimension == name,
+                GiftFacet.value.in_(values),
+            ))
+    return or_(*conditions)
+
+
+async def _store(session, scope: Optional[dict[str, set[str]]], computed: dict[tuple, dict]) -> int:
+    """Удалить исчезнувшие строки области и upsert посчитанных."""
+    existing = select(GiftFacet.id, GiftFacet.gift_type, GiftFacet.dimension, GiftFacet.value)
+    if scope is not None:
+        existing = existing.where(_scope_filter(scope))
+    result = await session.execute(existing)
+    stale_ids = [
+        row.id for row in result
+        if (row.gift_type, row.dimension, row.value) not in computed
+    ]
+
+    written = 0
+    if stale_ids:
+        result = await session.execute(delete(GiftFacet).where(GiftFacet.id.in_(stale_ids)))
+        written += result.rowcount
+
+    rows = list(computed.values())
+    # Ограничение числа параметров запроса asyncpg (32767)
+    for start in range(0, len(rows), 2000):
+        stmt = pg_insert(GiftFacet).values(rows[start:start + 2000])
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_gift_facets_scope_value",
+            set_={
+                "count_on_sale": excluded.count_on_sale,
+                "floor_price_ton": excluded.floor_price_ton,
+                "max_price_ton": excluded.max_price_ton,
+                "image_url": excluded.image_url,
+                "updated_at": func.now(),
+            },
+            # Неизменившиеся строки не переписываются
+            where=or_(
+                GiftFacet.count_on_sale != excluded.count_on_sale,
+                GiftFacet.floor_price_ton.is_distinct_from(excluded.floor_price_ton),
+                GiftFacet.max_price_ton.is_distinct_from(excluded.max_price_ton),
+                GiftFacet.image_url.is_distinct_from(excluded.image_url),
+            ),
+        )
+        result = await session.execute(stmt)
+        written += result.rowcount
+
+    if written:
+        logger.debug(f"[Facets] Обновлено строк фасетов: {written}")
+    return written
@@ -0,0 +1,134 @@
+"""
+Отпечатки листингов для пропуска пустых записей.
+
+Отпечаток — короткий хэш полей, которые имеет смысл писать в строку
+листинга (цена, валюта, продавец, срок). Если отпечаток листинга совпал
+с прошлым прогоном и строка всё ещё активна, она не переписывается: ей
+достаточно дешёвого пакетного обновления last_seen_at. Листинг, снятый
+между прогонами (deactivate_unseen, cleanup_stale_listings), пишется
+заново, даже если его отпечаток не изменился.
+
+Отпечатки пары маркет × коллекция хранятся в Redis hash (общий для всех
+воркеров Celery) с TTL SYNC_FINGERPRINT_TTL; если Redis недоступен —
+в памяти процесса. Пустой или протухший набор засевается из БД одним
+SELECT, так что расхождение с БД живёт не дольше TTL.
+"""
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.core.clients import get_redis
+from app.models.listing import Listing
+from app.models.nft import NFT
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "sync:fp:"
+
+# Запасное хранилище процесса: key -> (expires_at, {listing_id: fingerprint})
+_local: dict[str, tuple[float, dict[str, str]]] = {}
+
+
+def listing_fingerprint(
+    price_raw: Optional[Decimal],
+    currency: Optional[str],
+    seller_address: Optional[str],
+    expires_at: Optional[datetime],
+) -> str:
+    """Отпечаток изменяемых полей листинга (16 hex-символов)."""
+    if expires_at is not None:
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        expires = str(int(expires_at.timestamp()))
+    else:
+        expires = ""
+
+    # 10 и 10.000000000 из Numeric(24, 9) должны совпадать
+    price = format(Decimal(price_raw).normalize(), "f") if price_raw is not None else ""
+
+    payload = "|".join((price, currency or "TON", seller_address or "", expires))
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Отпечатки активных листингов одного маркета в одной коллекции.
+
+    Usage:
+        store = FingerprintStore(market.id, collection.id)
+        known = await store.load(session)
+        ...
+        await store.save(current)
+    """
+
+    def __init__(self, market_id: int, collection_id: int):
+        self.key = f"{KEY_PREFIX}{market_id}:{collection_id}"
+        self.market_id = market_id
+        self.collection_id = collection_id
+        self.source = "redis"
+
+    async def load(self, session) -> dict[str, str]:
+        """Отпечатки прошлого прогона (засеваются из БД, если их нет)."""
+        fingerprints = await self._load_cached()
+        if fingerprints is None:
+            fingerprints = await self._load_from_db(session)
+            self.source = "db"
+        return fingerprints
+
+    async def save(self, fingerprints: dict[str, str]) -> None:
+        """Заменить набор отпечатков текущим прогоном."""
+        ttl = settings.SYNC_FINGERPRINT_TTL
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.delete(self.key)
+                if fingerprints:
+                    pipe.hset(self.key, mapping=fingerprints)
+                    pipe.expire(self.key, ttl)
+                await pipe.execute()
+            _local.pop(self.key, None)
+        except Exception as e:
+            logger.warning(f"[Fingerprints] Redis недоступен, храню в памяти: {e}")
+            _local[self.key] = (time.monotonic() + ttl, dict(fingerprints))
+
+    async def _load_cached(self) -> Optional[dict[str, str]]:
+        try:
+            fingerprints = await get_redis().hgetall(self.key)
+            if fingerprints:
+                return fingerprints
+        except Exception as e:
+            logger.warning(f"[Fingerprints] Redis недоступен: {e}")
+
+        cached = _local.get(self.key)
+        if cached and cached[0] > time.monotonic():
+            self.source = "memory"
+            return cached[1]
+        return None
+
+    async def _load_from_db(self, session) -> dict[str, str]:
+        result = await session.execute(
+            select(
+                Listing.market_listing_id,
+                Listing.price_raw,
+                Listing.currency,
+                Listing.seller_address,
+                Listing.expires_at,
+            ).where(
+                Listing.market_id == self.market_id,
+                Listing.is_active == True,
+                Listing.nft_id.in_(
+                    select(NFT.id).where(NFT.collection_id == self.collection_id)
+                ),
+            )
+        )
+        return {
+            row.market_listing_id: listing_fingerprint(
+                row.price_raw, row.currency, row.seller_address, row.expires_at,
+            )
+            for row in result
+        }
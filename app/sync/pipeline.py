@@ -0,0 +1,100 @@
+"""
+Конвейер fetch → parse → write для постраничных загрузчиков.
+
+Три стадии соединены ограниченными asyncio.Queue: пока страница N
+парсится, страница N+1 уже загружается, а N-1 пишется в БД. Очереди
+ограничены, поэтому медленная запись тормозит загрузку (backpressure),
+и в памяти одновременно находится не больше пары страниц на стадию.
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Optional, Any
+
+from app.sync.bulk import BulkListingWriter, IngestItem, IngestStats
+
+logger = logging.getLogger(__name__)
+
+# Маркер конца потока между стадиями
+_DONE = object()
+
+
+async def run_pipeline(
+    pages: AsyncIterator[list],
+    parse: Callable[[Any], Optional[IngestItem]],
+    writer: BulkListingWriter,
+    queue_size: int = 2,
+    name: str = "pipeline",
+) -> IngestStats:
+    """
+    Прогнать постраничный источник через парсер в BulkListingWriter.
+
+    Args:
+        pages: асинхронный генератор страниц сырых записей
+        parse: функция raw -> IngestItem (None — пропустить запись)
+        writer: пакетный писатель, владеющий сессией БД
+        queue_size: ёмкость очередей между стадиями (в страницах)
+        name: имя для логов
+
+    Returns:
+        Статистика записи
+    """
+    raw_pages: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    parsed_pages: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    # Маркер конца отправляется только при нормальном завершении стадии:
+    # при ошибке gather ниже отменяет все стадии, и ожидание put на полной
+    # очереди в finally заблокировало бы отмену навсегда.
+    async def fetch_stage():
+        async for page in pages:
+            if page:
+                await raw_pages.put(page)
+        await raw_pages.put(_DONE)
+
+    async def parse_stage():
+        while (page := await raw_pages.get()) is not _DONE:
+            items = []
+            for raw in page:
+                try:
+                    item = parse(raw)
+                except Exception as e:
+                    logger.error(f"[{name}] Ошибка обработки записи: {e}")
+                    continue
+                if item is not None:
+                    items.append(item)
+            await parsed_pages.put(items)
+        await parsed_pages.put(_DONE)
+
+    async def write_stage():
+        while (items := await parsed_pages.get()) is not _DONE:
+            for item in items:
+                await writer.add(item)
+        await writer.flush()
+
+    tasks = [
+        asyncio.create_task(fetch_stage()),
+        asyncio.create_task(parse_stage()),
+        asyncio.create_task(write_stage()),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    return writer.stats
+
+
+async def limit_pages(pages: AsyncIterator[list], max_items: int) -> AsyncIterator[list]:
+    """Обрезать поток страниц после max_items записей."""
+    remaining = max_items
+    if remaining <= 0:
+        return
+    async for page in pages:
+        page = page[:remaining]
+        remaining -= len(page)
+        yield page
+        # Лимит набран — следующую страницу у источника не запрашиваем
+        if remaining <= 0:
+            return
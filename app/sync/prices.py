@@ -0,0 +1,128 @@
+"""
+Пересчёт лучшей цены NFT по активным листингам.
+
+Общий этап после записи листингов (SyncDataLoader и задачи Celery):
+два set-based UPDATE вместо запроса на каждый NFT.
+
+    1. UPDATE nfts ... FROM (SELECT DISTINCT ON (nft_id) ...) — самый
+       дешёвый активный листинг каждого NFT;
+    2. UPDATE nfts ... WHERE NOT EXISTS (активный листинг) — NFT, у
+       которых не осталось листингов, снимаются с продажи.
+
+Цена пересчитывается целиком, поэтому она растёт, когда дешёвый листинг
+исчезает. Строки, где ничего не изменилось, не переписываются.
+"""
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import select, update, case, func, or_
+from sqlalchemy.orm import aliased
+
+from app.core.database import in_array
+from app.models.listing import Listing
+from app.models.market import Market
+from app.models.nft import NFT
+
+logger = logging.getLogger(__name__)
+
+
+async def recompute_best_prices(
+    session,
+    nft_ids: Optional[Iterable[int]] = None,
+    market_id: Optional[int] = None,
+    changed: Optional[set[int]] = None,
+) -> tuple[int, int]:
+    """
+    Пересчитать is_on_sale / lowest_price_ton / lowest_price_market.
+
+    Область пересчёта — NFT из nft_ids, либо все NFT, у которых есть
+    (или были) листинги маркета market_id. Листинги с нулевой ценой
+    держат NFT на продаже, но в лучшую цену не попадают.
+
+    Args:
+        changed: сюда добавляются id NFT, у которых что-то изменилось
+            (для инкрементального обновления gift_facets)
+
+    Returns: (обновлено NFT с листингами, снято с продажи)
+    """
+    if nft_ids is not None:
+        nft_ids = list(nft_ids)
+        if not nft_ids:
+            return 0, 0
+        in_scope = lambda column: in_array(column, nft_ids)
+    elif market_id is not None:
+        market_listing = aliased(Listing)
+        market_nfts = select(market_listing.nft_id).where(market_listing.market_id == market_id)
+        in_scope = lambda column: column.in_(market_nfts)
+    else:
+        raise ValueError("nft_ids or market_id is required")
+
+    # 1. Лучший активный листинг каждого NFT
+    best = (
+        select(
+            Listing.nft_id,
+            Listing.price_ton,
+            Market.slug.label("market_slug"),
+        )
+        .join(Market, Market.id == Listing.market_id)
+        .where(Listing.is_active == True, in_scope(Listing.nft_id))
+        .order_by(Listing.nft_id, (Listing.price_ton > 0).desc(), Listing.price_ton)
+        .distinct(Listing.nft_id)
+        .subquery("best")
+    )
+    price = case((best.c.price_ton > 0, best.c.price_ton))
+    market = case((best.c.price_ton > 0, best.c.market_slug))
+
+    result = await session.execute(
+        update(NFT)
+        .where(
+            NFT.id == best.c.nft_id,
+            or_(
+                NFT.is_on_sale.is_not(True),
+                NFT.lowest_price_ton.is_distinct_from(price),
+                NFT.lowest_price_market.is_distinct_from(market),
+            ),
+        )
+        .values(
+            is_on_sale=True,
+            lowest_price_ton=price,
+            lowest_price_market=market,
+            updated_at=func.now(),
+        )
+        .returning(NFT.id)
+        .execution_options(synchronize_session=False)
+    )
+    repriced_ids = result.scalars().all()
+
+    # 2. NFT без активных листингов
+    has_active = (
+        select(Listing.id)
+        .where(Listing.nft_id == NFT.id, Listing.is_active == True)
+        .exists()
+    )
+    result = await session.execute(
+        update(NFT)
+        .where(
+            in_scope(NFT.id),
+            or_(NFT.is_on_sale == True, NFT.lowest_price_ton.is_not(None)),
+            ~has_active,
+        )
+        .values(
+            is_on_sale=False,
+            lowest_price_ton=None,
+            lowest_price_market=None,
+            updated_at=func.now(),
+        )
+        .returning(NFT.id)
+        .execution_options(synchronize_session=False)
+    )
+    cleared_ids = result.scalars().all()
+
+    if changed is not None:
+        changed.update(repriced_ids)
+        changed.update(cleared_ids)
+    repriced, cleared = len(repriced_ids), len(cleared_ids)
+
+    if repriced or cleared:
+        logger.debug(f"[Prices] Обновлено {repriced} NFT, снято с продажи {cleared}")
+    return repriced, cleared
@@ -0,0 +1,276 @@
+"""
+Инкрементальная (delta) синхронизация по водяным знакам.
+
+Для источников, отдающих листинги от новых к старым, хранится позиция
+предыдущего прогона (SyncWatermark): самый свежий listed_at и id
+листингов в голове каждого потока. Delta-прогон листает страницы только
+до первой уже известной записи.
+
+Delta не видит снятых с продажи листингов, поэтому раз в
+SYNC_FULL_INTERVAL выполняется полный прогон (reconciliation): он
+проходит источник целиком и деактивирует листинги, которых не встретил.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, Optional, Any
+
+from sqlalchemy import select, update, func
+
+from app.config import settings
+from app.models.listing import Listing
+from app.models.nft import NFT
+from app.models.sync_watermark import SyncWatermark
+
+logger = logging.getLogger(__name__)
+
+MODE_FULL = "full"
+MODE_DELTA = "delta"
+
+
+async def load_watermark(session, market_id: int, collection_id: int) -> SyncWatermark:
+    """Получить (или создать) водяной знак маркета для коллекции."""
+    result = await session.execute(
+        select(SyncWatermark).where(
+            SyncWatermark.market_id == market_id,
+            SyncWatermark.collection_id == collection_id,
+        )
+    )
+    watermark = result.scalar_one_or_none()
+
+    if not watermark:
+        watermark = SyncWatermark(
+            market_id=market_id,
+            collection_id=collection_id,
+            head_listing_ids={},
+            last_items_seen=0,
+        )
+        session.add(watermark)
+        await session.flush()
+
+    return watermark
+
+
+def choose_mode(
+    watermark: SyncWatermark,
+    requested: Optional[str] = None,
+    supports_delta: bool = True,
+) -> str:
+    """
+    Выбрать режим прогона.
+
+    Полный прогон, если: delta не поддерживается источником или отключена,
+    полного прогона ещё не было, или с последнего прошло больше
+    SYNC_FULL_INTERVAL. Явно запрошенный режим уважается, кроме delta
+    для источника без сортировки по новизне.
+    """
+    if not supports_delta or not settings.SYNC_DELTA_ENABLED:
+        return MODE_FULL
+    if requested in (MODE_FULL, MODE_DELTA):
+        return requested
+
+    last_full = watermark.last_full_sync_at
+    if last_full is None:
+        return MODE_FULL
+    if last_full.tzinfo is None:
+        last_full = last_full.replace(tzinfo=timezone.utc)
+    age = datetime.now(timezone.utc) - last_full
+    if age >= timedelta(seconds=settings.SYNC_FULL_INTERVAL):
+        return MODE_FULL
+    return MODE_DELTA
+
+
+class DeltaSync:
+    """
+    Состояние одного прогона относительно водяного знака.
+
+    Usage:
+        delta = DeltaSync(watermark, mode)
+        pages = delta.track(source_pages, key=lambda raw: (raw["id"], listed_at))
+        ... прогнать pages через конвейер ...
+        delta.commit(items_seen=stats.received)
+
+    Args:
+        track_heads: поток отсортирован по новизне и его голову можно
+            запомнить как границу для следующего delta-прогона.
+    """
+
+    def __init__(self, watermark: SyncWatermark, mode: str, track_heads: bool = True):
+        self.watermark = watermark
+        self.mode = mode
+        self.track_heads = track_heads
+        self.head_size = settings.SYNC_DELTA_HEAD_SIZE
+        self.started_at = datetime.now(timezone.utc)
+
+        # Граница предыдущего прогона
+        self._known_ids = {
+            partition: set(ids)
+            for partition, ids in (watermark.head_listing_ids or {}).items()
+        }
+        self._known_listed_at = watermark.last_listed_at
+
+        # Наблюдения текущего прогона
+        self._heads: dict[str, list[str]] = {}
+        self._max_listed_at: Optional[datetime] = None
+
+        self.reached_known = False  # delta-прогон упёрся в известные данные
+        self.complete = True        # источник пройден без ошибок
+
+    @property
+    def is_delta(self) -> bool:
+        return self.mode == MODE_DELTA
+
+    def is_known(self, listing_id: str, listed_at: Optional[datetime] = None, partition: str = "") -> bool:
+        """Встречалась ли запись в голове потока на прошлом прогоне."""
+        if listing_id in self._known_ids.get(partition, ()):
+            return True
+        if listed_at is not None and self._known_listed_at is not None:
+            return _aware(listed_at) < _aware(self._known_listed_at)
+        return False
+
+    def observe(self, listing_id: str, listed_at: Optional[datetime] = None, partition: str = "") -> None:
+        """Запомнить запись как кандидата в новую голову потока."""
+        if self.track_heads:
+            head = self._heads.setdefault(partition, [])
+            if len(head) < self.head_size:
+                head.append(listing_id)
+        if listed_at is not None:
+            listed_at = _aware(listed_at)
+            if self._max_listed_at is None or listed_at > self._max_listed_at:
+                self._max_listed_at = listed_at
+
+    def accept(self, listing_id: str, listed_at: Optional[datetime] = None, partition: str = "") -> bool:
+        """
+        Проверить запись потока: False — delta-прогон дошёл до известных
+        данных и листать дальше не нужно.
+        """
+        if self.is_delta and self.is_known(listing_id, listed_at, partition):
+            self.reached_known = True
+            return False
+        self.observe(listing_id, listed_at, partition)
+        return True
+
+    async def track(
+        self,
+        pages: AsyncIterator[list],
+        key: Callable[[Any], tuple[str, Optional[datetime]]],
+        partition: str = "",
+    ) -> AsyncIterator[list]:
+        """
+        Пропустить поток страниц через водяной знак.
+
+        В delta-режиме обрывает поток на первой известной записи. Ошибка
+        источника не прерывает прогон (уже загруженное будет записано), но
+        помечает его неполным — по такому прогону снятые листинги не ищутся.
+        """
+        try:
+            async for page in pages:
+                fresh = []
+                for raw in page:
+                    listing_id, listed_at = key(raw)
+                    if not self.accept(str(listing_id), listed_at, partition):
+                        break
+                    fresh.append(raw)
+                if fresh:
+                    yield fresh
+                if self.reached_known:
+                    return
+        except Exception as e:
+            logger.error(f"[Watermark] Ошибка источника, прогон неполный: {e}")
+            self.complete = False
+
+    def commit(self, items_seen: int) -> None:
+        """Перенести наблюдения прогона в водяной знак."""
+        wm = self.watermark
+        now = datetime.now(timezone.utc)
+
+        if self.track_heads:
+            heads = dict(wm.head_listing_ids or {})
+            for partition, ids in self._heads.items():
+                if self.is_delta:
+                    # Новые записи дописываются перед старой головой
+                    seen = set(ids)
+                    ids = ids + [i for i in heads.get(partition, []) if i not in seen]
+                heads[partition] = ids[:self.head_size]
+            wm.head_listing_ids = heads
+
+        if self._max_listed_at is not None:
+            if wm.last_listed_at is None or self._max_listed_at > _aware(wm.last_listed_at):
+                wm.last_listed_at = self._max_listed_at
+
+        wm.last_mode = self.mode
+        wm.last_sync_at = now
+        wm.last_items_seen = items_seen
+        if self.mode == MODE_FULL and self.complete:
+            wm.last_full_sync_at = self.started_at
+
+
+async def deactivate_unseen(
+    session,
+    market_id: int,
+    collection_id: int,
+    seen_since: datetime,
+    removed: Optional[list] = None,
+) -> int:
+    """
+    Деактивировать листинги маркета, не встреченные полным прогоном.
+
+    Защита от деградации источника: если снять пришлось бы больше
+    SYNC_RECONCILE_MAX_DROP активных листингов, ничего не меняется —
+    скорее всего, API отдал неполные данные.
+
+    Args:
+        removed: если передан, сюда добавляются строки (nft_id,
+            market_listing_id, gift_type) деактивированных листингов
+
+    Returns: количество деактивированных листингов
+    """
+    in_collection = Listing.nft_id.in_(
+        select(NFT.id).where(NFT.collection_id == collection_id)
+    )
+    active = (
+        Listing.market_id == market_id,
+        Listing.is_active == True,
+        in_collection,
+    )
+
+    result = await session.execute(
+        select(
+            func.count(),
+            func.count().filter(Listing.last_seen_at < seen_since),
+        ).where(*active)
+    )
+    total, unseen = result.one()
+
+    if not unseen:
+        return 0
+    if unseen > total * settings.SYNC_RECONCILE_MAX_DROP:
+        logger.warning(
+            f"[Watermark] Пропускаю деактивацию: не найдено {unseen} из {total} "
+            f"активных листингов маркета {market_id}"
+        )
+        return 0
+
+    stmt = (
+        update(Listing)
+        .where(*active, Listing.last_seen_at < seen_since)
+        .values(is_active=False, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    if removed is None:
+        result = await session.execute(stmt)
+        return result.rowcount
+
+    gift_type = select(NFT.gift_type).where(NFT.id == Listing.nft_id).scalar_subquery()
+    result = await session.execute(
+        stmt.returning(Listing.nft_id, Listing.market_listing_id, gift_type.label("gift_type"))
+    )
+    rows = result.all()
+    removed.extend(rows)
+    return len(rows)
+
+
+def _aware(value: datetime) -> datetime:
+    """Naive datetime считаем UTC, чтобы сравнивать с aware."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
@@ -63,6 +63,20 @@ celery_app.conf.beat_schedule = {
         "options": {"queue": "sync"},
     },
 
+    # Rebuild the gift_facets summary hourly (syncs update it incrementally)
+    "rebuild-gift-facets-hourly": {
+        "task": "app.workers.tasks.sync_listings.rebuild_gift_facets",
+        "schedule": crontab(minute=30),  # Every hour at :30
+        "options": {"queue": "sync"},
+    },
+
+    # Exact recount of /api/v1/stats counters (syncs keep them approximately)
+    "recount-platform-stats-hourly": {
+        "task": "app.workers.tasks.sync_listings.recount_platform_stats",
+        "schedule": crontab(minute=45),  # Every hour at :45
+        "options": {"queue": "sync"},
+    },
+
     # Update FX rates every 5 minutes
     "update-fx-rates": {
         "task": "app.workers.tasks.update_prices.update_fx_rates",
@@ -0,0 +1,93 @@
+"""
+Async runtime of a Celery worker process.
+
+Each worker process owns one long-lived event loop, created on
+worker_process_init and closed on worker_process_shutdown. Tasks run
+their coroutines on it via run_async(), so everything bound to the loop
+survives between tasks: the SQLAlchemy engine pool, the pooled HTTP
+clients (app.core.clients) and Redis. A small sync then costs only
+its own I/O, without new TLS handshakes or DB connections.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from celery.signals import worker_process_init, worker_process_shutdown
+
+logger = logging.getLogger(__name__)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Get (or lazily create) the worker's event loop."""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def run_async(coro):
+    """
+    Run a coroutine on the worker's persistent event loop.
+
+    An exception raised into the loop from outside the coroutine (e.g.
+    Celery's SoftTimeLimitExceeded from a signal handler) would leave its
+    task pending on the loop, to resume in the middle of the next Celery
+    task with its DB session still open. The task is cancelled and its
+    cleanup run to completion before the exception propagates.
+    """
+    loop = get_loop()
+    task = loop.create_task(coro)
+    try:
+        return loop.run_until_complete(task)
+    except BaseException:
+        if not task.done():
+            task.cancel()
+            try:
+                loop.run_until_complete(task)
+            except BaseException:
+                pass
+        raise
+
+
+async def _aclose() -> None:
+    from app.core.clients import close_clients
+    from app.core.database import close_db
+
+    await close_clients()
+    await close_db()
+
+
+def shutdown() -> None:
+    """Close shared clients and the engine, then the loop itself."""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        return
+
+    try:
+        _loop.run_until_complete(_aclose())
+        _loop.run_until_complete(_loop.shutdown_asyncgens())
+    except Exception as e:
+        logger.warning(f"Error shutting down worker runtime: {e}")
+    finally:
+        _loop.close()
+        _loop = None
+
+
+@worker_process_init.connect
+def init_worker_runtime(**kwargs):
+    """Start the loop in a freshly forked worker process."""
+    from app.core.database import engine
+
+    # Connections inherited from the parent process must not be reused
+    engine.sync_engine.dispose(close=False)
+    get_loop()
+    logger.info("Worker async runtime started")
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_runtime(**kwargs):
+    shutdown()
+    logger.info("Worker async runtime stopped")
@@ -6,7 +6,6 @@ Handles:
 - Incremental updates
 - Metadata resolution
 """
-import asyncio
 import logging
 from datetime import datetime
 
@@ -15,7 +14,10 @@ from sqlalchemy import select, update
 from sqlalchemy.dialects.postgresql import insert
 
 from app.workers.celery_app import celery_app
+from app.workers.runtime import run_async
+from app.core.cache import COLLECTIONS_TAG, collection_tag, invalidate_tags
 from app.core.database import get_async_session
+from app.core.platform_stats import refresh_platform_stats
 from app.models.collection import Collection
 from app.models.nft import NFT
 from app.indexer.ton_client import get_ton_client, NFTItemData
@@ -25,16 +27,6 @@ from app.config import settings
 logger = logging.getLogger(__name__)
 
 
-def run_async(coro):
-    """Helper to run async code in sync Celery task."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
-
-
 @celery_app.task(
     name="app.workers.tasks.index_collection.index_collection",
     bind=True,
@@ -157,6 +149,10 @@ async def _index_collection_async(
 
         await session.commit()
 
+    # New or re-indexed NFTs change collection listings and catalog stats
+    await invalidate_tags(COLLECTIONS_TAG, collection_tag(collection_id))
+    await refresh_platform_stats()
+
     return stats
 
 
@@ -6,37 +6,37 @@ Handles:
 - Updating listing status
 - Cleaning up stale listings
 """
-import asyncio
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from decimal import Decimal
+from typing import Optional
 
-from celery import shared_task
+from celery import chord, shared_task
 from sqlalchemy import select, update, delete, and_
 from sqlalchemy.dialects.postgresql import insert
 
 from app.workers.celery_app import celery_app
+from app.workers.runtime import run_async
 from app.core.database import get_async_session
 from app.models.nft import NFT
 from app.models.listing import Listing
 from app.models.market import Market
+from app.models.collection import Collection
 from app.adapters.getgems import GetGemsAdapter
 from app.adapters.base import NormalizedListing, ListingStatus
 from app.config import settings
+from app.core.cache import bump_sync_generation
+from app.core.clients import get_sync_redis
+from app.core.platform_stats import recount_platform_stats, refresh_platform_stats
+from app.core.pubsub import MessageType, PriceUpdateMessage, publish_updates
+from app.sync.facets import refresh_gift_facets
+from app.sync.fingerprints import FingerprintStore, listing_fingerprint
+from app.sync.prices import recompute_best_prices
 
 logger = logging.getLogger(__name__)
 
 
-def run_async(coro):
-    """Helper to run async code in sync Celery task."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
-
-
 # Registry of adapters
 ADAPTERS = {
     "getgems": GetGemsAdapter,
@@ -54,78 +54,228 @@ def sync_all_listings(self):
     """
     Sync listings from all active markets for all collections.
 
-    This is the main periodic sync task.
+    This is the main periodic sync task. It only plans the run: every
+    (market, collection) pair is synced by its own sync_market_collection
+    task, so pairs spread across all workers of the sync queue, and
+    summarize_listings_sync aggregates the results (Celery chord).
     """
     logger.info("Starting full listings sync")
 
     try:
-        result = run_async(_sync_all_listings_async())
-        logger.info(f"Completed full listings sync: {result}")
-        return result
+        pairs = run_async(_list_sync_pairs_async())
     except Exception as e:
         logger.error(f"Error in full listings sync: {e}")
         raise
 
+    if not pairs:
+        logger.info("No market/collection pairs to sync")
+        return _summarize_pair_results([])
+
+    result = chord(
+        sync_market_collection.s(market_id, collection_id)
+        for market_id, collection_id in pairs
+    )(summarize_listings_sync.s())
+
+    logger.info(f"Dispatched listings sync for {len(pairs)} market/collection pairs")
+    return {"pairs": len(pairs), "summary_task_id": result.id}
+
+
+async def _list_sync_pairs_async() -> list[tuple[int, int]]:
+    """(market_id, collection_id) pairs to sync: active markets with an adapter."""
+    async with get_async_session() as session:
+        # Get all active markets
+        result = await session.execute(
+            select(Market).where(Market.is_active == True)
+        )
+        markets = []
+        for market in result.scalars().all():
+            if market.slug in ADAPTERS:
+                markets.append(market)
+            else:
+                logger.warning(f"No adapter for market {market.slug}")
+
+        # Get all indexed collections
+        result = await session.execute(
+            select(Collection.id).where(Collection.indexing_status == "completed")
+        )
+        collection_ids = result.scalars().all()
+
+    return [
+        (market.id, collection_id)
+        for market in markets
+        for collection_id in collection_ids
+    ]
+
+
+@celery_app.task(
+    name="app.workers.tasks.sync_listings.sync_market_collection",
+    bind=True,
+    soft_time_limit=max(settings.SYNC_PAIR_LOCK_TIMEOUT - 30, 30),
+    time_limit=settings.SYNC_PAIR_LOCK_TIMEOUT,
+    # Not throttled by task_default_rate_limit (None would inherit it, 0 is
+    # "no limit"): a sync run fans out one task per pair, and upstream APIs
+    # are paced by the shared token buckets
+    rate_limit=0,
+)
+def sync_market_collection(self, market_id: int, collection_id: int):
+    """
+    Sync listings of one collection from one market.
+
+    Runs under a distributed lock per pair: if the previous run of the
+    same pair is still in progress, this one is skipped. Never raises,
+    so one failing pair does not fail the chord.
+    """
+    result = {"market_id": market_id, "collection_id": collection_id}
+
+    with _pair_lock(market_id, collection_id) as acquired:
+        if not acquired:
+            logger.info(f"Sync of market {market_id} / collection {collection_id} already running, skipping")
+            return {**result, "status": "skipped"}
+
+        try:
+            return {**result, **run_async(_sync_market_collection_async(market_id, collection_id))}
+        except Exception as e:
+            logger.error(f"Error syncing market {market_id} / collection {collection_id}: {e}")
+            return {**result, "status": "error", "error": str(e)}
+
+
+async def _sync_market_collection_async(market_id: int, collection_id: int) -> dict:
+    """Async implementation of a single pair sync (own session and transaction)."""
+    pending_fingerprints = []
+
+    async with get_async_session() as session:
+        market = await session.get(Market, market_id)
+        collection = await session.get(Collection, collection_id)
+        if not market or not collection:
+            return {"status": "missing"}
+
+        pair = {"market": market.slug, "collection": collection.address}
+        adapter = ADAPTERS[market.slug](config=market.config)
+
+        gift_types = set()
+        updates = []
+        try:
+            stats = await _sync_collection_market(
+                session, adapter, market, collection, pending_fingerprints, gift_types, updates
+            )
+            await session.commit()
+        finally:
+            await adapter.close()
+
+    # Fingerprints are saved only once the writes are committed
+    for store, fingerprints in pending_fingerprints:
+        await store.save(fingerprints)
+    if _has_changes(stats):
+        await bump_sync_generation(collection_ids=[collection_id], gift_types=gift_types)
+        await refresh_platform_stats(listings_delta=_listings_delta(stats))
+    await publish_updates(updates)
+
+    return {**pair, "status": "ok", **stats}
 
-async def _sync_all_listings_async() -> dict:
-    """Async implementation of full listings sync."""
+
+def _has_changes(stats: dict) -> bool:
+    """Whether a sync changed listings (and cached derived data is stale)."""
+    return bool(
+        stats.get("new") or stats.get("updated")
+        or stats.get("reactivated") or stats.get("deactivated")
+    )
+
+
+def _listings_delta(stats: dict) -> int:
+    """Change of the active listing count (new and reactivated ones were not active before)."""
+    return stats.get("new", 0) + stats.get("reactivated", 0) - stats.get("deactivated", 0)
+
+
+@celery_app.task(
+    name="app.workers.tasks.sync_listings.summarize_listings_sync",
+)
+def summarize_listings_sync(results: list[dict]):
+    """Aggregate per-pair results of sync_all_listings."""
+    stats = _summarize_pair_results(results)
+    logger.info(f"Completed full listings sync: {stats}")
+    return stats
+
+
+def _summarize_pair_results(results: list[dict]) -> dict:
     stats = {
         "markets_synced": 0,
         "collections_synced": 0,
         "total_listings": 0,
         "new_listings": 0,
         "updated_listings": 0,
+        "reactivated_listings": 0,
+        "unchanged_listings": 0,
         "deactivated_listings": 0,
+        "by_market": {},
+        "skipped": 0,
         "errors": [],
     }
+    markets = set()
 
-    async with get_async_session() as session:
-        # Get all active markets
-        result = await session.execute(
-            select(Market).where(Market.is_active == True)
-        )
-        markets = result.scalars().all()
+    for result in results:
+        status = result.get("status")
+        pair = f"{result.get('market', result['market_id'])}/{result.get('collection', result['collection_id'])}"
 
-        # Get all indexed collections
-        from app.models.collection import Collection
-        result = await session.execute(
-            select(Collection).where(Collection.indexing_status == "completed")
+        if status == "skipped":
+            stats["skipped"] += 1
+            continue
+        if status != "ok":
+            stats["errors"].append(f"{pair}: {result.get('error', status)}")
+            continue
+
+        markets.add(result["market"])
+        stats["collections_synced"] += 1
+        stats["total_listings"] += result.get("total", 0)
+        stats["new_listings"] += result.get("new", 0)
+        stats["updated_listings"] += result.get("updated", 0)
+        stats["reactivated_listings"] += result.get("reactivated", 0)
+        stats["unchanged_listings"] += result.get("unchanged", 0)
+        stats["deactivated_listings"] += result.get("deactivated", 0)
+
+        market_stats = stats["by_market"].setdefault(
+            result["market"], {"changed": 0, "unchanged": 0, "touched": 0},
         )
-        collections = result.scalars().all()
+        market_stats["changed"] += (
+            result.get("new", 0) + result.get("updated", 0) + result.get("reactivated", 0)
+        )
+        market_stats["unchanged"] += result.get("unchanged", 0)
+        market_stats["touched"] += result.get("touched", 0)
 
-        for market in markets:
-            adapter_class = ADAPTERS.get(market.slug)
-            if not adapter_class:
-                logger.warning(f"No adapter for market {market.slug}")
-                continue
+    stats["markets_synced"] = len(markets)
+    return stats
 
-            adapter = adapter_class(config=market.config)
 
-            try:
-                for collection in collections:
-                    try:
-                        sync_result = await _sync_collection_market(
-                            session, adapter, market, collection
-                        )
-                        stats["total_listings"] += sync_result.get("total", 0)
-                        stats["new_listings"] += sync_result.get("new", 0)
-                        stats["updated_listings"] += sync_result.get("updated", 0)
-                        stats["deactivated_listings"] += sync_result.get("deactivated", 0)
-                        stats["collections_synced"] += 1
-
-                    except Exception as e:
-                        error_msg = f"{market.slug}/{collection.address}: {e}"
-                        logger.error(f"Error syncing: {error_msg}")
-                        stats["errors"].append(error_msg)
-
-                stats["markets_synced"] += 1
-
-            finally:
-                await adapter.close()
+@contextmanager
+def _pair_lock(market_id: int, collection_id: int):
+    """
+    Distributed lock for one (market, collection) pair.
 
-        await session.commit()
+    Yields True if the lock is held by this worker, False if another run
+    holds it. If Redis is unreachable the sync proceeds unlocked.
+    """
+    import redis
 
-    return stats
+    lock = get_sync_redis().lock(
+        f"lock:sync:listings:{market_id}:{collection_id}",
+        timeout=settings.SYNC_PAIR_LOCK_TIMEOUT,
+        blocking=False,
+    )
+
+    try:
+        acquired = lock.acquire()
+    except redis.RedisError as e:
+        logger.warning(f"Sync lock unavailable, running unlocked: {e}")
+        lock = None
+        acquired = True
+
+    try:
+        yield acquired
+    finally:
+        if lock is not None and acquired:
+            try:
+                lock.release()
+            except redis.RedisError:
+                pass  # Expired or Redis went away
 
 
 async def _sync_collection_market(
@@ -133,14 +283,41 @@ async def _sync_collection_market(
     adapter,
     market,
     collection,
+    pending_fingerprints: Optional[list] = None,
+    gift_types: Optional[set] = None,
+    updates: Optional[list] = None,
 ) -> dict:
     """
     Sync listings for a specific collection from a specific market.
 
+    Active listings whose fingerprint (price, currency, seller, expiry)
+    matches the previous run are not rewritten: they only get a batched
+    last_seen_at touch, at most once per SYNC_TOUCH_INTERVAL. Listings
+    deactivated in between are rewritten to reactivate them.
+
+    Args:
+        pending_fingerprints: if given, new fingerprints are appended
+            here as (store, fingerprints) for the caller to save after
+            commit; otherwise they are saved immediately
+        gift_types: if given, gift types of repriced NFTs are added here
+            (response cache tags to invalidate after commit)
+        updates: if given, WebSocket messages for new, repriced and
+            removed listings are added here (to publish after commit)
+
     Returns:
-        Dict with sync stats
+        Dict with sync stats ("reactivated": known listings that were
+        stored as inactive and are active again)
     """
-    stats = {"total": 0, "new": 0, "updated": 0, "deactivated": 0}
+    stats = {
+        "total": 0,
+        "new": 0,
+        "updated": 0,
+        "reactivated": 0,
+        "unchanged": 0,
+        "touched": 0,
+        "deactivated": 0,
+    }
+    store = FingerprintStore(market.id, collection.id)
 
     # Fetch current listings from market
     listings = await adapter.fetch_collection_listings(collection.address)
@@ -148,29 +325,46 @@ async def _sync_collection_market(
 
     if not listings:
         # Mark all existing listings as inactive
-        deactivated = await _deactivate_market_listings(session, market.id, collection.id)
-        stats["deactivated"] = deactivated
+        removed = await _deactivate_market_listings(session, market.id, collection.id)
+        stats["deactivated"] = deactivated = len(removed)
+        _add_removed_updates(updates, removed, market, collection)
+        if deactivated:
+            changed = set()
+            await recompute_best_prices(
+                session, nft_ids={row.nft_id for row in removed}, changed=changed,
+            )
+            await refresh_gift_facets(session, changed, gift_types=gift_types)
+        await _save_fingerprints(store, {}, pending_fingerprints)
         return stats
 
     # Build NFT address to ID mapping
     nft_addresses = [l.nft_address for l in listings]
     result = await session.execute(
-        select(NFT.id, NFT.address)
+        select(NFT.id, NFT.address, NFT.gift_type)
         .where(NFT.address.in_(nft_addresses))
     )
-    nft_map = {row.address: row.id for row in result}
+    nfts = result.all()
+    nft_map = {row.address: row.id for row in nfts}
+    nfts_by_id = {row.id: row for row in nfts}
 
-    # Track seen listing IDs for deactivation
-    seen_listing_ids = set()
+    known = await store.load(session)
+    fingerprints = {}
+    rows_by_id = {}
+    now = datetime.utcnow()
 
-    # Upsert listings
     for listing in listings:
         nft_id = nft_map.get(listing.nft_address)
         if not nft_id:
             # NFT not in our DB - skip or index it
             continue
 
-        listing_data = {
+        fingerprints[listing.market_listing_id] = listing_fingerprint(
+            listing.price_raw,
+            listing.currency,
+            listing.seller_address,
+            listing.expires_at,
+        )
+        rows_by_id[listing.market_listing_id] = {
             "nft_id": nft_id,
             "market_id": market.id,
             "market_listing_id": listing.market_listing_id,
@@ -182,29 +376,92 @@ async def _sync_collection_market(
             "is_active": True,
             "listed_at": listing.listed_at,
             "expires_at": listing.expires_at,
-            "last_seen_at": datetime.utcnow(),
+            "last_seen_at": now,
         }
 
-        # Upsert listing
-        stmt = insert(Listing).values(listing_data)
+    # A matching fingerprint means "unchanged" only for an active row:
+    # listings deactivated since the last run (deactivate_unseen,
+    # cleanup_stale_listings) are written again to reactivate them
+    stored = [market_listing_id for market_listing_id in fingerprints if market_listing_id in known]
+    inactive = await _inactive_listing_ids(session, market.id, stored)
+    unchanged_ids = [
+        market_listing_id
+        for market_listing_id, fingerprint in fingerprints.items()
+        if known.get(market_listing_id) == fingerprint and market_listing_id not in inactive
+    ]
+    unchanged = set(unchanged_ids)
+
+    changed = {}
+    for market_listing_id, row in rows_by_id.items():
+        if market_listing_id in unchanged:
+            continue
+        if market_listing_id in inactive:
+            stats["reactivated"] += 1
+        elif market_listing_id in known:
+            stats["updated"] += 1
+        else:
+            stats["new"] += 1
+        changed[market_listing_id] = row
+
+    stats["unchanged"] = len(unchanged_ids)
+
+    if updates is not None:
+        for market_listing_id, row in changed.items():
+            message_type = (
+                MessageType.PRICE_UPDATE
+                if market_listing_id in known and market_listing_id not in inactive
+                else MessageType.NEW_LISTING
+            )
+            nft = nfts_by_id[row["nft_id"]]
+            updates.append(PriceUpdateMessage.from_listing(
+                message_type, collection.id, market.slug, row,
+                nft_address=nft.address,
+                gift_type=nft.gift_type,
+            ))
+
+    # Upsert only listings that actually changed
+    rows = list(changed.values())
+    for start in range(0, len(rows), settings.SYNC_BATCH_SIZE):
+        stmt = insert(Listing).values(rows[start:start + settings.SYNC_BATCH_SIZE])
         stmt = stmt.on_conflict_do_update(
             constraint="uq_listings_market_nft",
             set_={
                 "price_raw": stmt.excluded.price_raw,
                 "price_ton": stmt.excluded.price_ton,
+                "currency": stmt.excluded.currency,
+                "seller_address": stmt.excluded.seller_address,
+                "expires_at": stmt.excluded.expires_at,
                 "is_active": True,
-                "last_seen_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow(),
+                "last_seen_at": stmt.excluded.last_seen_at,
+                "updated_at": now,
             },
         )
         await session.execute(stmt)
 
-        seen_listing_ids.add(listing.market_listing_id)
-        stats["updated"] += 1
+    # Unchanged listings: keep last_seen_at fresh for stale cleanup,
+    # but skip rows touched recently
+    touch_before = now - timedelta(seconds=settings.SYNC_TOUCH_INTERVAL)
+    for start in range(0, len(unchanged_ids), settings.SYNC_BATCH_SIZE):
+        result = await session.execute(
+            update(Listing)
+            .where(
+                and_(
+                    Listing.market_id == market.id,
+                    Listing.market_listing_id.in_(
+                        unchanged_ids[start:start + settings.SYNC_BATCH_SIZE]
+                    ),
+                    Listing.last_seen_at < touch_before,
+                )
+            )
+            .values(last_seen_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        stats["touched"] += result.rowcount
 
     # Deactivate listings not seen in this sync
-    if seen_listing_ids:
-        deactivated = await session.execute(
+    affected_nft_ids = {row["nft_id"] for row in rows}
+    if fingerprints:
+        result = await session.execute(
             update(Listing)
             .where(
                 and_(
@@ -213,25 +470,78 @@ async def _sync_collection_market(
                         select(NFT.id).where(NFT.collection_id == collection.id)
                     ),
                     Listing.is_active == True,
-                    Listing.market_listing_id.notin_(seen_listing_ids),
+                    Listing.market_listing_id.notin_(fingerprints.keys()),
                 )
             )
-            .values(is_active=False, updated_at=datetime.utcnow())
+            .values(is_active=False, updated_at=now)
+            .returning(Listing.nft_id, Listing.market_listing_id, _listing_gift_type())
+            .execution_options(synchronize_session=False)
         )
-        stats["deactivated"] = deactivated.rowcount
+        removed = result.all()
+        stats["deactivated"] = len(removed)
+        affected_nft_ids.update(row.nft_id for row in removed)
+        _add_removed_updates(updates, removed, market, collection)
 
-    # Update NFT sale status
-    await _update_nft_sale_status(session, list(nft_map.values()))
+    # Update NFT sale status and facets where listings changed
+    changed = set()
+    await recompute_best_prices(session, nft_ids=affected_nft_ids, changed=changed)
+    await refresh_gift_facets(session, changed, gift_types=gift_types)
+
+    await _save_fingerprints(store, fingerprints, pending_fingerprints)
 
     return stats
 
 
+def _listing_gift_type():
+    """Gift type of a listing's NFT, for RETURNING of listing updates."""
+    return select(NFT.gift_type).where(NFT.id == Listing.nft_id).scalar_subquery().label("gift_type")
+
+
+def _add_removed_updates(updates: Optional[list], removed, market, collection) -> None:
+    """Add listing_removed messages for deactivated (nft_id, market_listing_id, gift_type) rows."""
+    if updates is None:
+        return
+    for row in removed:
+        updates.append(PriceUpdateMessage.from_listing(
+            MessageType.LISTING_REMOVED, collection.id, market.slug, row._mapping,
+        ))
+
+
+async def _inactive_listing_ids(session, market_id: int, market_listing_ids: list[str]) -> set[str]:
+    """Those of the given listings of a market that are stored as inactive."""
+    inactive = set()
+    for start in range(0, len(market_listing_ids), settings.SYNC_BATCH_SIZE):
+        result = await session.execute(
+            select(Listing.market_listing_id).where(
+                Listing.market_id == market_id,
+                Listing.market_listing_id.in_(
+                    market_listing_ids[start:start + settings.SYNC_BATCH_SIZE]
+                ),
+                Listing.is_active == False,
+            )
+        )
+        inactive.update(result.scalars())
+    return inactive
+
+
+async def _save_fingerprints(store, fingerprints: dict, pending: Optional[list]) -> None:
+    if pending is None:
+        await store.save(fingerprints)
+    else:
+        pending.append((store, fingerprints))
+
+
 async def _deactivate_market_listings(
     session,
     market_id: int,
     collection_id: int,
-) -> int:
-    """Deactivate all listings for a market/collection pair."""
+) -> list:
+    """
+    Deactivate all listings for a market/collection pair.
+
+    Returns:
+        (nft_id, market_listing_id, gift_type) rows of the deactivated listings
+    """
     from app.models.nft import NFT
 
     result = await session.execute(
@@ -246,78 +556,10 @@ async def _deactivate_market_listings(
             )
         )
         .values(is_active=False, updated_at=datetime.utcnow())
+        .returning(Listing.nft_id, Listing.market_listing_id, _listing_gift_type())
+        .execution_options(synchronize_session=False)
     )
-    return result.rowcount
-
-
-async def _update_nft_sale_status(session, nft_ids: list[int]):
-    """
-    Update NFT sale status based on active listings.
-
-    Sets is_on_sale, lowest_price_ton, lowest_price_market for each NFT.
-    """
-    if not nft_ids:
-        return
-
-    from sqlalchemy import func
-
-    # Find cheapest active listing for each NFT
-    subquery = (
-        select(
-            Listing.nft_id,
-            func.min(Listing.price_ton).label("min_price"),
-        )
-        .where(
-            and_(
-                Listing.nft_id.in_(nft_ids),
-                Listing.is_active == True,
-            )
-        )
-        .group_by(Listing.nft_id)
-        .subquery()
-    )
-
-    # Get the market for the cheapest listing
-    result = await session.execute(
-        select(
-            Listing.nft_id,
-            Listing.price_ton,
-            Market.slug,
-        )
-        .join(subquery, and_(
-            Listing.nft_id == subquery.c.nft_id,
-            Listing.price_ton == subquery.c.min_price,
-        ))
-        .join(Market, Listing.market_id == Market.id)
-        .where(Listing.is_active == True)
-    )
-    cheapest = {row.nft_id: (row.price_ton, row.slug) for row in result}
-
-    # Update NFTs
-    for nft_id in nft_ids:
-        if nft_id in cheapest:
-            price, market_slug = cheapest[nft_id]
-            await session.execute(
-                update(NFT)
-                .where(NFT.id == nft_id)
-                .values(
-                    is_on_sale=True,
-                    lowest_price_ton=price,
-                    lowest_price_market=market_slug,
-                    updated_at=datetime.utcnow(),
-                )
-            )
-        else:
-            await session.execute(
-                update(NFT)
-                .where(NFT.id == nft_id)
-                .values(
-                    is_on_sale=False,
-                    lowest_price_ton=None,
-                    lowest_price_market=None,
-                    updated_at=datetime.utcnow(),
-                )
-            )
+    return result.all()
 
 
 @celery_app.task(
@@ -358,7 +600,51 @@ async def _cleanup_stale_listings_async(hours: int) -> int:
             .values(is_active=False, updated_at=datetime.utcnow())
         )
         await session.commit()
-        return result.rowcount
+
+    if result.rowcount:
+        await bump_sync_generation()
+        await refresh_platform_stats(listings_delta=-result.rowcount)
+    return result.rowcount
+
+
+@celery_app.task(
+    name="app.workers.tasks.sync_listings.rebuild_gift_facets",
+)
+def rebuild_gift_facets():
+    """
+    Rebuild the gift_facets summary from scratch.
+
+    Syncs refresh facets incrementally from repriced NFTs; the periodic
+    rebuild also picks up attribute changes that don't touch prices.
+    """
+    written = run_async(_rebuild_gift_facets_async())
+    logger.info(f"Rebuilt gift facets: {written} rows changed")
+    return written
+
+
+async def _rebuild_gift_facets_async() -> int:
+    async with get_async_session() as session:
+        written = await refresh_gift_facets(session)
+        await session.commit()
+
+    if written:
+        await bump_sync_generation()
+    return written
+
+
+@celery_app.task(
+    name="app.workers.tasks.sync_listings.recount_platform_stats",
+)
+def recount_platform_stats_task():
+    """
+    Recount /api/v1/stats counters exactly.
+
+    Between recounts totals are planner estimates and active listings
+    follow sync deltas; the recount corrects their drift.
+    """
+    counters = run_async(recount_platform_stats())
+    logger.info(f"Recounted platform stats: {counters}")
+    return counters
 
 
 @celery_app.task(
@@ -403,7 +689,6 @@ async def _sync_single_market_async(
             raise ValueError(f"Market {market_slug} not found in database")
 
         # Get collections to sync
-        from app.models.collection import Collection
         query = select(Collection).where(Collection.indexing_status == "completed")
         if collection_address:
             query = query.where(Collection.address == collection_address)
@@ -412,19 +697,35 @@ async def _sync_single_market_async(
         collections = result.scalars().all()
 
         adapter = adapter_class(config=market.config)
-        stats = {"total": 0, "new": 0, "updated": 0, "deactivated": 0}
+        stats = {
+            "total": 0, "new": 0, "updated": 0, "reactivated": 0,
+            "unchanged": 0, "touched": 0, "deactivated": 0,
+        }
+        pending_fingerprints = []
+        changed_collections = []
+        gift_types = set()
+        updates = []
 
         try:
             for collection in collections:
                 sync_result = await _sync_collection_market(
-                    session, adapter, market, collection
+                    session, adapter, market, collection, pending_fingerprints, gift_types, updates
                 )
                 for key in stats:
                     stats[key] += sync_result.get(key, 0)
+                if _has_changes(sync_result):
+                    changed_collections.append(collection.id)
 
             await session.commit()
 
         finally:
             await adapter.close()
 
+    for store, fingerprints in pending_fingerprints:
+        await store.save(fingerprints)
+    if _has_changes(stats):
+        await bump_sync_generation(collection_ids=changed_collections, gift_types=gift_types)
+        await refresh_platform_stats(listings_delta=_listings_delta(stats))
+    await publish_updates(updates)
+
     return stats
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Payload benchmark for /gifts pages.
+
+For one page of gifts on sale (cheapest first) compares:
+
+    entity      whole NFT rows, as list_gifts loaded them before
+                (including raw_metadata, attributes and description)
+    full        the GiftSchema column projection (?view=full)
+    compact     the grid card projection (?view=compact)
+
+and prints the bytes of row data Postgres returns (sum of
+pg_column_size of the result rows) and the size of the JSON response.
+
+Run: python scripts/bench_gift_payload.py [page_size]
+"""
+import asyncio
+import sys
+
+sys.path.insert(0, ".")
+
+from sqlalchemy import select, text
+
+from app.api.v1.gifts import _COMPACT_COLUMNS, _GIFT_COLUMNS, _gift_item
+from app.core.database import engine
+from app.core.responses import FastJSONResponse
+from app.models.collection import Collection
+from app.models.nft import NFT
+
+
+def page_query(columns, page_size: int):
+    return (
+        select(*columns)
+        .join(Collection, NFT.collection_id == Collection.id)
+        .where(NFT.is_on_sale == True)
+        .order_by(NFT.lowest_price_ton.asc().nullslast(), NFT.id.asc())
+        .limit(page_size)
+    )
+
+
+async def db_bytes(conn, query) -> int:
+    """Row data size of a query's result, as Postgres sends it."""
+    sql = query.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    result = await conn.execute(
+        text(f"SELECT coalesce(sum(pg_column_size(t.*)), 0) FROM ({sql}) t")
+    )
+    return int(result.scalar())
+
+
+async def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    entity_columns = [
+        *NFT.__table__.columns,
+        Collection.name.label("collection_name"),
+        Collection.slug.label("collection_slug"),
+    ]
+    # (name, selected columns, columns the JSON is built from, compact)
+    variants = [
+        ("entity", entity_columns, _GIFT_COLUMNS, False),
+        ("full", _GIFT_COLUMNS, _GIFT_COLUMNS, False),
+        ("compact", _COMPACT_COLUMNS, _COMPACT_COLUMNS, True),
+    ]
+
+    async with engine.connect() as conn:
+        print(f"{'variant':8} {'rows':>5} {'db bytes':>10} {'json bytes':>11}")
+        for name, columns, item_columns, compact in variants:
+            size = await db_bytes(conn, page_query(columns, page_size))
+            result = await conn.execute(page_query(item_columns, page_size))
+            rows = result.mappings().all()
+            body = FastJSONResponse({"items": [_gift_item(row, compact) for row in rows]}).body
+            print(f"{name:8} {len(rows):>5} {size:>10} {len(body):>11}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: CPU time to serialize one /gifts page.
+
+Compares the previous path (a GiftSchema per ORM row, GiftListResponse,
+FastAPI response_model validation, stdlib JSON) with the current one
+(dicts from the column projection, rendered by FastJSONResponse).
+No database is needed: rows are synthetic.
+
+Run: python scripts/bench_gift_serialization.py [page_size] [iterations]
+"""
+import asyncio
+import sys
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, ".")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.v1.gifts import GiftListResponse, GiftSchema, _GIFT_FIELDS, _gift_item
+from app.core.responses import FastJSONResponse
+
+
+def make_row(i: int) -> dict:
+    """One projected row, as list_gifts selects it."""
+    return {
+        "id": i,
+        "address": f"EQ{i:046d}",
+        "name": f"Plush Pepe #{i}",
+        "gift_type": "Plush Pepe",
+        "description": "A limited Telegram gift",
+        "collection_id": 1,
+        "collection_name": "Telegram Gifts",
+        "collection_slug": "telegram-gifts",
+        "image_url": f"https://cdn.example.com/gifts/{i}.webp",
+        "animation_url": f"https://cdn.example.com/gifts/{i}.tgs",
+        "rarity": "Rare",
+        "backdrop": "Black",
+        "model": "Cozy",
+        "pattern": "Stars",
+        "symbol": "Heart",
+        "attributes": [
+            {"trait_type": "Model", "value": "Cozy", "rarity_percent": 1.2},
+            {"trait_type": "Backdrop", "value": "Black", "rarity_percent": 2.5},
+            {"trait_type": "Symbol", "value": "Heart", "rarity_percent": 0.8},
+        ],
+        "is_on_sale": True,
+        "lowest_price_ton": Decimal("1234.500000000") + i,
+        "lowest_price_market": "portals",
+    }
+
+
+async def old_path(rows: list[dict]) -> bytes:
+    # ORM-like objects with every column, including the ones not returned
+    nfts = [
+        SimpleNamespace(**row, image_cdn_url=None, animation_cdn_url=None, raw_metadata={"k": "v" * 200})
+        for row in rows
+    ]
+    items = [
+        GiftSchema(
+            id=nft.id,
+            address=nft.address,
+            name=nft.name,
+            gift_type=nft.gift_type,
+            description=nft.description,
+            collection_id=nft.collection_id,
+            collection_name=nft.collection_name,
+            collection_slug=nft.collection_slug,
+            image_url=nft.image_cdn_url or nft.image_url,
+            animation_url=nft.animation_cdn_url or nft.animation_url,
+            rarity=nft.rarity,
+            backdrop=nft.backdrop,
+            model=nft.model,
+            pattern=nft.pattern,
+            symbol=nft.symbol,
+            attributes=nft.attributes or [],
+            is_on_sale=nft.is_on_sale,
+            lowest_price_ton=nft.lowest_price_ton,
+            lowest_price_market=nft.lowest_price_market,
+            listings=None,
+        )
+        for nft in nfts
+    ]
+    response = GiftListResponse(
+        total=10_000, page=0, page_size=len(items), total_pages=50, items=items,
+    )
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=response)
+    return JSONResponse(content).body
+
+
+async def new_path(rows: list[dict]) -> bytes:
+    items = [_gift_item(row) for row in rows]
+    content = {
+        "total": 10_000, "page": 0, "page_size": len(items), "total_pages": 50,
+        "items": items, "next_cursor": None, "total_is_estimate": False,
+    }
+    return FastJSONResponse(content).body
+
+
+RESPONSE_FIELD = create_response_field(name="response", type_=GiftListResponse)
+
+
+async def measure(name: str, path, rows: list[dict], iterations: int) -> float:
+    body = await path(rows)
+    started = time.process_time()
+    for _ in range(iterations):
+        await path(rows)
+    per_page = (time.process_time() - started) / iterations * 1000
+    print(f"{name:4} {per_page:8.3f} ms CPU/page  {len(body):>8} bytes")
+    return per_page
+
+
+async def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rows = [make_row(i) for i in range(page_size)]
+    assert set(rows[0]) == set(_GIFT_FIELDS)
+
+    print(f"{page_size} gifts per page, {iterations} iterations")
+    old = await measure("old", old_path, rows, iterations)
+    new = await measure("new", new_path, rows, iterations)
+    print(f"speedup: x{old / new:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for /gifts.
+
+Runs EXPLAIN for the standard /gifts filter/sort combinations and checks
+that each plan uses the index built for it (migration 005) and, for the
+keyset sorts, that the index also delivers the order: no Sort node in
+the plan. An index that is merely scanned while the rows are re-sorted
+afterwards (e.g. NULLS FIRST index vs NULLS LAST order) is a failure.
+Catches changes that silently turn an index range scan into a full
+scan, e.g. wrapping a sort key in an expression or dropping the id
+tiebreak.
+
+Queries are built by the same helper as list_gifts. Sequential scans
+are disabled for the check: on small development databases the planner
+would rightly prefer them, and the question here is whether the index
+*can* serve the query shape.
+
+Run: python scripts/check_query_plans.py   (exit code 1 on regression)
+"""
+import asyncio
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, ".")
+
+from sqlalchemy import or_, text
+
+from app.api.v1.gifts import _SORTS, _after_cursor, _gifts_page_query
+from app.core.database import engine, explain
+from app.models.nft import NFT
+
+PAGE = 51  # page_size + 1, as list_gifts fetches
+
+
+def gifts_query(sort: str, *conditions, cursor: tuple = None, compact: bool = False):
+    """SELECT of list_gifts for the given filters, sort and cursor."""
+    spec = _SORTS[sort]
+    conditions = list(conditions)
+    if cursor:
+        conditions.append(_after_cursor(spec, *cursor))
+    return _gifts_page_query(spec, conditions, compact).limit(PAGE)
+
+
+ON_SALE = NFT.is_on_sale == True
+SEARCH = or_(NFT.name.ilike("%cap%"), NFT.gift_type.ilike("%cap%"))
+
+# (name, query, indexes expected in the plan, index must deliver the order)
+CASES = [
+    ("on sale, price asc", gifts_query("price_asc", ON_SALE), {"idx_nfts_sale_price_id"}, True),
+    ("on sale, price desc", gifts_query("price_desc", ON_SALE), {"idx_nfts_sale_price_id"}, True),
+    (
+        "on sale, price asc, cursor",
+        gifts_query("price_asc", ON_SALE, cursor=(Decimal("10"), 1000)),
+        {"idx_nfts_sale_price_id"},
+        True,
+    ),
+    (
+        "on sale, price asc, compact",
+        gifts_query("price_asc", ON_SALE, compact=True),
+        {"idx_nfts_sale_price_id"},
+        True,
+    ),
+    (
+        "on sale, one gift type, price asc",
+        gifts_query("price_asc", ON_SALE, NFT.gift_type.in_(["Plush Pepe"])),
+        {"idx_nfts_sale_gift_type_price"},
+        True,
+    ),
+    (
+        # Several index ranges are merged, which needs a sort
+        "on sale, several gift types, price asc",
+        gifts_query("price_asc", ON_SALE, NFT.gift_type.in_(["Plush Pepe", "Durov's Cap"])),
+        {"idx_nfts_sale_gift_type_price"},
+        False,
+    ),
+    ("on sale, rarity desc", gifts_query("rarity_desc", ON_SALE), {"idx_nfts_sale_rarity_rank"}, True),
+    ("recent", gifts_query("recent"), {"idx_nfts_created_at"}, True),
+    (
+        "search",
+        gifts_query("price_asc", SEARCH),
+        {"idx_nfts_name_trgm", "idx_nfts_gift_type_trgm"},
+        False,
+    ),
+]
+
+
+def plan_nodes(node: dict):
+    """A JSON plan node and all nodes below it."""
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+async def main() -> int:
+    failures = 0
+    async with engine.connect() as conn:
+        await conn.execute(text("SET enable_seqscan = off"))
+        for name, query, expected, ordered in CASES:
+            nodes = list(plan_nodes(await explain(conn, query)))
+            used = {node["Index Name"] for node in nodes if "Index Name" in node}
+            sorts = [node["Node Type"] for node in nodes if "Sort" in node["Node Type"]]
+
+            problems = []
+            if expected - used:
+                problems.append(f"expected {sorted(expected - used)}")
+            if ordered and sorts:
+                problems.append(f"rows are re-sorted ({', '.join(sorts)})")
+            failures += bool(problems)
+            print(f"[{'FAIL' if problems else 'ok':4}] {name}: uses {sorted(used) or 'no index'}")
+            for problem in problems:
+                print(f"       {problem}")
+    await engine.dispose()
+
+    print(f"\n{len(CASES) - failures}/{len(CASES)} query plans as expected")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))